@@ -4,7 +4,6 @@ source env/bin/activate
 sudo pip3 install -r requirements.txt
 python manage.py migrate
 python manage.py collectstatic
-celery --app=el_tinto.mails worker --loglevel=info --scheduler django_celery_beat.schedulers:DatabaseScheduler
+sh deploy/install_services.sh
 sudo systemctl restart nginx
-sudo systemctl restart gunicorn
-sudo /etc/init.d/celeryd restart
\ No newline at end of file
+sudo systemctl restart gunicorn
\ No newline at end of file
@@ -0,0 +1,33 @@
+#!/bin/sh
+# Install and restart the systemd units of the background processes, rendered for
+# the user and checkout running the deploy. Run from the repository root with the
+# virtualenv active. The mail workers unit is only installed when the mail dispatches
+# are fanned out to Celery, otherwise it is stopped and removed.
+set -e
+
+APP_DIR=$(pwd)
+
+# Read as manage.py does, from the environment or the .env file
+MAIL_WORKER_BACKEND=$(python -c "import os; from dotenv import load_dotenv; load_dotenv(); print(os.getenv('MAIL_WORKER_BACKEND', ''))")
+
+UNITS="el_tinto_scheduler el_tinto_mail_outbox"
+
+if [ "$MAIL_WORKER_BACKEND" = "celery" ]; then
+    UNITS="$UNITS el_tinto_mail_worker"
+
+elif [ -f /etc/systemd/system/el_tinto_mail_worker.service ]; then
+    sudo systemctl disable --now el_tinto_mail_worker
+    sudo rm /etc/systemd/system/el_tinto_mail_worker.service
+fi
+
+for unit in $UNITS; do
+    sed -e "s|{{USER}}|$USER|g" -e "s|{{APP_DIR}}|$APP_DIR|g" "deploy/systemd/$unit.service" \
+        | sudo tee "/etc/systemd/system/$unit.service" > /dev/null
+done
+
+sudo systemctl daemon-reload
+
+for unit in $UNITS; do
+    sudo systemctl enable "$unit"
+    sudo systemctl restart "$unit"
+done
@@ -1,8 +1,9 @@
 import os
+import subprocess
 from os.path import join
 from distutils.util import strtobool
+from urllib.parse import quote
 from configurations import Configuration
-# from kombu.utils.url import safequote
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
@@ -10,6 +11,22 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def get_git_revision():
+    """
+    Get the git revision of the deployed code, empty if it is not a git checkout.
+
+    :return:
+    revision: str
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
 class Common(Configuration):
     INSTALLED_APPS = (
         'jazzmin',
@@ -19,6 +36,7 @@ class Common(Configuration):
         'django.contrib.sessions',
         'django.contrib.messages',
         'django.contrib.staticfiles',
+        'django.contrib.postgres',
 
         # Third party apps
         'rest_framework',  # utilities for rest apis
@@ -263,6 +281,47 @@ class Common(Configuration):
         }
     }
 
+    # Tracking events write-behind buffer (see el_tinto.utils.events)
+    EVENT_SINK_ENABLED = strtobool(os.getenv('EVENT_SINK_ENABLED', 'yes'))
+    EVENT_SINK_MAX_BATCH_SIZE = int(os.getenv('EVENT_SINK_MAX_BATCH_SIZE', 500))
+    EVENT_SINK_MAX_BUFFER_SIZE = int(os.getenv('EVENT_SINK_MAX_BUFFER_SIZE', 5000))
+    EVENT_SINK_FLUSH_INTERVAL = int(os.getenv('EVENT_SINK_FLUSH_INTERVAL', 5))  # seconds
+
+    # Test settings overrides, see el_tinto.tests.runner
+    TEST_RUNNER = 'el_tinto.tests.runner.TestRunner'
+
+    # Seconds between job store polls of the run_scheduler command
+    SCHEDULER_POLL_INTERVAL = int(os.getenv('SCHEDULER_POLL_INTERVAL', 10))
+
+    # SES sending rate (mails/s) and the share reserved for transactional mails (see el_tinto.utils.rate_limit)
+    MAIL_SEND_RATE = float(os.getenv('MAIL_SEND_RATE', 14))
+    MAIL_TRANSACTIONAL_RATE_SHARE = float(os.getenv('MAIL_TRANSACTIONAL_RATE_SHARE', 0.2))
+
+    # Worker processes sending each dispatch time audience, split by user id, 1 sends it in the job thread
+    MAIL_DISPATCH_SHARDS = int(os.getenv('MAIL_DISPATCH_SHARDS', 1))
+
+    # Mail workers programmed mails are fanned out to in batches of users (see el_tinto.utils.workers),
+    # 'local' or 'celery', empty sends them in the job
+    MAIL_WORKER_BACKEND = os.getenv('MAIL_WORKER_BACKEND', '')
+    MAIL_WORKER_BATCH_SIZE = int(os.getenv('MAIL_WORKER_BATCH_SIZE', 500))
+
+    # Minutes before the dispatch time programmed mails are rendered, 0 disables staging
+    MAIL_STAGING_LEAD_TIME = int(os.getenv('MAIL_STAGING_LEAD_TIME', 30))
+
+    # Transactional mails outbox (see el_tinto.utils.send_mail)
+    MAIL_OUTBOX_POLL_INTERVAL = int(os.getenv('MAIL_OUTBOX_POLL_INTERVAL', 2))  # seconds
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE', 100))
+
+    # Rendered web pages cache (see el_tinto.utils.rendered_pages)
+    RENDERED_PAGES_CACHE_TIMEOUT = int(os.getenv('RENDERED_PAGES_CACHE_TIMEOUT', 60 * 60 * 24))  # seconds
+    # Release of the templates the pages are rendered with, part of their cache keys and ETags
+    RENDERED_PAGES_VERSION = os.getenv('RENDERED_PAGES_VERSION') or get_git_revision()
+
+    # Static snapshots of sent Tintos (see el_tinto.utils.snapshots)
+    STATIC_SNAPSHOTS_ENABLED = strtobool(os.getenv('STATIC_SNAPSHOTS_ENABLED', 'no'))
+    STATIC_SNAPSHOTS_STORAGE = os.getenv('STATIC_SNAPSHOTS_STORAGE', 'django.core.files.storage.FileSystemStorage')
+    STATIC_SNAPSHOTS_LOCATION = os.getenv('STATIC_SNAPSHOTS_LOCATION', join(MEDIA_ROOT, 'snapshots'))
+
     # Name of cache backend to cache user agents. If it is not specified default
     # cache alias will be used. Set to `None` to disable caching.
     USER_AGENTS_CACHE = 'default'
@@ -277,8 +336,15 @@ class Common(Configuration):
         "show_ui_builder": False
     }
 
-    # CELERY_accept_content = ['application/json']
-    # CELERY_task_serializer = 'json'
-    # CELERY_BROKER_URL = f"sqs://{safequote(AWS_ACCESS_KEY_ID)}:{safequote(AWS_SECRET_ACCESS_KEY)}@"
-    # CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
-    # CELERY_result_backend = None
\ No newline at end of file
+    # Mail workers queue, the batches report their progress in the database so there is no result backend
+    CELERY_ACCEPT_CONTENT = ['application/json']
+    CELERY_TASK_SERIALIZER = 'json'
+    CELERY_BROKER_URL = os.getenv(
+        'CELERY_BROKER_URL',
+        f"sqs://{quote(AWS_ACCESS_KEY_ID or '', safe='')}:{quote(AWS_SECRET_ACCESS_KEY or '', safe='')}@"
+    )
+    CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+    CELERY_RESULT_BACKEND = None
+    CELERY_TASK_ACKS_LATE = True
+    CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+    CELERY_TASK_DEFAULT_QUEUE = 'mails'
\ No newline at end of file
@@ -127,4 +127,4 @@ class Development(Common):
     EXPORTATION_COFFEE_STRIPE_CODE = 'prod_OZQaXRbIbt6w80'
 
     # SQS
-    # CELERY_TASK_DEFAULT_QUEUE = 'dev_mails'
\ No newline at end of file
+    CELERY_TASK_DEFAULT_QUEUE = 'dev_mails'
\ No newline at end of file
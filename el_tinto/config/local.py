@@ -95,4 +95,4 @@ class Local(Common):
     EXPORTATION_COFFEE_STRIPE_CODE = 'prod_OZQaXRbIbt6w80'
 
 
-    # CELERY_TASK_DEFAULT_QUEUE = 'dev_mails'
+    CELERY_TASK_DEFAULT_QUEUE = 'dev_mails'
@@ -4,6 +4,8 @@ from el_tinto.mails.admin_actions.edit_tinto_in_cms import edit_tinto_in_cms
 from el_tinto.mails.admin_actions.send_daily_mail import send_daily_mail
 from el_tinto.mails.admin_actions.send_daily_mail_try import send_daily_mail_try
 from el_tinto.mails.models import Mail, Templates, MailLinks
+from el_tinto.utils.scheduler import get_scheduler
+from el_tinto.utils.send_mail import reschedule_mail
 
 
 @admin.register(Mail)
@@ -23,6 +25,10 @@ class MailsAdmin(admin.ModelAdmin):
         obj.created_by = request.user
         super(MailsAdmin, self).save_model(request, obj, form, change)
 
+        # Move the already programmed jobs to the new dispatch date
+        if change and obj.programmed and not obj.sent_datetime and 'dispatch_date' in form.changed_data:
+            reschedule_mail(obj, get_scheduler())
+
     def get_model_perms(self, request):
         """
         Return empty perms dict thus hiding the model from admin index.
@@ -1,13 +1,12 @@
 import datetime
 import logging
-import sys
 
 from django.contrib import admin, messages
 
-from el_tinto.tests.utils import test_scheduler
 from el_tinto.utils.date_time import convert_datetime_to_local_datetime
 from el_tinto.utils.decorators import only_one_instance
-from el_tinto.utils.scheduler import scheduler
+from el_tinto.utils.scheduler import get_scheduler
+from el_tinto.utils.send_mail import cancel_scheduled_mail
 
 logger = logging.getLogger("mails")
 
@@ -27,15 +26,12 @@ def cancel_send_daily_mail(_, request, queryset):
     """
     mail = queryset.first()
 
-    # Define scheduler for testing
-    mail_scheduler = test_scheduler if 'test' in sys.argv else scheduler
+    mail_scheduler = get_scheduler()
 
     if not mail.sent_datetime:
 
         # Remove all jobs for current mail
-        for job in mail_scheduler.get_jobs():
-            if str(mail.id) in job.id:
-                job.remove()
+        cancel_scheduled_mail(mail, mail_scheduler)
 
         # Update mail programmed status
         mail.programmed = False
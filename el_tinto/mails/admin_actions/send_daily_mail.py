@@ -1,17 +1,15 @@
 import datetime
 import logging
-import sys
 
 from django.contrib import admin, messages
 from django.db.models import Count
 
 from el_tinto.mails.models import Mail
-from el_tinto.tests.utils import test_scheduler
 from el_tinto.users.models import User
 from el_tinto.utils.date_time import convert_datetime_to_local_datetime
 from el_tinto.utils.decorators import only_one_instance
 
-from el_tinto.utils.scheduler import scheduler
+from el_tinto.utils.scheduler import get_scheduler
 from el_tinto.utils.send_mail import schedule_mail
 
 logger = logging.getLogger("mails")
@@ -34,15 +32,18 @@ def send_daily_mail(_, request, queryset):
     """
     mail = queryset.first()
 
-    # Define scheduler for testing
-    mail_scheduler = test_scheduler if 'test' in sys.argv else scheduler
+    mail_scheduler = get_scheduler()
 
     if not mail.programmed:
 
         dispatch_times = User.objects.values('dispatch_time').annotate(dcount=Count('dispatch_time'))
 
+        audience_counts = {}
+
         for dispatch_time in dispatch_times:
-            schedule_mail(mail, mail_scheduler, dispatch_time['dispatch_time'])
+            audience_counts[dispatch_time['dispatch_time']] = schedule_mail(
+                mail, mail_scheduler, dispatch_time['dispatch_time']
+            )
 
         # Send no prize sunday mail
         try:
@@ -50,10 +51,10 @@ def send_daily_mail(_, request, queryset):
                 dispatch_date=mail.dispatch_date, version=Mail.SUNDAY_NO_REFERRALS_PRIZE_VERSION
             )
 
-            schedule_mail(no_prize_mail, mail_scheduler)
+            no_prize_audience_count = schedule_mail(no_prize_mail, mail_scheduler)
 
         except Mail.DoesNotExist:
-            pass
+            no_prize_audience_count = 0
 
         now_datetime = convert_datetime_to_local_datetime(datetime.datetime.now())
         string_now_datatime = now_datetime.strftime("%H:%M:%S of %m/%d/%Y")
@@ -62,10 +63,15 @@ def send_daily_mail(_, request, queryset):
         mail.created_by = request.user
         mail.save()
 
-        mail_class = mail.get_mail_class()
-        dispatch_users_count = mail_class.get_dispatch_users().count()
+        audience_count = sum(audience_counts.values()) + no_prize_audience_count
+        cohorts_counts = ', '.join(
+            f"{dispatch_time or 'mail dispatch date'}: {count}" for dispatch_time, count in audience_counts.items()
+        )
+
+        if no_prize_audience_count:
+            cohorts_counts += f", no prize mail: {no_prize_audience_count}"
 
-        messages.success(request, f"Mail programmed to be sent to {dispatch_users_count} users")
+        messages.success(request, f"Mail programmed to be sent to {audience_count} users ({cohorts_counts})")
 
     else:
         messages.error(request, "You can not send an already programmed mail unless you cancel it")
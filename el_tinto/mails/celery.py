@@ -1,14 +1,16 @@
-# import os
-#
-# from celery import Celery
-#
-#
-# os.environ.setdefault("DJANGO_SETTINGS_MODULE", "el_tinto.config")
-# os.environ.setdefault("DJANGO_CONFIGURATION", "Local")
-#
-# from configurations import importer
-# importer.install()
-#
-# app = Celery("mails")
-# app.config_from_object("django.conf:settings", namespace="CELERY")
-# app.autodiscover_tasks()
\ No newline at end of file
+import os
+
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "el_tinto.config")
+os.environ.setdefault("DJANGO_CONFIGURATION", os.getenv("DJANGO_CONFIGURATION", "Local"))
+
+from configurations import importer  # noqa: E402
+importer.install()
+
+app = Celery("mails")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
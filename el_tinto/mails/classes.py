@@ -3,14 +3,18 @@ import os
 import random
 import urllib.parse
 from datetime import datetime
+from itertools import islice
 
 from django.core.mail import EmailMessage
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, F, Func
+from django.db.models.functions import Mod
 from django.template import loader
 from django.utils.safestring import mark_safe
 
 from el_tinto.users.models import User
 from el_tinto.utils.date_time import get_string_date
+from el_tinto.utils.rate_limit import get_mail_rate_limiter, BULK_PRIORITY
 from el_tinto.utils.utils import replace_words_in_sentence, get_env_value, \
     TASTE_CLUB_TIER_COFFEE_BEAN_WELCOME_MAIL_ID, TASTE_CLUB_TIER_GROUND_COFFEE_WELCOME_MAIL_ID, \
     TASTE_CLUB_TIER_TINTO_WELCOME_MAIL_ID, TASTE_CLUB_TIER_EXPORTATION_COFFEE_WELCOME_MAIL_ID
@@ -18,7 +22,33 @@ from el_tinto.utils.utils import replace_words_in_sentence, get_env_value, \
 logger = logging.getLogger("mails")
 
 
+def filter_users(queryset, shard=None, users_ids=None, field='id'):
+    """
+    Filter the rows of a subset of the users, a shard or a batch of ids.
+    Users are split in shards by id modulo the shards count.
+
+    params:
+    queryset: QuerySet
+    shard: (int, int) shard index and shards count, None for all the users
+    users_ids: [int], None for all the users
+    field: str, user id field
+
+    return:
+    queryset: QuerySet
+    """
+    if users_ids is not None:
+        queryset = queryset.filter(**{f'{field}__in': users_ids})
+
+    if shard:
+        index, count = shard
+        queryset = queryset.alias(user_shard=Mod(field, count)).filter(user_shard=index)
+
+    return queryset
+
+
 class Mail:
+    # User fields read for each recipient of the dispatch, see get_recipients
+    recipient_fields = ('id', 'email', 'first_name')
 
     def __init__(self, mail):
         self.mail = mail
@@ -33,6 +63,101 @@ class Mail:
         """
         pass
 
+    def get_audience(self, dispatch_time=None):
+        """
+        Get the users the mail is sent to.
+        Users are read from the audience snapshot taken when the mail was programmed,
+        if there is none the dispatch users are queried.
+        Users who are no longer active are excluded, users who already received the mail
+        are skipped by the dispatch with the delivered users.
+
+        params:
+        dispatch_time: time
+
+        return:
+        users: User queryset
+        """
+        from el_tinto.mails.models import MailAudiences
+
+        audience = MailAudiences.objects.filter(mail=self.mail, dispatch_time=dispatch_time)
+
+        if not audience.exists():
+            return self.get_dispatch_users(dispatch_time)
+
+        return User.objects.filter(
+            id__in=audience.annotate(user_id=Func(F('users_ids'), function='unnest')).values('user_id'),
+            is_active=True
+        )
+
+    def get_recipients(self, users, chunk_size=2000):
+        """
+        Read users as lightweight recipients with only the recipient fields of the mail, in id order.
+
+        params:
+        users: User queryset
+        chunk_size: int
+
+        return:
+        recipients: iterator of Recipient obj
+        """
+        from el_tinto.mails.recipients import Recipient
+
+        for values in users.order_by('id').values_list(*self.recipient_fields).iterator(chunk_size=chunk_size):
+            yield Recipient(**dict(zip(self.recipient_fields, values)))
+
+    def get_delivered_users(self):
+        """
+        Get the users who already received the mail.
+
+        return:
+        delivered_users: Bitmap obj
+        """
+        from el_tinto.mails.models import MailDeliveries
+
+        return MailDeliveries.get_users(self.mail)
+
+    def add_recipients(self, users_ids, delivered_users=None):
+        """
+        Add a batch of users who received the mail to its recipients and delivered users.
+
+        params:
+        users_ids: [int]
+        delivered_users: Bitmap obj, updated in memory as well
+        """
+        from el_tinto.mails.models import MailDeliveries, SentEmails
+
+        if not users_ids:
+            return
+
+        with transaction.atomic():
+            SentEmails.objects.bulk_create(
+                [SentEmails(mail=self.mail, user_id=user_id) for user_id in users_ids], ignore_conflicts=True
+            )
+            MailDeliveries.add_users(self.mail, users_ids)
+
+        if delivered_users is not None:
+            delivered_users.update(users_ids)
+
+    def take_audience_snapshot(self, dispatch_time=None):
+        """
+        Store the current dispatch users of the mail.
+
+        params:
+        dispatch_time: time
+
+        return:
+        users_count: int
+        """
+        from el_tinto.mails.models import MailAudiences
+
+        users_ids = list(self.get_dispatch_users(dispatch_time).values_list('id', flat=True))
+
+        MailAudiences.objects.update_or_create(
+            mail=self.mail, dispatch_time=dispatch_time, defaults={'users_ids': users_ids}
+        )
+
+        return len(users_ids)
+
     def get_mail_template_data(self, user=None):
         """
         Get mail template data.
@@ -81,30 +206,70 @@ class Mail:
             'EMAIL-TYPE': self.mail.type
         }
 
-    def send_mail(self, user=None, mail_address=None, extra_data=None, test=False):
+    def render_mail(self, user=None, extra_data=None):
         """
-        Send mail.
+        Render mail subject and html.
+
+        params:
+        user: User obj
+        extra_data: dict
+
+        return:
+        subject: str
+        html: str
         """
         mail_data = self.get_mail_template_data(user)
 
         if extra_data:
             mail_data.update(extra_data)
 
-        html = self.template.render(mail_data)
+        return replace_words_in_sentence(self.mail.subject, user=user), self.template.render(mail_data)
+
+    def send_mail(self, user=None, mail_address=None, extra_data=None, test=False, add_recipient=True):
+        """
+        Send mail.
+
+        return:
+        sent: bool
+        """
+        subject, html = self.render_mail(user, extra_data)
 
+        return self.send_rendered_mail(
+            subject, html, user.email if user else mail_address, user=user, test=test, add_recipient=add_recipient
+        )
+
+    def send_rendered_mail(self, subject, html, recipient, user=None, test=False, add_recipient=True):
+        """
+        Send an already rendered mail.
+        Mails that could not be sent are not added to the recipients.
+
+        params:
+        subject: str
+        html: str
+        recipient: str
+        user: User obj
+        test: bool
+        add_recipient: bool, batch sends add their recipients with add_recipients
+
+        return:
+        sent: bool
+        """
         message_user = EmailMessage(
-            replace_words_in_sentence(self.mail.subject, user=user),
+            subject,
             html,
             self.sender_email,
-            [user.email if user else mail_address],
+            [recipient],
             reply_to=['info@eltinto.xyz'],
             headers=self.headers
         )
 
         message_user.content_subtype = 'html'
-        message_user.send(fail_silently=True)
 
-        if not test:
+        if not message_user.send(fail_silently=True):
+            logger.warning(f'Mail {self.mail.id} could not be sent to {recipient}')
+            return False
+
+        if not test and add_recipient:
             self.mail.recipients.add(user)
 
         # Discount 1 from missing sunday mails
@@ -117,27 +282,189 @@ class Mail:
                 user_tier.save()
 
             else:
+                # Users may be recipients, which can not be saved
+                User.objects.filter(id=user.id).update(missing_sunday_mails=F('missing_sunday_mails') - 1)
                 user.missing_sunday_mails -= 1
-                user.save()
 
-    def send_mail_batch(self, users_batch):
+        return True
+
+    def should_send(self, user):
+        """
+        Whether the mail is sent to a dispatch user.
+
+        params:
+        user: User obj
+
+        return:
+        should_send: bool
         """
-        Send mails batch.
+        return True
+
+    def send_mail_batch(self, users_batch, delivered_users=None):
+        """
+        Send mails batch within the bulk mails sending rate.
+        Users who already received the mail are skipped.
 
         params:
         users_batch: [User obj]
+        delivered_users: Bitmap obj
+
+        return:
+        sent_count: int
+        """
+        rate_limiter = get_mail_rate_limiter(BULK_PRIORITY)
+
+        if delivered_users is None:
+            delivered_users = self.get_delivered_users()
+
+        sent_users_ids = []
+
+        try:
+            for user in users_batch:
+                if user.id not in delivered_users and self.should_send(user):
+                    rate_limiter.acquire()
+
+                    if self.send_mail(user, add_recipient=False):
+                        sent_users_ids.append(user.id)
+
+        finally:
+            # Mails sent before a failure are not sent again when the dispatch is resumed
+            self.add_recipients(sent_users_ids, delivered_users)
+
+        return len(sent_users_ids)
+
+    def stage_mails(self, dispatch_time=None, batch_size=500):
+        """
+        Render the mails of the dispatch users ahead of the dispatch time.
+        Previously staged mails are replaced.
+
+        params:
+        dispatch_time: time
+        batch_size: int
+
+        return:
+        staged_count: int
+        """
+        from el_tinto.mails.models import StagedMails
+
+        StagedMails.objects.filter(mail=self.mail, dispatch_time=dispatch_time).delete()
+
+        delivered_users = self.get_delivered_users()
+
+        staged_mails = []
+        staged_count = 0
+
+        for user in self.get_recipients(self.get_audience(dispatch_time), batch_size):
+            if user.id in delivered_users:
+                continue
+
+            subject, html = self.render_mail(user)
+
+            staged_mails.append(StagedMails(
+                mail=self.mail,
+                user_id=user.id,
+                dispatch_time=dispatch_time,
+                recipient=user.email,
+                subject=subject,
+                body=StagedMails.compress_html(html)
+            ))
+
+            if len(staged_mails) >= batch_size:
+                StagedMails.objects.bulk_create(staged_mails, ignore_conflicts=True)
+                staged_count += len(staged_mails)
+                staged_mails = []
+
+        StagedMails.objects.bulk_create(staged_mails, ignore_conflicts=True)
+
+        return staged_count + len(staged_mails)
+
+    def send_staged_mails(self, dispatch_time=None, delivered_users=None, batch_size=200, shard=None, users_ids=None):
+        """
+        Send the staged mails of the users that are still in the mail audience.
+        Mails staged before the last mail edition are discarded.
+
+        params:
+        dispatch_time: time
+        delivered_users: Bitmap obj
+        batch_size: int
+        shard: (int, int) users shard, see filter_users
+        users_ids: [int] users batch
+
+        return:
+        sent_count: int
         """
-        for user in users_batch:
-            self.send_mail(user)
+        from el_tinto.mails.models import StagedMails
+        from el_tinto.mails.recipients import Recipient
+
+        staged_mails = filter_users(
+            StagedMails.objects.filter(mail=self.mail, dispatch_time=dispatch_time), shard, users_ids, 'user_id'
+        )
+        staged_mails.filter(created_at__lt=self.mail.updated_at).delete()
+
+        rate_limiter = get_mail_rate_limiter(BULK_PRIORITY)
+
+        if delivered_users is None:
+            delivered_users = self.get_delivered_users()
+
+        sent_users_ids = []
+        sent_count = 0
+
+        try:
+            for subject, body, recipient, *user_values in staged_mails.filter(
+                user__in=self.get_audience(dispatch_time)
+            ).order_by('id').values_list(
+                'subject', 'body', 'recipient', *[f'user__{field}' for field in self.recipient_fields]
+            ).iterator(chunk_size=batch_size):
 
-    def send_several_mails(self, dispatch_time=None):
+                user = Recipient(**dict(zip(self.recipient_fields, user_values)))
+
+                if user.id not in delivered_users and self.should_send(user):
+                    rate_limiter.acquire()
+
+                    if self.send_rendered_mail(
+                        subject, StagedMails.decompress_html(body), recipient, user=user, add_recipient=False
+                    ):
+                        sent_users_ids.append(user.id)
+                        sent_count += 1
+
+                if len(sent_users_ids) >= batch_size:
+                    self.add_recipients(sent_users_ids, delivered_users)
+                    sent_users_ids = []
+
+        finally:
+            self.add_recipients(sent_users_ids, delivered_users)
+
+        return sent_count
+
+    def send_several_mails(self, dispatch_time=None, shard=None, users_ids=None):
         """
         Send several mails.
+        Staged mails are sent first, the rest of the audience is rendered at send time.
+        When sending to a shard or a batch of the users the mail is not marked as sent.
 
         params:
         dispatch_time: time
+        shard: (int, int) users shard, see filter_users
+        users_ids: [int] users batch
+
+        return:
+        sent_count: int
         """
-        users = self.get_dispatch_users(dispatch_time)
+        from el_tinto.mails.models import StagedMails
+
+        delivered_users = self.get_delivered_users()
+
+        sent_count = self.send_staged_mails(dispatch_time, delivered_users, shard=shard, users_ids=users_ids)
+
+        staged_mails = filter_users(
+            StagedMails.objects.filter(mail=self.mail, dispatch_time=dispatch_time), shard, users_ids, 'user_id'
+        )
+
+        users = self.get_recipients(
+            filter_users(self.get_audience(dispatch_time), shard, users_ids).exclude(
+                id__in=staged_mails.values('user_id')
+            )
+        )
 
         # This number is based on AWS SES limitations.
         # Is calculated based on the average sending time per email and the maximum number of mails/s - 1
@@ -145,16 +472,24 @@ class Mail:
         n = 200
 
         # Split total users into chunks of length n to send at most those emails per second
-        users_chunked_list = [users[i:i + n] for i in range(0, len(users), n)]
+        while True:
+            users_bach = list(islice(users, n))
+
+            if not users_bach:
+                break
+
+            sent_count += self.send_mail_batch(users_bach, delivered_users)
 
-        for users_bach in users_chunked_list:
-            self.send_mail_batch(users_bach)
+        staged_mails.delete()
 
-        self.mail.sent_datetime = datetime.now()
-        self.mail.save()
+        if not shard and users_ids is None:
+            self.mail.mark_as_sent()
+
+        return sent_count
 
 
 class DailyMail(Mail):
+    recipient_fields = ('id', 'email', 'first_name', 'referral_code', 'uuid', 'preferred_email_days')
 
     def get_dispatch_users(self, dispatch_time=None):
         """
@@ -164,9 +499,9 @@ class DailyMail(Mail):
         dispatch_time: time
         """
         return User.objects.filter(
-            (Q(preferred_email_days__contains=[self.mail_week_day]) | Q(preferred_email_days__len=0)),
             is_active=True,
-            dispatch_time=dispatch_time
+            dispatch_time=dispatch_time,
+            preferred_email_days_mask__in=User.get_week_day_masks(self.mail_week_day)
         ).exclude(sentemails__mail_id=self.mail.id).distinct()
 
     def get_mail_template_data(self, user=None):
@@ -209,14 +544,15 @@ class DailyMail(Mail):
 
 
 class SundayMail(Mail):
+    recipient_fields = (
+        'id', 'email', 'first_name', 'referral_code', 'uuid', 'missing_sunday_mails', 'sunday_mails_prize_end_date'
+    )
 
     def get_dispatch_users(self, dispatch_time=None):
         """
         Get dispatch users list.
         """
         return User.objects.filter(
-            # Filter day selected
-            (Q(preferred_email_days__contains=[self.mail_week_day]) | Q(preferred_email_days__len=0)),
             # Filter missing sunday emails
             Q(missing_sunday_mails__gt=0) |
             # Filter has prize
@@ -224,7 +560,9 @@ class SundayMail(Mail):
             # Filter tier missing mails
             Q(tiers__missing_sunday_mails__gt=0, tiers__valid_to__gte=datetime.now()),
             is_active=True,
-            dispatch_time=dispatch_time
+            dispatch_time=dispatch_time,
+            # Filter day selected
+            preferred_email_days_mask__in=User.get_week_day_masks(self.mail_week_day)
         ).exclude(sentemails__mail_id=self.mail.id).distinct()
 
     def get_mail_template_data(self, user):
@@ -265,17 +603,18 @@ class SundayMail(Mail):
 
 
 class SundayNoPrizeMail(Mail):
+    recipient_fields = SundayMail.recipient_fields
 
     def get_dispatch_users(self, dispatch_time=None):
         """
         Get dispatch users list.
         """
         return User.objects.filter(
-            # Filter day selected
-            (Q(preferred_email_days__contains=[self.mail_week_day]) | Q(preferred_email_days__len=0)),
             # Filter missing sunday emails
             missing_sunday_mails=0,
-            is_active=True
+            is_active=True,
+            # Filter day selected
+            preferred_email_days_mask__in=User.get_week_day_masks(self.mail_week_day)
         ).exclude(
             Q(sunday_mails_prize_end_date__gte=datetime.now()) |
             Q(tiers__valid_to__gte=datetime.now()) |
@@ -318,16 +657,17 @@ class SundayNoPrizeMail(Mail):
         """
         return loader.get_template('../templates/mailings/sunday_mail.html')
 
-    def send_mail_batch(self, users_batch):
+    def should_send(self, user):
         """
-        Send mails batch based on user's open rate.
+        Send mail based on user's open rate.
 
         params:
-        users_batch: [User obj]
+        user: User obj
+
+        return:
+        should_send: bool
         """
-        for user in users_batch:
-            if random.random() < user.open_rate:
-                self.send_mail(user)
+        return random.random() < user.open_rate
 
 
 class MilestoneMail(Mail):
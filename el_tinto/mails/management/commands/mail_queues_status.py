@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from el_tinto.utils.rate_limit import get_mail_rate_limiter, TRANSACTIONAL_PRIORITY, BULK_PRIORITY
+from el_tinto.utils.send_mail import get_mail_queues_status
+
+
+class Command(BaseCommand):
+    help = 'Show the pending mails of each priority class.'
+
+    def handle(self, *args, **options):
+        queues_status = get_mail_queues_status()
+
+        transactional_status = queues_status[TRANSACTIONAL_PRIORITY]
+        transactional_message = (
+            f"Transactional: {transactional_status['pending']} pending, {transactional_status['failed']} failed"
+        )
+
+        if transactional_status['oldest_pending']:
+            oldest_pending_age = int((timezone.now() - transactional_status['oldest_pending']).total_seconds())
+            transactional_message += f", oldest pending {oldest_pending_age} s ago"
+
+        self.stdout.write(f"{transactional_message} ({self.get_rate(TRANSACTIONAL_PRIORITY)})")
+
+        bulk_status = queues_status[BULK_PRIORITY]
+
+        self.stdout.write(
+            f"Bulk: {bulk_status['pending']} programmed jobs for {bulk_status['mails']} mails "
+            f"({self.get_rate(BULK_PRIORITY)})"
+        )
+
+    def get_rate(self, priority):
+        """
+        :params:
+        priority: str
+
+        :return:
+        rate: str
+        """
+        rate = get_mail_rate_limiter(priority).rate
+
+        return f'max {rate:.1f} mails/s' if rate else 'no rate limit'
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from el_tinto.mails.models import Mail
+from el_tinto.utils.snapshots import get_snapshots_storage, publish_snapshots_index, publish_tinto_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Publish the static snapshots of every sent daily Tinto and the snapshots index'
+
+    def handle(self, *args, **options):
+        mails_ids = Mail.objects.filter(
+            type=Mail.DAILY,
+            sent_datetime__isnull=False,
+            tinto__isnull=False
+        ).values_list('id', flat=True)
+
+        for mail_id in mails_ids:
+            publish_tinto_snapshot(mail_id, update_index=False)
+
+        publish_snapshots_index(get_snapshots_storage())
+
+        self.stdout.write(f'{len(mails_ids)} Tintos published')
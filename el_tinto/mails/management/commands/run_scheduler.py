@@ -0,0 +1,96 @@
+import logging
+import signal
+import threading
+
+from apscheduler.schedulers.base import STATE_RUNNING
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, DatabaseError
+
+from el_tinto.utils.scheduler import (
+    create_scheduler,
+    acquire_scheduler_lock,
+    is_scheduler_lock_held,
+    release_scheduler_lock
+)
+
+logger = logging.getLogger("mails")
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the scheduled jobs. Only the instance holding the scheduler advisory lock runs them, '
+        'other instances wait on standby to take over.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            dest='poll_interval',
+            type=int,
+            default=settings.SCHEDULER_POLL_INTERVAL,
+            help='Seconds between job store polls and leadership checks'
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        # Jobs are run by this process only, the other processes just submit them
+        scheduler = create_scheduler(settings.DATABASE_FULL_URL)
+        scheduler.start(paused=True)
+        is_leader = False
+
+        try:
+            while not stop_event.is_set():
+                is_leader = self.check_leadership(scheduler, is_leader)
+
+                if is_leader:
+                    # Pick up the jobs submitted by other processes
+                    scheduler.wakeup()
+
+                stop_event.wait(options['poll_interval'])
+
+        finally:
+            scheduler.shutdown()
+
+            if is_leader:
+                release_scheduler_lock()
+
+            logger.info('Scheduler runner stopped')
+
+    def check_leadership(self, scheduler, is_leader):
+        """
+        Acquire the scheduler lock if it is free, or make sure it is still held.
+        Jobs are only processed while the lock is held.
+
+        :params:
+        scheduler: BackgroundScheduler obj
+        is_leader: bool
+
+        :return:
+        is_leader: bool
+        """
+        try:
+            if is_leader:
+                is_leader = is_scheduler_lock_held()
+
+            else:
+                is_leader = acquire_scheduler_lock()
+
+                if is_leader:
+                    logger.info('Scheduler lock acquired, running scheduled jobs')
+                    scheduler.resume()
+
+        except DatabaseError as e:
+            logger.error(f'Scheduler lock could not be checked: {e}')
+            connection.close()
+            is_leader = False
+
+        if not is_leader and scheduler.state == STATE_RUNNING:
+            logger.error('Scheduler lock lost, pausing scheduled jobs')
+            scheduler.pause()
+
+        return is_leader
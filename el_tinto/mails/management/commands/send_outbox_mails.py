@@ -0,0 +1,59 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, DatabaseError
+
+from el_tinto.utils.send_mail import send_outbox_mails
+
+logger = logging.getLogger("mails")
+
+
+class Command(BaseCommand):
+    help = 'Send the transactional mails queued in the mail outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            dest='poll_interval',
+            type=int,
+            default=settings.MAIL_OUTBOX_POLL_INTERVAL,
+            help='Seconds to wait when the outbox is empty'
+        )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=settings.MAIL_OUTBOX_BATCH_SIZE,
+            help='Mails sent per batch'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the pending mails and exit'
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        while not stop_event.is_set():
+            try:
+                sent_count = send_outbox_mails(options['batch_size'])
+
+            except DatabaseError as e:
+                logger.error(f'Mail outbox could not be processed: {e}')
+                connection.close()
+                sent_count = 0
+
+            if sent_count < options['batch_size']:
+                if options['once']:
+                    break
+
+                stop_event.wait(options['poll_interval'])
+
+        logger.info('Mail outbox worker stopped')
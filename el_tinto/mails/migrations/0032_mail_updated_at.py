@@ -0,0 +1,18 @@
+# Generated by Django 4.1.10 on 2026-10-19 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0031_maillinks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mail',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:12
+
+import pickle
+import re
+from datetime import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Mail sending jobs ids, see get_mail_job_id: "<mail id>" or "<mail id>_<dispatch time>"
+MAIL_JOB_ID_REGEX = re.compile(r'^(\d+)(?:_(\d{2}:\d{2}:\d{2}))?$')
+
+
+def get_job_dispatch_time(job_id_time, job_state):
+    """
+    Get the dispatch time a mail sending job was scheduled with, the second argument of
+    send_multiple_mails. It is None when the mail is sent at its own dispatch date, the
+    job id still ends with that time then.
+
+    :params:
+    job_id_time: str | None, time in the job id
+    job_state: bytes, pickled job state
+
+    :return:
+    dispatch_time: time | None
+    """
+    try:
+        return pickle.loads(job_state)['args'][1]
+
+    except Exception:
+        return datetime.strptime(job_id_time, '%H:%M:%S').time() if job_id_time else None
+
+
+def populate_mail_scheduled_jobs(apps, schema_editor):
+    """
+    Register the mail jobs already queued in the scheduler job store, with the
+    dispatch time schedule_mail registers them with.
+    """
+    Mail = apps.get_model('mails', 'Mail')
+    MailScheduledJobs = apps.get_model('mails', 'MailScheduledJobs')
+
+    connection = schema_editor.connection
+
+    if 'apscheduler_jobs' not in connection.introspection.table_names():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("select id, job_state from apscheduler_jobs")
+        jobs_rows = cursor.fetchall()
+
+    jobs = {}
+    for job_id, job_state in jobs_rows:
+        match = MAIL_JOB_ID_REGEX.match(job_id)
+
+        if match:
+            jobs[job_id] = (int(match.group(1)), get_job_dispatch_time(match.group(2), bytes(job_state)))
+
+    mails_ids = set(Mail.objects.filter(id__in={mail_id for mail_id, _ in jobs.values()}).values_list('id', flat=True))
+
+    MailScheduledJobs.objects.bulk_create(
+        [
+            MailScheduledJobs(mail_id=mail_id, dispatch_time=dispatch_time, job_id=job_id)
+            for job_id, (mail_id, dispatch_time) in jobs.items()
+            if mail_id in mails_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0032_mail_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailScheduledJobs',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispatch_time', models.TimeField(null=True)),
+                ('job_id', models.CharField(max_length=191, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_jobs', to='mails.mail')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mailscheduledjobs',
+            constraint=models.UniqueConstraint(fields=('mail', 'dispatch_time'), name='mails_scheduled_jobs_mail_dispatch_time'),
+        ),
+        migrations.RunPython(populate_mail_scheduled_jobs, migrations.RunPython.noop),
+    ]
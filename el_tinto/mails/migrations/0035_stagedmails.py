@@ -0,0 +1,37 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mails', '0034_mailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedMails',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispatch_time', models.TimeField(null=True)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=512)),
+                ('body', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staged_mails', to='mails.mail')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staged_mails', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stagedmails',
+            index=models.Index(fields=['mail', 'dispatch_time'], name='mails_staged_mails_dispatch'),
+        ),
+        migrations.AddConstraint(
+            model_name='stagedmails',
+            constraint=models.UniqueConstraint(fields=('mail', 'user'), name='mails_staged_mails_mail_user'),
+        ),
+    ]
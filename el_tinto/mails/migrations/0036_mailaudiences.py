@@ -0,0 +1,29 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:24
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0035_stagedmails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailAudiences',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispatch_time', models.TimeField(null=True)),
+                ('users_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audiences', to='mails.mail')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mailaudiences',
+            constraint=models.UniqueConstraint(fields=('mail', 'dispatch_time'), name='mails_audiences_mail_dispatch_time'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mails', '0036_mailaudiences'),
+    ]
+
+    operations = [
+        # Keep the first sent email of each mail and user before adding the unique constraint, with the
+        # earliest opened date and the SNS notification of its duplicates. The notification is moved once
+        # the duplicates are deleted since it is unique.
+        migrations.RunSQL(
+            [
+                """
+                CREATE TEMPORARY TABLE merged_sentemails AS
+                SELECT
+                    min(id) AS id,
+                    min(opened_date) AS opened_date,
+                    (array_agg(sns_object_id ORDER BY id) FILTER (WHERE sns_object_id IS NOT NULL))[1] AS sns_object_id
+                FROM mails_sentemails
+                GROUP BY mail_id, user_id
+                HAVING count(*) > 1
+                """,
+                """
+                DELETE FROM mails_sentemails duplicated
+                USING mails_sentemails original
+                WHERE duplicated.mail_id = original.mail_id
+                    AND duplicated.user_id = original.user_id
+                    AND duplicated.id > original.id
+                """,
+                """
+                UPDATE mails_sentemails
+                SET opened_date = merged.opened_date, sns_object_id = merged.sns_object_id
+                FROM merged_sentemails merged
+                WHERE mails_sentemails.id = merged.id
+                """,
+                "DROP TABLE merged_sentemails"
+            ],
+            migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='sentemails',
+            index=models.Index(fields=['user', 'opened_date'], name='mails_sentemails_user_opened'),
+        ),
+        migrations.AddConstraint(
+            model_name='sentemails',
+            constraint=models.UniqueConstraint(fields=('mail', 'user'), name='mails_sentemails_mail_user'),
+        ),
+        migrations.AlterField(
+            model_name='sentemails',
+            name='mail',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='mails.mail'),
+        ),
+        migrations.AlterField(
+            model_name='sentemails',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0037_dispatch_tracking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailDeliveries',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users_bitmap', models.BinaryField(default=b'')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mail', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='mails.mail')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0038_maildeliveries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailFanOuts',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dispatch_time', models.TimeField(null=True)),
+                ('batches_count', models.PositiveIntegerField(default=0)),
+                ('sent_batches', models.PositiveIntegerField(default=0)),
+                ('failed_batches', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('mail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fan_outs', to='mails.mail')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.10 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0039_mailfanouts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailRateBuckets',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('tokens', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
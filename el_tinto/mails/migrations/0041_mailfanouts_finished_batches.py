@@ -0,0 +1,19 @@
+# Generated by Django 4.1.10 on 2026-10-19 18:05
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mails', '0040_mailratebuckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailfanouts',
+            name='finished_batches',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None),
+        ),
+    ]
@@ -1,13 +1,16 @@
 import datetime
+import zlib
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.db import models, transaction
 from django.template import loader
 from django.template.exceptions import TemplateDoesNotExist
 from tinymce.models import HTMLField
 
 from el_tinto.mails.classes import DailyMail, SundayMail, SundayNoPrizeMail, MilestoneMail, OnboardingMail, \
     ChangePreferredDaysMail, TasteClubMail
+from el_tinto.utils.bitmap import Bitmap
 from el_tinto.utils.date_time import get_string_date
 from el_tinto.utils.utils import generate_random_alphanumeric_code
 
@@ -73,6 +76,7 @@ class Mail(models.Model):
         editable=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     dispatch_date = models.DateTimeField(null=True, blank=False)
     programmed = models.BooleanField(default=False, editable=False)
     tinto = models.OneToOneField('tintos.Tinto', on_delete=models.SET_NULL, null=True, related_name='mail')
@@ -123,13 +127,264 @@ class Mail(models.Model):
 
         return mail_class(self)
 
+    def mark_as_sent(self):
+        """
+        Set the sent datetime of the mail once a dispatch is sent.
+        Only sent_datetime is saved, updated_at tracks the content edits the staged
+        mails of the next dispatch times are checked against.
+        """
+        self.sent_datetime = datetime.datetime.now()
+        self.save(update_fields=['sent_datetime'])
+
 
 class SentEmails(models.Model):
-    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE)
-    user = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    # The foreign keys are indexed by the composite indexes below
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, db_index=False)
     opened_date = models.DateTimeField(default=None, null=True)
     sns_object = models.OneToOneField('ses_sns.SNSNotification', on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        constraints = [
+            # Also serves the sent users anti join of the dispatch users queries
+            models.UniqueConstraint(fields=['mail', 'user'], name='mails_sentemails_mail_user')
+        ]
+        indexes = [
+            # Sent and opened mails of a user (open rate)
+            models.Index(fields=['user', 'opened_date'], name='mails_sentemails_user_opened')
+        ]
+
+
+class MailScheduledJobs(models.Model):
+    """Scheduler jobs programmed to send a mail, one per dispatch time."""
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, related_name='scheduled_jobs')
+    # Null when the mail is sent at its own dispatch date
+    dispatch_time = models.TimeField(null=True)
+    job_id = models.CharField(max_length=191, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mail', 'dispatch_time'], name='mails_scheduled_jobs_mail_dispatch_time')
+        ]
+
+
+class MailAudiences(models.Model):
+    """
+    Snapshot of the dispatch users of a programmed mail, one per dispatch time.
+    Taken when the mail is programmed and read by the send jobs.
+    """
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, related_name='audiences')
+    # Null when the mail is sent at its own dispatch date
+    dispatch_time = models.TimeField(null=True)
+    users_ids = ArrayField(models.IntegerField(), default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mail', 'dispatch_time'], name='mails_audiences_mail_dispatch_time')
+        ]
+
+    @property
+    def users_count(self):
+        """
+        :return:
+        users_count: int
+        """
+        return len(self.users_ids)
+
+
+class StagedMails(models.Model):
+    """
+    Daily mails rendered ahead of their dispatch time, the send job only
+    sends them. Bodies are stored compressed.
+    """
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, related_name='staged_mails')
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='staged_mails')
+    dispatch_time = models.TimeField(null=True)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=512)
+    body = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mail', 'user'], name='mails_staged_mails_mail_user')
+        ]
+        indexes = [
+            models.Index(fields=['mail', 'dispatch_time'], name='mails_staged_mails_dispatch')
+        ]
+
+    @property
+    def html(self):
+        """
+        :return:
+        html: str
+        """
+        return self.decompress_html(self.body)
+
+    @staticmethod
+    def decompress_html(body):
+        """
+        :params:
+        body: bytes
+
+        :return:
+        html: str
+        """
+        return zlib.decompress(body).decode()
+
+    @staticmethod
+    def compress_html(html):
+        """
+        :params:
+        html: str
+
+        :return:
+        body: bytes
+        """
+        return zlib.compress(html.encode())
+
+
+class MailDeliveries(models.Model):
+    """
+    Users who already received a mail, as a compressed bitmap over their ids.
+    Updated each time a batch of sent mails is flushed, the dispatch checks it in
+    memory instead of anti joining the sent emails.
+    """
+    mail = models.OneToOneField('mails.Mail', on_delete=models.CASCADE, related_name='deliveries')
+    users_bitmap = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def users(self):
+        """
+        :return:
+        users: Bitmap obj
+        """
+        return Bitmap(zlib.decompress(self.users_bitmap) if self.users_bitmap else b'')
+
+    @users.setter
+    def users(self, users):
+        """
+        :params:
+        users: Bitmap obj
+        """
+        self.users_bitmap = zlib.compress(users.to_bytes())
+
+    @staticmethod
+    def get_sent_emails_users(mail):
+        """
+        Build the delivered users of a mail from its sent emails.
+
+        :params:
+        mail: Mail obj
+
+        :return:
+        users: Bitmap obj
+        """
+        users = Bitmap()
+        users.update(SentEmails.objects.filter(mail=mail).values_list('user_id', flat=True).iterator())
+
+        return users
+
+    @classmethod
+    def get_users(cls, mail):
+        """
+        Get the users who already received a mail.
+        Mails without deliveries are read from the sent emails.
+
+        :params:
+        mail: Mail obj
+
+        :return:
+        users: Bitmap obj
+        """
+        try:
+            return cls.objects.get(mail=mail).users
+
+        except cls.DoesNotExist:
+            return cls.get_sent_emails_users(mail)
+
+    @classmethod
+    def add_users(cls, mail, users_ids):
+        """
+        Add users to the delivered users of a mail.
+        Concurrent senders of the same mail wait for each other.
+
+        :params:
+        mail: Mail obj
+        users_ids: [int]
+        """
+        with transaction.atomic():
+            # The first flush starts from the mails sent before the deliveries were tracked
+            cls.objects.get_or_create(
+                mail=mail, defaults={'users_bitmap': lambda: zlib.compress(cls.get_sent_emails_users(mail).to_bytes())}
+            )
+
+            deliveries = cls.objects.select_for_update().get(mail=mail)
+
+            users = deliveries.users
+            users.update(users_ids)
+
+            deliveries.users = users
+            deliveries.save()
+
+
+class MailRateBuckets(models.Model):
+    """
+    Token buckets of the mails sending rate shared by every process and host
+    sending mails, see el_tinto.utils.rate_limit.DatabaseRateLimiter.
+    """
+    key = models.CharField(max_length=32, unique=True)
+    tokens = models.FloatField(default=0)
+    updated_at = models.DateTimeField()
+
+
+class MailFanOuts(models.Model):
+    """
+    Progress of a mail dispatch fanned out to the mail workers in batches of users.
+    Each batch adds its result when it finishes, the last one finishes the dispatch.
+    """
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, related_name='fan_outs')
+    # Null when the mail is sent at its own dispatch date
+    dispatch_time = models.TimeField(null=True)
+    batches_count = models.PositiveIntegerField(default=0)
+    sent_batches = models.PositiveIntegerField(default=0)
+    failed_batches = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    # Indexes of the batches already counted, sent or failed
+    finished_batches = ArrayField(models.IntegerField(), default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(default=None, null=True, blank=True)
+
+    @property
+    def pending_batches(self):
+        """
+        :return:
+        pending_batches: int
+        """
+        return self.batches_count - self.sent_batches - self.failed_batches
+
+
+class MailOutbox(models.Model):
+    """
+    Transactional mails waiting to be sent by the send_outbox_mails command.
+    Rows are created in the same transaction as the change that triggers the mail.
+    """
+    mail = models.ForeignKey('mails.Mail', on_delete=models.CASCADE, related_name='outbox')
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='outbox_mails')
+    extra_data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_datetime = models.DateTimeField(default=None, null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(default='', blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(sent_datetime__isnull=True), name='mails_outbox_pending')
+        ]
+
 
 class SentEmailsInteractions(models.Model):
     TWITTER = 'TW'
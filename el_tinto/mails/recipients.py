@@ -0,0 +1,123 @@
+from django.utils import timezone
+
+from el_tinto.mails.models import SentEmails
+from el_tinto.users.models import User, UserTier
+
+
+class Recipient:
+    """
+    Lightweight user read by the mails dispatch with values_list, holding only the
+    fields the mail type needs. Any other user attribute is read from the full user,
+    loaded from the database on first access.
+    """
+    FIELDS = (
+        'id',
+        'email',
+        'first_name',
+        'referral_code',
+        'uuid',
+        'preferred_email_days',
+        'missing_sunday_mails',
+        'sunday_mails_prize_end_date'
+    )
+
+    __slots__ = FIELDS + ('_user',)
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    def __getattr__(self, name):
+        # Only called for the attributes that are not set
+        if name in ('id', '_user') or name.startswith('__'):
+            raise AttributeError(name)
+
+        try:
+            user = object.__getattribute__(self, '_user')
+
+        except AttributeError:
+            user = User.objects.get(id=self.id)
+            self._user = user
+
+        return getattr(user, name)
+
+    def __eq__(self, other):
+        if isinstance(other, (Recipient, User)):
+            return self.id == other.id
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.email
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def user_name(self):
+        """
+        Same as User.user_name.
+
+        :return:
+        user_name: str
+        """
+        return self.first_name if self.first_name else self.email.split('@')[0]
+
+    @property
+    def tiers(self):
+        """
+        :return:
+        tiers: UserTier queryset
+        """
+        return UserTier.objects.filter(user_id=self.id)
+
+    @property
+    def open_rate(self):
+        """
+        Same as User.open_rate.
+
+        :return:
+        open_rate: float
+        """
+        sent_emails = SentEmails.objects.filter(user_id=self.id)
+
+        return sent_emails.exclude(opened_date=None).count() / (sent_emails.count() or 1)
+
+    @property
+    def referred_users_count(self):
+        """
+        Same as User.referred_users_count, in one query.
+
+        :return:
+        referred_users_count: int
+        """
+        return User.objects.filter(
+            referred_by_id=self.id, sentemails__opened_date__isnull=False
+        ).distinct().count()
+
+    @property
+    def has_sunday_mails_prize(self):
+        """
+        Same as User.has_sunday_mails_prize.
+
+        :return:
+        has_sunday_mails_prize: bool
+        """
+        if self.tiers.filter(valid_to__gte=timezone.now()).exists():
+            return True
+
+        return bool(self.sunday_mails_prize_end_date and self.sunday_mails_prize_end_date >= timezone.now())
+
+    @property
+    def env(self):
+        """
+        :return:
+        env: str
+        """
+        from el_tinto.utils.utils import get_env_value
+
+        return get_env_value()
@@ -1,32 +1,17 @@
-from celery import shared_task
-from el_tinto.mails.models import Mail
-from el_tinto.users.models import User
+from el_tinto.mails.celery import app
 
 
-@shared_task()
-def send_mails_batch(users_emails_list, mail_id, week_day):
+@app.task(acks_late=True, ignore_result=True)
+def send_fan_out_batch_task(fan_out_id, batch_index, users_ids):
     """
-    Send a batch of emails.
+    Send a mail to a batch of users of a fanned out dispatch, see
+    el_tinto.utils.workers.CeleryWorkerBackend.
 
     :params:
-    users_id_list: [dict]
-    mail_id: int
-    week_day: int
+    fan_out_id: int
+    batch_index: int
+    users_ids: [int]
     """
-    from el_tinto.utils.send_mail import send_todays_mail, send_mail
+    from el_tinto.utils.send_mail import send_fan_out_batch
 
-    users_list = User.objects.filter(email__in=users_emails_list)
-    mail = Mail.objects.get(id=mail_id)
-
-    for user in users_list:
-
-        send_today = send_todays_mail(mail, user, week_day)
-
-        if send_today:
-            send_mail(mail, [user.email], user=user)
-            mail.recipients.add(user)
-            mail.save()
-
-            if mail.dispatch_date.date().weekday() == 6 and user.missing_sunday_mails > 0:
-                user.missing_sunday_mails -= 1
-                user.save()
+    send_fan_out_batch(fan_out_id, batch_index, users_ids)
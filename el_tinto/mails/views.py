@@ -9,8 +9,11 @@ from rest_framework.views import APIView
 
 from el_tinto.mails.models import Templates, Mail, MailLinks
 from el_tinto.mails.serializers import TemplatesSerializer, MailsSerializer
-from el_tinto.users.models import User, UserLinkInteractions
-from el_tinto.utils.tintos import generate_tinto_html, generate_tinto_html_sunday_no_prize
+from el_tinto.users.models import User
+from el_tinto.utils.events import user_link_interactions_sink
+from el_tinto.utils.rendered_pages import get_rendered_page_response, get_rendered_page_version
+from el_tinto.utils.snapshots import render_tinto_page
+from el_tinto.utils.tintos import generate_tinto_html_variants, FULL_TINTO_HTML, SUNDAY_NO_PRIZE_TINTO_HTML
 from el_tinto.utils.utils import replace_words_in_sentence
 
 
@@ -50,7 +53,8 @@ class MailsViewset(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retrie
 
     def perform_create(self, serializer):
         validated_data = serializer.validated_data
-        validated_data['html'] = generate_tinto_html(validated_data['tinto'])
+        html_variants = generate_tinto_html_variants(validated_data['tinto'])
+        validated_data['html'] = html_variants[FULL_TINTO_HTML]
 
         # Define mail type based on dispatch date if no value is provided
         validated_data.setdefault(
@@ -61,10 +65,8 @@ class MailsViewset(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retrie
 
         if instance.type == Mail.SUNDAY:
 
-            html = generate_tinto_html_sunday_no_prize(instance.tinto)
-
             Mail.objects.create(
-                html=html,
+                html=html_variants[SUNDAY_NO_PRIZE_TINTO_HTML],
                 subject=instance.subject,
                 type=instance.type,
                 version=Mail.SUNDAY_NO_REFERRALS_PRIZE_VERSION,
@@ -97,13 +99,12 @@ class MailsViewset(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retrie
         if not instance:
             return Response(data={}, status=status.HTTP_404_NOT_FOUND)
 
-        mail = instance.get_mail_class()
-
-        mail_data = mail.get_mail_template_data()
-
-        html = mail.template.render(mail_data)
-
-        return Response(data={"html": html}, status=status.HTTP_200_OK)
+        return get_rendered_page_response(
+            request,
+            f'todays_tinto:{instance.id}',
+            get_rendered_page_version(instance.updated_at),
+            lambda: render_tinto_page(instance)
+        )
 
 
 class MailLinkView(APIView):
@@ -115,7 +116,7 @@ class MailLinkView(APIView):
         try:
             mail_link = MailLinks.objects.get(code=code)
             user = User.objects.get(uuid=request.GET.get('user'))
-            UserLinkInteractions.objects.create(user=user, link=mail_link)
+            user_link_interactions_sink.add(user=user, link=mail_link)
 
             return redirect(replace_words_in_sentence(mail_link.final_link, user))
 
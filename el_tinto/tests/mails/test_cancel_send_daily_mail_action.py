@@ -1,3 +1,4 @@
+from mock.mock import patch
 from django.contrib.messages import get_messages
 from django.shortcuts import reverse
 from django.test import TestCase
@@ -16,6 +17,13 @@ class TestCancelSendDailyMailAction(TestCase):
 
         self.test_scheduler = test_scheduler
 
+        # Admin actions use the test job store
+        get_scheduler_patcher = patch(
+            'el_tinto.mails.admin_actions.cancel_send_daily_mail.get_scheduler', return_value=self.test_scheduler
+        )
+        get_scheduler_patcher.start()
+        self.addCleanup(get_scheduler_patcher.stop)
+
         # Make sure scheduler is only initialized once
         if not self.test_scheduler.running:
             self.test_scheduler.start()
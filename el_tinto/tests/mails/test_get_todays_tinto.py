@@ -1,9 +1,15 @@
+import gzip
+import json
 from datetime import datetime
 
+import brotli
+from django.test import override_settings
+
 from rest_framework.reverse import reverse
-from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework.test import APITestCase
 
+from el_tinto.mails.models import Mail
 from el_tinto.tests.mails.factories import DailyMailFactory, SundayMailFactory
 
 
@@ -31,6 +37,76 @@ class TestGetTodaysTinto(APITestCase):
 
         self.assertEqual(response.data['html'], html)
 
+    def test_get_daily_tinto_not_modified(self):
+        """
+        Get daily Tinto with the ETag of the current version
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+    def test_get_daily_tinto_compressed(self):
+        """
+        Get daily Tinto precompressed with the encoding accepted by the client
+        """
+        html = self.client.get(self.url).data['html']
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content)), {'html': html})
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), {'html': html})
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+    def test_get_daily_tinto_after_edition(self):
+        """
+        Get daily Tinto after editing the mail, the cached html is not served
+        """
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        self.daily_mail.html = 'Contenido editado'
+        self.daily_mail.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIn('Contenido editado', response.data['html'])
+
+    def test_get_daily_tinto_after_deploy(self):
+        """
+        Get daily Tinto after a deploy, pages rendered with the previous templates release are not served
+        """
+        with override_settings(RENDERED_PAGES_VERSION='release-1'):
+            etag = self.client.get(self.url)['ETag']
+
+        # Stands for a template change, the mail content version is the same
+        Mail.objects.filter(id=self.daily_mail.id).update(html='Plantilla nueva')
+
+        with override_settings(RENDERED_PAGES_VERSION='release-1'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+        with override_settings(RENDERED_PAGES_VERSION='release-2'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIn('Plantilla nueva', response.data['html'])
+
     def test_get_daily_tinto_with_date(self):
         """
         Get daily tinto with a specific date
@@ -0,0 +1,66 @@
+from datetime import time, timedelta
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from el_tinto.mails.models import MailAudiences
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.tests.utils import test_scheduler
+from el_tinto.utils.send_mail import cancel_scheduled_mail, schedule_mail
+
+
+class TestMailAudiences(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.test_scheduler = test_scheduler
+
+        # Make sure scheduler is only initialized once
+        if not self.test_scheduler.running:
+            self.test_scheduler.start()
+
+        # Clean old jobs
+        self.test_scheduler.remove_all_jobs()
+        self.addCleanup(self.test_scheduler.remove_all_jobs)
+
+        self.daily_mail = DailyMailFactory(dispatch_date=timezone.now() + timedelta(days=2))
+
+        self.early_users = UserFactory.create_batch(size=2, dispatch_time=time(6, 0))
+        self.late_users = UserFactory.create_batch(size=3, dispatch_time=time(7, 30))
+
+    def test_audience_snapshot_per_dispatch_time(self):
+        """
+        The recipients of each dispatch time are stored when the mail is programmed
+        """
+        self.assertEqual(schedule_mail(self.daily_mail, self.test_scheduler, time(6, 0)), 2)
+        self.assertEqual(schedule_mail(self.daily_mail, self.test_scheduler, time(7, 30)), 3)
+
+        audience = MailAudiences.objects.get(mail=self.daily_mail, dispatch_time=time(7, 30))
+
+        self.assertCountEqual(audience.users_ids, [user.id for user in self.late_users])
+        self.assertEqual(audience.users_count, 3)
+
+        cancel_scheduled_mail(self.daily_mail, self.test_scheduler)
+
+        self.assertFalse(MailAudiences.objects.filter(mail=self.daily_mail).exists())
+
+    def test_dispatch_reads_audience_snapshot(self):
+        """
+        Mails are sent to the snapshot users who are still active and did not get the mail
+        """
+        schedule_mail(self.daily_mail, self.test_scheduler, time(7, 30))
+
+        inactive_user = self.late_users[0]
+        inactive_user.is_active = False
+        inactive_user.save()
+
+        # Users registered after the mail was programmed are not in the audience
+        UserFactory(dispatch_time=time(7, 30))
+
+        self.daily_mail.get_mail_class().send_several_mails(time(7, 30))
+
+        self.assertCountEqual(
+            [sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in self.late_users[1:]]
+        )
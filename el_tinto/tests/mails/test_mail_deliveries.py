@@ -0,0 +1,107 @@
+import zlib
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, TestCase
+from mock.mock import patch
+
+from el_tinto.mails.classes import DailyMail
+from el_tinto.mails.models import MailDeliveries
+from el_tinto.tests.mails.factories import DailyMailFactory, SentEmailsFactory
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.utils.bitmap import Bitmap
+
+
+class TestBitmap(SimpleTestCase):
+
+    def test_bitmap(self):
+        bitmap = Bitmap()
+        bitmap.update([0, 9, 100_000])
+
+        self.assertIn(9, bitmap)
+        self.assertNotIn(8, bitmap)
+        self.assertNotIn(200_000, bitmap)
+        self.assertEqual(len(bitmap), 3)
+        self.assertEqual(Bitmap(bitmap.to_bytes()).to_bytes(), bitmap.to_bytes())
+
+        # 100k users take a few KB
+        bitmap.update(range(100_000))
+
+        self.assertLessEqual(len(bitmap.to_bytes()), 100_000 // 8 + 1)
+
+
+class TestMailDeliveries(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.daily_mail = DailyMailFactory()
+        self.users = UserFactory.create_batch(size=4)
+
+    def test_deliveries_are_flushed_by_batch(self):
+        """
+        Sent users are added to the recipients and the delivered users of the mail
+        """
+        self.daily_mail.get_mail_class().send_several_mails()
+
+        delivered_users = MailDeliveries.get_users(self.daily_mail)
+
+        self.assertEqual(len(mail.outbox), len(self.users))
+        self.assertEqual(len(delivered_users), len(self.users))
+        self.assertTrue(all(user.id in delivered_users for user in self.users))
+        self.assertEqual(self.daily_mail.recipients.count(), len(self.users))
+
+        stored_bitmap = MailDeliveries.objects.get(mail=self.daily_mail).users_bitmap
+        self.assertEqual(Bitmap(zlib.decompress(stored_bitmap)).to_bytes(), delivered_users.to_bytes())
+
+    def test_resumed_dispatch_skips_delivered_users(self):
+        """
+        A dispatch that failed halfway sends the mail only to the users who did not receive it
+        """
+        daily_mail_class = self.daily_mail.get_mail_class()
+        daily_mail_class.take_audience_snapshot()
+
+        SentEmailsFactory(user=self.users[0], mail=self.daily_mail)
+
+        send_mail = daily_mail_class.send_mail
+        sent_mails = []
+
+        def send_mail_failing_on_third_user(user, **kwargs):
+            if len(sent_mails) == 2:
+                raise Exception('SES is down')
+
+            sent_mails.append(user)
+
+            return send_mail(user, **kwargs)
+
+        with patch.object(DailyMail, 'send_mail', side_effect=send_mail_failing_on_third_user):
+            with self.assertRaises(Exception):
+                daily_mail_class.send_several_mails()
+
+        self.assertEqual(len(mail.outbox), 2)
+
+        # Users sent before the failure and before the deliveries were tracked are delivered
+        self.assertEqual(len(MailDeliveries.get_users(self.daily_mail)), 3)
+
+        self.daily_mail.get_mail_class().send_several_mails()
+
+        self.assertCountEqual([sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in self.users[1:]])
+
+    def test_unsent_mails_are_not_delivered(self):
+        """
+        Mails SES did not accept are not recorded as delivered, they are sent when the dispatch is resumed
+        """
+        failing_user = self.users[0]
+
+        def send(message, fail_silently=False):
+            return 0 if message.to == [failing_user.email] else 1
+
+        with patch.object(EmailMessage, 'send', autospec=True, side_effect=send):
+            sent_count = self.daily_mail.get_mail_class().send_several_mails()
+
+        self.assertEqual(sent_count, len(self.users) - 1)
+        self.assertNotIn(failing_user.id, MailDeliveries.get_users(self.daily_mail))
+        self.assertNotIn(failing_user, self.daily_mail.recipients.all())
+
+        self.daily_mail.get_mail_class().send_several_mails()
+
+        self.assertEqual([sent_mail.to[0] for sent_mail in mail.outbox], [failing_user.email])
@@ -0,0 +1,154 @@
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import connections
+from django.test import TestCase, override_settings
+from mock.mock import patch
+
+from el_tinto.mails.models import MailScheduledJobs, MailFanOuts
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.utils.send_mail import send_multiple_mails, fan_out_mail, send_fan_out_batch
+from el_tinto.utils.workers import get_mail_worker_backend, LocalWorkerBackend, MailWorkerBackend
+
+
+class QueuedWorkerBackend(MailWorkerBackend):
+    """Backend keeping the batches queued, the tests deliver them."""
+
+    def __init__(self):
+        self.batches = []
+
+    def send_batch(self, fan_out_id, batch_index, users_ids):
+        self.batches.append((fan_out_id, batch_index, users_ids))
+
+
+@override_settings(MAIL_WORKER_BACKEND='local', MAIL_WORKER_BATCH_SIZE=2)
+class TestMailFanOut(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.daily_mail = DailyMailFactory()
+        self.users = sorted(UserFactory.create_batch(size=7), key=lambda user: user.id)
+
+        MailScheduledJobs.objects.create(mail=self.daily_mail, dispatch_time=None, job_id=f'{self.daily_mail.id}')
+
+    def test_mail_worker_backend(self):
+        self.assertIsInstance(get_mail_worker_backend(), LocalWorkerBackend)
+
+        with override_settings(MAIL_WORKER_BACKEND=''):
+            self.assertIsNone(get_mail_worker_backend())
+
+    def test_fan_out(self):
+        """
+        Each user is sent the mail by one batch, the last batch marks the mail as sent and unregisters its job
+        """
+        send_multiple_mails(self.daily_mail.id, None)
+
+        self.assertCountEqual([sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in self.users])
+
+        fan_out = MailFanOuts.objects.get(mail=self.daily_mail)
+
+        self.assertEqual(
+            (fan_out.batches_count, fan_out.sent_batches, fan_out.failed_batches, fan_out.sent_count),
+            (4, 4, 0, len(self.users))
+        )
+        self.assertIsNotNone(fan_out.finished_at)
+
+        self.daily_mail.refresh_from_db()
+        self.assertIsNotNone(self.daily_mail.sent_datetime)
+        self.assertFalse(MailScheduledJobs.objects.filter(mail=self.daily_mail).exists())
+
+    def test_redelivered_batch(self):
+        """
+        A batch delivered again while other batches are pending is not sent nor counted twice
+        """
+        backend = QueuedWorkerBackend()
+        fan_out = fan_out_mail(self.daily_mail, None, backend)
+
+        first_batch, *other_batches = backend.batches
+
+        send_fan_out_batch(*first_batch)
+        send_fan_out_batch(*first_batch)
+
+        fan_out.refresh_from_db()
+        self.daily_mail.refresh_from_db()
+
+        self.assertEqual((fan_out.sent_batches, fan_out.sent_count, fan_out.pending_batches), (1, 2, 3))
+        self.assertIsNone(fan_out.finished_at)
+        self.assertIsNone(self.daily_mail.sent_datetime)
+
+        for batch in other_batches:
+            send_fan_out_batch(*batch)
+
+        fan_out.refresh_from_db()
+        self.daily_mail.refresh_from_db()
+
+        self.assertEqual((fan_out.sent_batches, fan_out.sent_count), (4, len(self.users)))
+        self.assertIsNotNone(self.daily_mail.sent_datetime)
+        self.assertEqual(len(mail.outbox), len(self.users))
+
+    def test_batch_being_sent(self):
+        """
+        A batch delivered again while its first delivery is still sending it is skipped
+        """
+        backend = QueuedWorkerBackend()
+        fan_out = fan_out_mail(self.daily_mail, None, backend)
+
+        first_batch = backend.batches[0]
+
+        # The first delivery runs on another worker, holding the batch lock in its database session
+        worker_connection = connections['default'].copy()
+        self.addCleanup(worker_connection.close)
+
+        with worker_connection.cursor() as cursor:
+            cursor.execute("select pg_advisory_lock(%s, %s)", [fan_out.id, 0])
+
+        send_fan_out_batch(*first_batch)
+
+        fan_out.refresh_from_db()
+
+        self.assertEqual((fan_out.sent_batches, fan_out.finished_batches), (0, []))
+        self.assertEqual(len(mail.outbox), 0)
+
+        # The worker died before finishing the batch, a later delivery sends it
+        worker_connection.close()
+
+        send_fan_out_batch(*first_batch)
+
+        fan_out.refresh_from_db()
+
+        self.assertEqual((fan_out.sent_batches, fan_out.sent_count), (1, 2))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_batch(self):
+        """
+        A failed batch does not stop the others, the mail is not marked as sent until the dispatch is resumed
+        """
+        failing_user = self.users[0]
+
+        def send(message, fail_silently=False):
+            if message.to == [failing_user.email]:
+                raise Exception('SES is down')
+
+            return 1
+
+        with patch.object(EmailMessage, 'send', autospec=True, side_effect=send):
+            send_multiple_mails(self.daily_mail.id, None)
+
+        fan_out = MailFanOuts.objects.get(mail=self.daily_mail)
+
+        self.assertEqual((fan_out.sent_batches, fan_out.failed_batches, fan_out.sent_count), (3, 1, 5))
+
+        self.daily_mail.refresh_from_db()
+        self.assertIsNone(self.daily_mail.sent_datetime)
+        self.assertTrue(MailScheduledJobs.objects.filter(mail=self.daily_mail).exists())
+
+        # The failed batch stops at its first user, running the job again sends the mail to the rest
+        send_multiple_mails(self.daily_mail.id, None)
+
+        resumed_fan_out = MailFanOuts.objects.filter(mail=self.daily_mail).latest('id')
+
+        self.assertEqual((resumed_fan_out.batches_count, resumed_fan_out.sent_count), (1, 2))
+        self.assertCountEqual([sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in self.users[:2]])
+
+        self.daily_mail.refresh_from_db()
+        self.assertIsNotNone(self.daily_mail.sent_datetime)
@@ -0,0 +1,85 @@
+from datetime import time
+
+from django.core import mail
+from django.test import TestCase
+from mock.mock import patch
+
+from el_tinto.mails.models import Mail, MailOutbox, MailScheduledJobs
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.utils.rate_limit import TRANSACTIONAL_PRIORITY, BULK_PRIORITY
+from el_tinto.utils.send_mail import enqueue_mail, send_outbox_mails, get_mail_queues_status, \
+    MAIL_OUTBOX_MAX_ATTEMPTS
+from el_tinto.utils.utils import UTILITY_MAILS, ONBOARDING_EMAIL_NAME, CHANGE_PREFERRED_DAYS
+
+
+class TestMailOutbox(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.user = UserFactory(referral_code='AKIL89')
+        self.onboarding_mail = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
+        self.change_preferred_days_mail = Mail.objects.get(id=UTILITY_MAILS.get(CHANGE_PREFERRED_DAYS))
+
+    def test_send_outbox_mails(self):
+        """
+        Pending mails are sent in order with their extra data and marked as sent
+        """
+        enqueue_mail(self.onboarding_mail, self.user)
+        enqueue_mail(
+            self.change_preferred_days_mail,
+            self.user,
+            extra_data={'days': 'lunes', 'display_type': 'days', 'key': 'outbox_key'}
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_outbox_mails(), 2)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, self.onboarding_mail.subject)
+        self.assertIn('outbox_key', mail.outbox[1].body)
+
+        self.assertFalse(MailOutbox.objects.filter(sent_datetime__isnull=True).exists())
+        self.assertTrue(self.onboarding_mail.recipients.filter(id=self.user.id).exists())
+
+        # Sent mails are not sent again
+        self.assertEqual(send_outbox_mails(), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    @patch('el_tinto.mails.classes.Mail.send_mail', side_effect=Exception('SES is down'))
+    def test_failed_mails_are_retried(self, _):
+        """
+        Failed mails stay pending until they reach the max attempts
+        """
+        outbox_mail = enqueue_mail(self.onboarding_mail, self.user)
+
+        send_outbox_mails()
+
+        outbox_mail.refresh_from_db()
+
+        self.assertIsNone(outbox_mail.sent_datetime)
+        self.assertEqual(outbox_mail.attempts, 1)
+        self.assertEqual(outbox_mail.error, 'SES is down')
+
+        for _ in range(MAIL_OUTBOX_MAX_ATTEMPTS):
+            send_outbox_mails()
+
+        outbox_mail.refresh_from_db()
+
+        self.assertEqual(outbox_mail.attempts, MAIL_OUTBOX_MAX_ATTEMPTS)
+
+    def test_mail_queues_status(self):
+        """
+        Transactional and bulk queues are reported separately
+        """
+        enqueue_mail(self.onboarding_mail, self.user)
+        MailOutbox.objects.create(mail=self.onboarding_mail, user=self.user, attempts=MAIL_OUTBOX_MAX_ATTEMPTS)
+        MailScheduledJobs.objects.create(mail=self.change_preferred_days_mail, dispatch_time=time(6, 0), job_id='1_06')
+        MailScheduledJobs.objects.create(mail=self.change_preferred_days_mail, dispatch_time=time(7, 0), job_id='1_07')
+
+        queues_status = get_mail_queues_status()
+
+        self.assertEqual(queues_status[TRANSACTIONAL_PRIORITY]['pending'], 1)
+        self.assertEqual(queues_status[TRANSACTIONAL_PRIORITY]['failed'], 1)
+        self.assertIsNotNone(queues_status[TRANSACTIONAL_PRIORITY]['oldest_pending'])
+        self.assertEqual(queues_status[BULK_PRIORITY], {'pending': 2, 'mails': 1})
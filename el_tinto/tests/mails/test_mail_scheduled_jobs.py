@@ -0,0 +1,137 @@
+from datetime import time, timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from mock.mock import patch
+
+from el_tinto.mails.models import MailScheduledJobs
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.utils import test_scheduler
+from el_tinto.utils.send_mail import (
+    cancel_scheduled_mail,
+    reschedule_mail,
+    schedule_mail,
+    send_multiple_mails
+)
+
+
+class TestMailScheduledJobs(TestCase):
+
+    def setUp(self):
+        self.test_scheduler = test_scheduler
+
+        # Make sure scheduler is only initialized once
+        if not self.test_scheduler.running:
+            self.test_scheduler.start()
+
+        # Clean old jobs
+        self.test_scheduler.remove_all_jobs()
+        self.addCleanup(self.test_scheduler.remove_all_jobs)
+
+        dispatch_date = timezone.now() + timedelta(days=2)
+
+        self.mail = DailyMailFactory(id=12, dispatch_date=dispatch_date)
+        self.other_mail = DailyMailFactory(id=123, dispatch_date=dispatch_date)
+
+    def test_schedule_mail_registers_jobs(self):
+        """
+        Each scheduled dispatch time is registered with its job id
+        """
+        schedule_mail(self.mail, self.test_scheduler, time(6, 0))
+        schedule_mail(self.mail, self.test_scheduler, time(7, 30))
+
+        self.assertEqual(
+            set(MailScheduledJobs.objects.filter(mail=self.mail).values_list('dispatch_time', 'job_id')),
+            {(time(6, 0), '12_06:00:00'), (time(7, 30), '12_07:30:00')}
+        )
+        self.assertIsNotNone(self.test_scheduler.get_job('12_06:00:00'))
+
+        # Scheduling again replaces the job
+        schedule_mail(self.mail, self.test_scheduler, time(6, 0))
+
+        self.assertEqual(MailScheduledJobs.objects.filter(mail=self.mail).count(), 2)
+
+        # One sending and one staging job per dispatch time
+        self.assertEqual(len(self.test_scheduler.get_jobs()), 4)
+        self.assertIsNotNone(self.test_scheduler.get_job('12_06:00:00_staging'))
+
+    def test_cancel_only_removes_mail_jobs(self):
+        """
+        Canceling mail 12 does not remove the jobs of mail 123
+        """
+        schedule_mail(self.mail, self.test_scheduler, time(6, 0))
+        schedule_mail(self.other_mail, self.test_scheduler, time(6, 0))
+
+        cancel_scheduled_mail(self.mail, self.test_scheduler)
+
+        self.assertFalse(MailScheduledJobs.objects.filter(mail=self.mail).exists())
+        self.assertIsNone(self.test_scheduler.get_job('12_06:00:00'))
+        self.assertIsNone(self.test_scheduler.get_job('12_06:00:00_staging'))
+
+        self.assertTrue(MailScheduledJobs.objects.filter(mail=self.other_mail).exists())
+        self.assertIsNotNone(self.test_scheduler.get_job('123_06:00:00'))
+
+    def test_reschedule_mail(self):
+        """
+        Rescheduling moves the registered jobs to the new dispatch date
+        """
+        schedule_mail(self.mail, self.test_scheduler, time(6, 0))
+
+        self.mail.dispatch_date += timedelta(days=1)
+        self.mail.save()
+
+        reschedule_mail(self.mail, self.test_scheduler)
+
+        job = self.test_scheduler.get_job('12_06:00:00')
+
+        self.assertEqual(job.next_run_time.date(), self.mail.dispatch_date.date())
+        self.assertEqual(MailScheduledJobs.objects.filter(mail=self.mail).count(), 1)
+
+    @patch('el_tinto.mails.models.Mail.get_mail_class')
+    def test_sent_job_is_unregistered(self, _):
+        """
+        The registered job is removed once the mail is sent
+        """
+        schedule_mail(self.mail, self.test_scheduler, time(6, 0))
+        schedule_mail(self.mail, self.test_scheduler, time(7, 30))
+
+        send_multiple_mails(self.mail.id, time(6, 0))
+
+        self.assertEqual(
+            list(MailScheduledJobs.objects.filter(mail=self.mail).values_list('dispatch_time', flat=True)),
+            [time(7, 30)]
+        )
+
+    def test_registered_jobs_backfill(self):
+        """
+        Jobs queued before the jobs were registered are backfilled with the dispatch time they were scheduled with,
+        for both job id shapes: "<mail id>_<time>" and "<mail id>"
+        """
+        migration = import_module('el_tinto.mails.migrations.0033_mailscheduledjobs')
+
+        schedule_mail(self.mail, self.test_scheduler)
+        schedule_mail(self.mail, self.test_scheduler, time(7, 30))
+        self.test_scheduler.add_job(
+            send_multiple_mails,
+            trigger='date',
+            run_date=self.other_mail.dispatch_date,
+            args=[self.other_mail.id, None],
+            id=str(self.other_mail.id)
+        )
+
+        MailScheduledJobs.objects.all().delete()
+
+        migration.populate_mail_scheduled_jobs(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(
+            set(MailScheduledJobs.objects.values_list('mail_id', 'dispatch_time', 'job_id')),
+            {
+                (12, None, f"12_{self.mail.dispatch_date.strftime('%H:%M:%S')}"),
+                (12, time(7, 30), '12_07:30:00'),
+                (123, None, '123')
+            }
+        )
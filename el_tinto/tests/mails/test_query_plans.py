@@ -0,0 +1,97 @@
+import re
+from datetime import date, time, timedelta
+
+from django.db import connection
+from django.test import TestCase
+
+from el_tinto.mails.models import SentEmails
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.users.models import User, UserTier
+
+
+class TestQueryPlans(TestCase):
+    """
+    Hot queries of the mails dispatch and tracking must be served by an index.
+    Each query plan is captured with EXPLAIN over a seeded dataset, the test fails
+    when the plan scans a whole table.
+    """
+    USERS_COUNT = 3000
+    DISPATCH_TIMES_COUNT = 30
+    SENT_MAILS_COUNT = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mails = [DailyMailFactory() for _ in range(cls.SENT_MAILS_COUNT + 1)]
+        cls.mail = cls.mails[-1]
+
+        User.objects.bulk_create([
+            User(
+                email=f'user_{i}@eltinto.xyz',
+                referral_code=f'R{i:05}',
+                dispatch_time=time(i % cls.DISPATCH_TIMES_COUNT // 6, i % 6 * 10)
+            )
+            for i in range(cls.USERS_COUNT)
+        ])
+
+        cls.users = list(User.objects.order_by('id'))
+        cls.user = cls.users[0]
+
+        SentEmails.objects.bulk_create([
+            SentEmails(mail=mail, user=user, opened_date=cls.mail.dispatch_date if user.id % 3 else None)
+            for mail in cls.mails[:-1] for user in cls.users
+        ])
+
+        UserTier.objects.bulk_create([
+            UserTier(user=user, tier=UserTier.TIER_TINTO, valid_to=date.today() + timedelta(days=user.id % 60 - 30))
+            for user in cls.users[::2]
+        ])
+
+        with connection.cursor() as cursor:
+            for model in (User, SentEmails, UserTier):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def assertNoSeqScan(self, queryset, *models):
+        """
+        Check no table of the models is sequentially scanned by the queryset plan.
+
+        :params:
+        queryset: QuerySet
+        models: [Model]
+        """
+        plan = queryset.explain()
+
+        for model in models:
+            self.assertIsNone(
+                re.search(rf'Seq Scan on {model._meta.db_table}\b', plan),
+                f'Sequential scan on {model._meta.db_table}:\n{plan}'
+            )
+
+    def test_dispatch_users_plan(self):
+        """
+        Dispatch users are read by dispatch time and the sent users by mail
+        """
+        dispatch_users = self.mail.get_mail_class().get_dispatch_users(self.user.dispatch_time)
+
+        self.assertNoSeqScan(dispatch_users, User, SentEmails)
+
+    def test_sent_email_plans(self):
+        """
+        Opened mail tracking and open rate read the sent emails by user
+        """
+        self.assertNoSeqScan(
+            SentEmails.objects.filter(user=self.user, mail=self.mails[0], opened_date=None), SentEmails
+        )
+        self.assertNoSeqScan(self.user.sentemails_set.exclude(opened_date=None), SentEmails)
+
+    def test_user_lookup_plans(self):
+        """
+        Users are looked up by referral code and uuid
+        """
+        self.assertNoSeqScan(User.objects.filter(referral_code=self.user.referral_code, is_active=True), User)
+        self.assertNoSeqScan(User.objects.filter(uuid=self.user.uuid, is_active=True), User)
+
+    def test_user_tiers_plan(self):
+        """
+        Active tiers are read by user
+        """
+        self.assertNoSeqScan(self.user.tiers.filter(valid_to__gte=date.today()), UserTier)
@@ -0,0 +1,87 @@
+import multiprocessing
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from mock.mock import patch
+
+from el_tinto.utils.rate_limit import RateLimiter, SharedRateLimiter, DatabaseRateLimiter, get_mail_rate_limiter, \
+    BULK_PRIORITY
+
+
+def acquire_tokens(rate_limiter, tokens):
+    for _ in range(tokens):
+        rate_limiter.acquire()
+
+
+class TestRateLimiter(SimpleTestCase):
+
+    @patch('el_tinto.utils.rate_limit.time.sleep')
+    @patch('el_tinto.utils.rate_limit.time.monotonic', return_value=100)
+    def test_acquire_waits_when_rate_is_exceeded(self, monotonic, sleep):
+        """
+        Operations over the burst wait their turn in order, tokens are refilled over time
+        """
+        rate_limiter = RateLimiter(10, burst=2)
+
+        self.assertEqual([rate_limiter.acquire() for _ in range(4)], [0, 0, 0.1, 0.2])
+        self.assertEqual(sleep.call_count, 2)
+
+        # One second later the bucket is full again
+        monotonic.return_value = 101.2
+
+        self.assertEqual(rate_limiter.acquire(), 0)
+
+    @patch('el_tinto.utils.rate_limit.time.sleep')
+    def test_disabled_rate_limiter(self, sleep):
+        """
+        A rate limiter without rate never waits
+        """
+        rate_limiter = RateLimiter(None)
+
+        for _ in range(100):
+            rate_limiter.acquire()
+
+        sleep.assert_not_called()
+
+    def test_shared_rate_limiter(self):
+        """
+        Processes sharing a rate limiter stay within the same rate
+        """
+        mp_context = multiprocessing.get_context('fork')
+        rate_limiter = SharedRateLimiter(20, burst=1, mp_context=mp_context)
+
+        processes = [mp_context.Process(target=acquire_tokens, args=(rate_limiter, 5)) for _ in range(2)]
+
+        start = time.monotonic()
+
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+
+        # 10 tokens at 20 per second, each process alone would take 0.2 seconds
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+
+class TestDatabaseRateLimiter(TestCase):
+
+    def test_database_rate_limiter(self):
+        """
+        Rate limiters with the same key share their bucket, as the mail workers of different hosts
+        """
+        rate_limiters = [DatabaseRateLimiter('test', 20, burst=1) for _ in range(2)]
+
+        start = time.monotonic()
+
+        for _ in range(3):
+            for rate_limiter in rate_limiters:
+                rate_limiter.acquire()
+
+        # 6 tokens at 20 per second, each rate limiter alone would take 0.1 seconds
+        self.assertGreaterEqual(time.monotonic() - start, 0.24)
+
+    @override_settings(MAIL_WORKER_BACKEND='celery')
+    def test_celery_workers_share_the_bulk_rate(self):
+        with patch.dict('el_tinto.utils.rate_limit._rate_limiters', clear=True):
+            self.assertIsInstance(get_mail_rate_limiter(BULK_PRIORITY), DatabaseRateLimiter)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from el_tinto.mails.recipients import Recipient
+from el_tinto.tests.mails.factories import SundayMailFactory, SentEmailsFactory
+from el_tinto.tests.users.factories import UserFactory, UserTierFactory
+from el_tinto.users.models import User
+
+
+class TestRecipients(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.sunday_mail = SundayMailFactory()
+        self.sunday_mail_class = self.sunday_mail.get_mail_class()
+
+        self.user = UserFactory(missing_sunday_mails=2, sunday_mails_prize_end_date=timezone.now() + timedelta(days=1))
+
+        referred_user = UserFactory(referred_by=self.user)
+        SentEmailsFactory(user=referred_user, mail=self.sunday_mail, opened_date=timezone.now())
+        SentEmailsFactory(user=self.user, mail=SundayMailFactory(), opened_date=timezone.now())
+        SentEmailsFactory(user=self.user, mail=SundayMailFactory())
+
+    def test_recipient_matches_user(self):
+        """
+        Recipients only hold the mail recipient fields and behave as their user
+        """
+        recipient, = self.sunday_mail_class.get_recipients(User.objects.filter(id=self.user.id))
+
+        self.assertIsInstance(recipient, Recipient)
+        self.assertFalse(hasattr(recipient, '__dict__'))
+        self.assertEqual(recipient, self.user)
+
+        for attribute in (
+            'email', 'user_name', 'referral_code', 'uuid', 'missing_sunday_mails', 'referred_users_count',
+            'has_sunday_mails_prize', 'open_rate'
+        ):
+            self.assertEqual(getattr(recipient, attribute), getattr(self.user, attribute), attribute)
+
+        self.assertEqual(
+            self.sunday_mail_class.get_mail_template_data(recipient),
+            self.sunday_mail_class.get_mail_template_data(self.user)
+        )
+
+        # Other attributes are read from the full user
+        self.assertEqual(recipient.last_name, self.user.last_name)
+
+    def test_sunday_mails_accounting(self):
+        """
+        Sending a sunday mail to a recipient discounts its missing sunday mails
+        """
+        tier_user = UserTierFactory(missing_sunday_mails=3).user
+
+        recipients = list(
+            self.sunday_mail_class.get_recipients(User.objects.filter(id__in=[self.user.id, tier_user.id]))
+        )
+
+        self.sunday_mail_class.send_mail_batch(recipients)
+
+        self.user.refresh_from_db()
+
+        self.assertEqual(self.user.missing_sunday_mails, 1)
+        self.assertEqual(tier_user.tiers.get().missing_sunday_mails, 2)
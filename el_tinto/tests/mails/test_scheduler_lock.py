@@ -0,0 +1,93 @@
+import subprocess
+import sys
+import threading
+from datetime import timedelta
+
+from django.db import connections
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from mock.mock import patch
+
+from el_tinto.tests.utils import TEST_JOBSTORE_URL
+from el_tinto.utils.scheduler import (
+    SCHEDULER_LOCK_ID,
+    acquire_scheduler_lock,
+    create_job_store_scheduler,
+    get_scheduler,
+    is_scheduler_lock_held,
+    release_scheduler_lock
+)
+
+
+class TestSchedulerLock(TestCase):
+
+    def test_only_one_session_holds_the_lock(self):
+        """
+        Scheduler lock can not be acquired by another session while it is held
+        """
+        self.assertTrue(acquire_scheduler_lock())
+        self.addCleanup(release_scheduler_lock)
+
+        self.assertTrue(is_scheduler_lock_held())
+
+        other_connection = connections.create_connection('default')
+        self.addCleanup(other_connection.close)
+
+        with other_connection.cursor() as cursor:
+            cursor.execute("select pg_try_advisory_lock(%s)", [SCHEDULER_LOCK_ID])
+            self.assertFalse(cursor.fetchone()[0])
+
+        release_scheduler_lock()
+
+        self.assertFalse(is_scheduler_lock_held())
+
+
+class TestGetScheduler(SimpleTestCase):
+
+    def test_scheduler_is_created_once(self):
+        """
+        Scheduler is created and started paused on first use only
+        """
+        with patch('el_tinto.utils.scheduler._scheduler', None), \
+                patch('el_tinto.utils.scheduler.create_job_store_scheduler') as create_job_store_scheduler:
+            scheduler = get_scheduler()
+
+            self.assertIs(get_scheduler(), scheduler)
+
+        create_job_store_scheduler.assert_called_once()
+        scheduler.start.assert_called_once_with(paused=True)
+
+    def test_job_store_scheduler_only_submits_jobs(self):
+        """
+        Scheduler of the processes submitting jobs writes them to the job store without starting a thread or a pool
+        """
+        threads_count = threading.active_count()
+
+        scheduler, other_process_scheduler = [create_job_store_scheduler(TEST_JOBSTORE_URL) for _ in range(2)]
+
+        for job_store_scheduler in [scheduler, other_process_scheduler]:
+            job_store_scheduler.start(paused=True)
+            self.addCleanup(job_store_scheduler.shutdown)
+
+        scheduler.add_job(print, trigger='date', run_date=timezone.now() + timedelta(days=1), id='job_store_test')
+        self.addCleanup(scheduler.remove_job, 'job_store_test')
+
+        self.assertIsNotNone(other_process_scheduler.get_job('job_store_test'))
+        self.assertEqual(threading.active_count(), threads_count)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.resume()
+
+    def test_startup_does_not_load_the_scheduler(self):
+        """
+        Loading the urls (admin actions included) imports neither APScheduler nor the test scheduler
+        """
+        code = (
+            "import sys; import configurations; configurations.setup(); import el_tinto.urls; "
+            "print(any(module.split('.')[0] == 'apscheduler' or module == 'el_tinto.tests.utils' "
+            "for module in sys.modules))"
+        )
+
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.decode().strip(), 'False')
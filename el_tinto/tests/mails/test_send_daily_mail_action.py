@@ -1,6 +1,7 @@
 import datetime
 from datetime import time
 
+from mock.mock import patch
 from django.contrib.messages import get_messages
 from django.shortcuts import reverse
 from django.test import TestCase
@@ -21,6 +22,13 @@ class TestSendDailyMailAction(TestCase):
 
         self.test_scheduler = test_scheduler
 
+        # Admin actions use the test job store
+        get_scheduler_patcher = patch(
+            'el_tinto.mails.admin_actions.send_daily_mail.get_scheduler', return_value=self.test_scheduler
+        )
+        get_scheduler_patcher.start()
+        self.addCleanup(get_scheduler_patcher.stop)
+
         # Make sure scheduler is only initialized once
         if self.test_scheduler.running == False:
             self.test_scheduler.start()
@@ -0,0 +1,118 @@
+from concurrent.futures import Future
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import TestCase, override_settings
+from mock.mock import patch
+
+from el_tinto.mails.models import MailScheduledJobs, StagedMails
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.utils.rate_limit import get_mail_rate_limiter, BULK_PRIORITY
+from el_tinto.utils.send_mail import send_multiple_mails
+
+
+class InlineExecutor:
+    """Executor running the submitted functions right away in the test database transaction."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, function, *args):
+        future = Future()
+
+        try:
+            future.set_result(function(*args))
+
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+
+@patch('el_tinto.utils.send_mail.get_shards_executor', InlineExecutor)
+class TestShardedDispatch(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.daily_mail = DailyMailFactory()
+        self.users = UserFactory.create_batch(size=7)
+
+        MailScheduledJobs.objects.create(mail=self.daily_mail, dispatch_time=None, job_id=f'{self.daily_mail.id}')
+
+    def test_shards_split_the_audience(self):
+        """
+        Each shard sends the mails of its users and its staged mails only
+        """
+        daily_mail_class = self.daily_mail.get_mail_class()
+        daily_mail_class.stage_mails()
+
+        sent_counts = [daily_mail_class.send_several_mails(shard=(shard, 3)) for shard in range(3)]
+
+        self.assertEqual(sent_counts, [len([user for user in self.users if user.id % 3 == i]) for i in range(3)])
+        self.assertCountEqual([sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in self.users])
+        self.assertFalse(StagedMails.objects.filter(mail=self.daily_mail).exists())
+
+        # Shards do not mark the mail as sent
+        self.daily_mail.refresh_from_db()
+        self.assertIsNone(self.daily_mail.sent_datetime)
+
+    @override_settings(MAIL_DISPATCH_SHARDS=3)
+    def test_sharded_send_multiple_mails(self):
+        """
+        The mail is marked as sent and its job unregistered once every shard is sent
+        """
+        send_multiple_mails(self.daily_mail.id, None)
+
+        self.assertEqual(len(mail.outbox), len(self.users))
+
+        self.daily_mail.refresh_from_db()
+        self.assertIsNotNone(self.daily_mail.sent_datetime)
+        self.assertFalse(MailScheduledJobs.objects.filter(mail=self.daily_mail).exists())
+
+    @override_settings(MAIL_DISPATCH_SHARDS=3)
+    def test_sharded_dispatches_share_the_bulk_rate(self):
+        """
+        Sharded dispatches running at the same time share the bulk mails rate limiter of the process
+        """
+        with patch('el_tinto.utils.send_mail.get_shards_executor', side_effect=InlineExecutor) as get_shards_executor:
+            send_multiple_mails(self.daily_mail.id, None)
+            send_multiple_mails(DailyMailFactory().id, None)
+
+        rate_limiters = [call.args[1] for call in get_shards_executor.call_args_list]
+
+        self.assertEqual(len(rate_limiters), 2)
+        self.assertTrue(all(rate_limiter is get_mail_rate_limiter(BULK_PRIORITY) for rate_limiter in rate_limiters))
+
+    @override_settings(MAIL_DISPATCH_SHARDS=3)
+    def test_failed_shard(self):
+        """
+        A failed shard does not stop the others, the job fails so the mail is not marked as sent
+        """
+        failing_user = self.users[0]
+
+        def send(message, fail_silently=False):
+            if message.to == [failing_user.email]:
+                raise Exception('SES is down')
+
+            return 1
+
+        with patch.object(EmailMessage, 'send', autospec=True, side_effect=send):
+            with self.assertRaises(RuntimeError):
+                send_multiple_mails(self.daily_mail.id, None)
+
+        self.daily_mail.refresh_from_db()
+
+        self.assertIsNone(self.daily_mail.sent_datetime)
+        self.assertTrue(MailScheduledJobs.objects.filter(mail=self.daily_mail).exists())
+
+        # The failed shard stops at its first user, the other shards are sent
+        self.assertCountEqual(
+            self.daily_mail.recipients.all(), [user for user in self.users if user.id % 3 != failing_user.id % 3]
+        )
@@ -0,0 +1,105 @@
+from datetime import time, timedelta
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from mock.mock import patch
+
+from el_tinto.mails.classes import DailyMail
+from el_tinto.mails.models import Mail, StagedMails
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.users.factories import UserFactory
+
+
+class TestStagedMails(TestCase):
+    fixtures = ['mails']
+
+    def setUp(self):
+        self.daily_mail = DailyMailFactory()
+        self.users = UserFactory.create_batch(size=3)
+
+    def test_stage_mails(self):
+        """
+        A compressed mail is rendered for each dispatch user
+        """
+        daily_mail_class = self.daily_mail.get_mail_class()
+
+        self.assertEqual(daily_mail_class.stage_mails(), len(self.users))
+
+        staged_mail = StagedMails.objects.get(mail=self.daily_mail, user=self.users[0])
+        subject, html = daily_mail_class.render_mail(self.users[0])
+
+        self.assertEqual(staged_mail.recipient, self.users[0].email)
+        self.assertEqual(staged_mail.subject, subject)
+        self.assertEqual(staged_mail.html, html)
+        self.assertLess(len(staged_mail.body), len(html.encode()))
+
+        # Staging again replaces the staged mails
+        daily_mail_class.stage_mails()
+
+        self.assertEqual(StagedMails.objects.filter(mail=self.daily_mail).count(), len(self.users))
+
+    def test_send_staged_mails(self):
+        """
+        Staged mails are sent without rendering, users that are no longer dispatch
+        users are skipped and new dispatch users are rendered at send time
+        """
+        self.daily_mail.get_mail_class().stage_mails()
+
+        inactive_user = self.users[0]
+        inactive_user.is_active = False
+        inactive_user.save()
+
+        new_user = UserFactory()
+
+        daily_mail_class = Mail.objects.get(id=self.daily_mail.id).get_mail_class()
+
+        with patch.object(DailyMail, 'render_mail', wraps=daily_mail_class.render_mail) as render_mail:
+            daily_mail_class.send_several_mails()
+
+        render_mail.assert_called_once_with(new_user, None)
+
+        self.assertCountEqual(
+            [sent_mail.to[0] for sent_mail in mail.outbox], [self.users[1].email, self.users[2].email, new_user.email]
+        )
+        self.assertFalse(StagedMails.objects.filter(mail=self.daily_mail).exists())
+
+    def test_mail_edited_after_staging(self):
+        """
+        Mails staged before the last mail edition are rendered again
+        """
+        self.daily_mail.get_mail_class().stage_mails()
+
+        Mail.objects.filter(id=self.daily_mail.id).update(
+            html='Edited html', updated_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        Mail.objects.get(id=self.daily_mail.id).get_mail_class().send_several_mails()
+
+        self.assertEqual(len(mail.outbox), len(self.users))
+        self.assertIn('Edited html', mail.outbox[0].body)
+
+    def test_staged_mails_of_later_dispatch_times(self):
+        """
+        Marking the mail as sent after a dispatch time does not discard the mails staged for the next one
+        """
+        early_users = UserFactory.create_batch(size=2, dispatch_time=time(6, 0))
+        late_users = UserFactory.create_batch(size=2, dispatch_time=time(7, 0))
+
+        daily_mail_class = self.daily_mail.get_mail_class()
+        daily_mail_class.stage_mails(time(6, 0))
+        daily_mail_class.stage_mails(time(7, 0))
+
+        Mail.objects.get(id=self.daily_mail.id).get_mail_class().send_several_mails(time(6, 0))
+
+        daily_mail_class = Mail.objects.get(id=self.daily_mail.id).get_mail_class()
+
+        with patch.object(DailyMail, 'render_mail', wraps=daily_mail_class.render_mail) as render_mail:
+            daily_mail_class.send_several_mails(time(7, 0))
+
+        render_mail.assert_not_called()
+
+        self.assertCountEqual(
+            [sent_mail.to[0] for sent_mail in mail.outbox], [user.email for user in early_users + late_users]
+        )
+        self.assertIsNotNone(Mail.objects.get(id=self.daily_mail.id).sent_datetime)
@@ -0,0 +1,137 @@
+import json
+import shutil
+import tempfile
+from datetime import datetime
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from mock.mock import patch
+
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.tintos.factories import TintoBlocksEntriesFactory, TintoBlocksFactory
+from el_tinto.utils import snapshots
+from el_tinto.utils.snapshots import get_snapshots_storage, render_tinto_page, render_web_news_page
+
+
+class TestTintosSnapshots(TestCase):
+
+    def setUp(self):
+        self.snapshots_location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshots_location)
+
+        settings_override = override_settings(
+            STATIC_SNAPSHOTS_ENABLED=True,
+            STATIC_SNAPSHOTS_LOCATION=self.snapshots_location
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.mail = DailyMailFactory()
+        self.tinto_block_entry = TintoBlocksEntriesFactory(tinto=self.mail.tinto, position=0)
+
+    def test_snapshot_is_published_when_mail_is_sent(self):
+        """
+        Tinto and news pages plus the index are published once the mail is sent
+        """
+        storage = get_snapshots_storage()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mail.save()
+
+        self.assertFalse(storage.exists('index.json'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mail.sent_datetime = timezone.now()
+            self.mail.save()
+
+        date = self.mail.dispatch_date.strftime('%d-%m-%Y')
+
+        with storage.open(f'tintos/{date}.html') as file:
+            self.assertEqual(file.read().decode(), render_tinto_page(self.mail))
+
+        with storage.open(f'web_news/{self.tinto_block_entry.id}.html') as file:
+            self.assertEqual(file.read().decode(), render_web_news_page(self.tinto_block_entry, self.mail))
+
+        with storage.open('index.json') as file:
+            index = json.loads(file.read())
+
+        self.assertEqual(index[date]['mail_id'], self.mail.id)
+        self.assertEqual(index[date]['news'][0]['path'], f'web_news/{self.tinto_block_entry.id}.html')
+
+    def test_snapshot_is_published_on_content_changes(self):
+        """
+        Snapshots are published when the mail is first sent and when its content is edited,
+        not when other dispatch times are marked as sent or nothing rendered changes
+        """
+        with patch.object(snapshots, 'publish_tinto_snapshot') as publish_tinto_snapshot:
+            for save in [
+                self.mail.mark_as_sent,
+                self.mail.mark_as_sent,
+                self.mail.save
+            ]:
+                with self.captureOnCommitCallbacks(execute=True):
+                    save()
+
+            self.assertEqual(publish_tinto_snapshot.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mail.subject = 'Edited subject'
+                self.mail.save()
+
+            self.assertEqual(publish_tinto_snapshot.call_count, 2)
+
+    def test_index_entry_is_updated(self):
+        """
+        Publishing a Tinto updates its index entry and keeps the entries of the other Tintos
+        """
+        previous_mail = DailyMailFactory(dispatch_date=datetime(2025, 2, 4, 6, 0))
+
+        for mail in [previous_mail, self.mail]:
+            with self.captureOnCommitCallbacks(execute=True):
+                mail.mark_as_sent()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mail.dispatch_date = datetime(2025, 2, 6, 6, 0)
+            self.mail.save()
+
+        with get_snapshots_storage().open('index.json') as file:
+            index = json.loads(file.read())
+
+        self.assertEqual(list(index), ['06-02-2025', '04-02-2025'])
+        self.assertEqual(index['06-02-2025']['mail_id'], self.mail.id)
+        self.assertEqual(index['04-02-2025']['mail_id'], previous_mail.id)
+
+
+class TestTintosSnapshotsOnTintoChanges(TransactionTestCase):
+    """Entries are edited in committed transactions, as the admin does."""
+
+    def setUp(self):
+        self.snapshots_location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshots_location)
+
+        settings_override = override_settings(
+            STATIC_SNAPSHOTS_ENABLED=True,
+            STATIC_SNAPSHOTS_LOCATION=self.snapshots_location
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.mail = DailyMailFactory(dispatch_date=datetime(2025, 2, 4, 6, 0))
+        self.tinto_block_entry = TintoBlocksEntriesFactory(tinto=self.mail.tinto, position=0)
+
+        self.mail.mark_as_sent()
+
+    def test_snapshot_is_published_on_tinto_changes(self):
+        """
+        Editing an entry of a sent Tinto publishes its snapshots with the regenerated html
+        """
+        self.tinto_block_entry.tinto_block = TintoBlocksFactory(html='<p>Noticia editada</p>')
+        self.tinto_block_entry.save()
+
+        storage = get_snapshots_storage()
+
+        with storage.open('tintos/04-02-2025.html') as file:
+            self.assertIn('Noticia editada', file.read().decode())
+
+        with storage.open(f'web_news/{self.tinto_block_entry.id}.html') as file:
+            self.assertIn('Noticia editada', file.read().decode())
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner overriding the settings tests must not depend on."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        # Tracking events are inserted synchronously, tests that buffer them use their own EventSink
+        settings.EVENT_SINK_ENABLED = False
@@ -1,6 +1,6 @@
 import factory
 
-from el_tinto.tintos.models import Tinto
+from el_tinto.tintos.models import Tinto, TintoBlocks, TintoBlocksEntries, TintoBlockType
 
 
 class TintoFactory(factory.django.DjangoModelFactory):
@@ -9,3 +9,30 @@ class TintoFactory(factory.django.DjangoModelFactory):
 
     name = factory.Faker('sentence', nb_words=4)
     email_dispatch_date = factory.Faker('future_datetime', end_date='+5m')
+
+
+class TintoBlockTypeFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = TintoBlockType
+        django_get_or_create = ('name',)
+
+    name = 'News'
+    label = 'Noticia'
+
+
+class TintoBlocksFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = TintoBlocks
+
+    title = factory.Faker('sentence', nb_words=4)
+    html = factory.Faker('paragraph')
+    type = factory.SubFactory(TintoBlockTypeFactory)
+
+
+class TintoBlocksEntriesFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = TintoBlocksEntries
+
+    tinto = factory.SubFactory(TintoFactory)
+    tinto_block = factory.SubFactory(TintoBlocksFactory)
+    position = factory.Sequence(lambda n: n % 10)
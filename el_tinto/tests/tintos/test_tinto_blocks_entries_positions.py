@@ -0,0 +1,86 @@
+from mock.mock import patch
+from rest_framework.reverse import reverse
+from rest_framework.status import HTTP_200_OK, HTTP_204_NO_CONTENT
+from rest_framework.test import APITestCase
+
+from el_tinto.mails.models import Mail
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.tintos.factories import TintoFactory, TintoBlocksEntriesFactory
+from el_tinto.utils.tintos import generate_tinto_html, regenerate_tinto_mail_html
+
+
+class TestTintoBlocksEntriesPositions(APITestCase):
+
+    def setUp(self):
+        self.tinto = TintoFactory()
+        self.mail = DailyMailFactory(tinto=self.tinto)
+        self.tinto_blocks_entries = [
+            TintoBlocksEntriesFactory(tinto=self.tinto, position=position) for position in range(5)
+        ]
+
+        self.other_tinto_blocks_entries = [
+            TintoBlocksEntriesFactory(tinto=TintoFactory(), position=position) for position in range(3)
+        ]
+
+    def get_positions(self, tinto_blocks_entries):
+        """
+        Ids of the given entries sorted by their current position
+        """
+        for tinto_block_entry in tinto_blocks_entries:
+            tinto_block_entry.refresh_from_db()
+
+        return [
+            tinto_block_entry.id
+            for tinto_block_entry in sorted(tinto_blocks_entries, key=lambda entry: entry.position)
+        ]
+
+    def test_switch_positions(self):
+        """
+        Moving an entry shifts the entries in between and regenerates the mail html
+        """
+        ids = [tinto_block_entry.id for tinto_block_entry in self.tinto_blocks_entries]
+
+        with patch(
+            'el_tinto.utils.tintos.regenerate_tinto_mail_html', wraps=regenerate_tinto_mail_html
+        ) as regenerate_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('tintos_blocks_entries-switch-positions'),
+                    {'tinto': self.tinto.id, 'old_position': 1, 'new_position': 3}
+                )
+
+        regenerate_mock.assert_called_once_with(self.tinto.id)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(self.get_positions(self.tinto_blocks_entries), [ids[0], ids[2], ids[3], ids[1], ids[4]])
+        self.assertEqual(Mail.objects.get(id=self.mail.id).html, generate_tinto_html(self.tinto))
+
+        response = self.client.post(
+            reverse('tintos_blocks_entries-switch-positions'),
+            {'tinto': self.tinto.id, 'old_position': 4, 'new_position': 0}
+        )
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(self.get_positions(self.tinto_blocks_entries), [ids[4], ids[0], ids[2], ids[3], ids[1]])
+
+    def test_destroy_only_shifts_entries_of_the_same_tinto(self):
+        """
+        Deleting an entry shifts the following entries of its tinto only
+        """
+        ids = [tinto_block_entry.id for tinto_block_entry in self.tinto_blocks_entries]
+        deleted_tinto_block_entry = self.tinto_blocks_entries.pop(2)
+
+        response = self.client.delete(
+            reverse('tintos_blocks_entries-detail', kwargs={'pk': deleted_tinto_block_entry.id})
+        )
+
+        self.assertEqual(response.status_code, HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            [tinto_block_entry.position for tinto_block_entry in self.tinto.tintoblocksentries_set.all()],
+            [0, 1, 2, 3]
+        )
+        self.assertEqual(self.get_positions(self.tinto_blocks_entries), [ids[0], ids[1], ids[3], ids[4]])
+
+        for position, tinto_block_entry in enumerate(self.other_tinto_blocks_entries):
+            tinto_block_entry.refresh_from_db()
+            self.assertEqual(tinto_block_entry.position, position)
@@ -0,0 +1,74 @@
+from rest_framework.reverse import reverse
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from rest_framework.test import APITestCase
+
+from el_tinto.tests.tintos.factories import TintoBlocksFactory
+
+
+class TestTintoBlocksSearch(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('tintos_blocks-search')
+
+        self.title_match = TintoBlocksFactory(
+            title='Elecciones regionales',
+            html='<p>Los resultados de las votaciones en Bogot&aacute;.</p>'
+        )
+        self.content_match = TintoBlocksFactory(
+            title='Resumen de la semana',
+            html='<p>Las <strong>elecciones</strong> dejaron nuevos alcaldes en la regi&oacute;n.</p>'
+        )
+        TintoBlocksFactory(title='Café colombiano', html='<p>Exportaciones récord este año.</p>')
+
+    def test_search_ranked_results(self):
+        """
+        Blocks matching the title rank higher than blocks matching the content only
+        """
+        response = self.client.get(self.url, {'q': 'elección'})
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            [self.title_match.id, self.content_match.id]
+        )
+        self.assertIn('<b>elecciones</b>', response.data['results'][1]['snippet'])
+
+    def test_search_accented_content(self):
+        """
+        Html entities are decoded before indexing the content
+        """
+        response = self.client.get(self.url, {'q': 'región'})
+
+        self.assertEqual([result['id'] for result in response.data['results']], [self.content_match.id])
+
+        # Snippets are built from the same decoded text
+        snippet = response.data['results'][0]['snippet']
+
+        self.assertIn('<b>región</b>', snippet)
+        self.assertNotIn('&oacute;', snippet)
+
+    def test_search_snippet_is_escaped(self):
+        """
+        Text decoded from the html entities is escaped again in the snippet, only the highlight is markup
+        """
+        TintoBlocksFactory(
+            title='Seguridad',
+            html='<p>Los hackers usaron &lt;script&gt;alert(1)&lt;/script&gt; &amp; otros trucos.</p>'
+        )
+
+        response = self.client.get(self.url, {'q': 'hackers'})
+
+        snippet = response.data['results'][0]['snippet']
+
+        self.assertIn('<b>hackers</b>', snippet)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt; &amp; otros', snippet)
+        self.assertNotIn('<script>', snippet)
+
+    def test_search_without_text(self):
+        """
+        Search text is required
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
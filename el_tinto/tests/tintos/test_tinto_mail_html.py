@@ -0,0 +1,109 @@
+from django.test import TestCase
+from mock.mock import patch
+
+from el_tinto.mails.models import Mail
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.tintos.factories import (
+    TintoFactory,
+    TintoBlocksFactory,
+    TintoBlocksEntriesFactory,
+    TintoBlockTypeFactory
+)
+from el_tinto.utils.tintos import (
+    generate_tinto_html,
+    generate_tinto_html_variants,
+    regenerate_tinto_mail_html,
+    FULL_TINTO_HTML,
+    SUNDAY_NO_PRIZE_TINTO_HTML
+)
+from el_tinto.utils.utils import TINTO_BLOCK_TYPE_INTRO_ID, TINTO_BLOCK_TYPE_COLOMBIANISM_ID, TINTO_BLOCK_TYPE_NEWS_ID
+
+
+class TestTintoMailHtml(TestCase):
+
+    def setUp(self):
+        self.tinto = TintoFactory()
+        self.mail = DailyMailFactory(tinto=self.tinto)
+        self.tinto_block = TintoBlocksFactory()
+
+        for position in range(3):
+            TintoBlocksEntriesFactory(tinto=self.tinto, tinto_block=self.tinto_block, position=position)
+
+    def test_mail_html_is_regenerated_once_on_commit(self):
+        """
+        Saving a TintoBlock regenerates the Mail html only once, after the transaction is committed
+        """
+        self.tinto_block.html = '<p>Nuevo contenido</p>'
+
+        with patch(
+            'el_tinto.utils.tintos.regenerate_tinto_mail_html', wraps=regenerate_tinto_mail_html
+        ) as regenerate_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.tinto_block.save()
+
+                self.assertNotIn('Nuevo contenido', Mail.objects.get(id=self.mail.id).html)
+
+        regenerate_mock.assert_called_once_with(self.tinto.id)
+
+        mail_html = Mail.objects.get(id=self.mail.id).html
+        self.assertEqual(mail_html, generate_tinto_html(self.tinto))
+        self.assertEqual(mail_html.count('Nuevo contenido'), 3)
+
+    def test_mail_is_not_written_when_html_is_unchanged(self):
+        """
+        Mail is not updated when the regenerated html has the same content
+        """
+        self.assertTrue(regenerate_tinto_mail_html(self.tinto.id))
+
+        with self.assertNumQueries(2):
+            self.assertFalse(regenerate_tinto_mail_html(self.tinto.id))
+
+    def test_unchanged_entries_are_not_rebuilt(self):
+        """
+        Saving a TintoBlock without changes in its display values skips the entries update and the mail regeneration
+        """
+        self.tinto_block.news_type = None
+
+        with patch(
+            'el_tinto.utils.tintos.regenerate_tinto_mail_html', wraps=regenerate_tinto_mail_html
+        ) as regenerate_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertNumQueries(5):  # savepoint, block update, search vector update, entries select, release
+                    self.tinto_block.save()
+
+        regenerate_mock.assert_not_called()
+
+
+class TestTintoHtmlVariants(TestCase):
+
+    def setUp(self):
+        self.tinto = TintoFactory()
+
+        intro_type = TintoBlockTypeFactory(id=TINTO_BLOCK_TYPE_INTRO_ID, name='Intro', label='Intro')
+        news_type = TintoBlockTypeFactory(id=TINTO_BLOCK_TYPE_NEWS_ID, name='News', label='Noticia')
+        colombianism_type = TintoBlockTypeFactory(
+            id=TINTO_BLOCK_TYPE_COLOMBIANISM_ID, name='Colombianism', label='Colombianismo'
+        )
+
+        self.tinto_blocks_entries = [
+            TintoBlocksEntriesFactory(
+                tinto=self.tinto,
+                tinto_block=TintoBlocksFactory(type=block_type),
+                position=position
+            )
+            for position, block_type in enumerate([intro_type, news_type, news_type, colombianism_type])
+        ]
+
+    def test_generate_tinto_html_variants(self):
+        """
+        Every html variant is generated with a single query
+        """
+        with self.assertNumQueries(1):
+            html_variants = generate_tinto_html_variants(self.tinto)
+
+        intro, first_news, second_news, colombianism = [
+            tinto_block_entry.display_html for tinto_block_entry in self.tinto_blocks_entries
+        ]
+
+        self.assertEqual(html_variants[FULL_TINTO_HTML], intro + first_news + second_news + colombianism)
+        self.assertEqual(html_variants[SUNDAY_NO_PRIZE_TINTO_HTML], intro + colombianism + first_news)
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.status import HTTP_200_OK
+from rest_framework.test import APITestCase
+
+from el_tinto.tests.tintos.factories import TintoFactory, TintoBlocksEntriesFactory
+
+
+class TestTintosListApis(APITestCase):
+
+    def setUp(self):
+        self.tinto = TintoFactory()
+
+        for position in range(3):
+            TintoBlocksEntriesFactory(tinto=self.tinto, position=position)
+
+    def get_queries_count(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        return len(context.captured_queries)
+
+    def test_constant_queries_count(self):
+        """
+        Listings and tinto entries are retrieved with the same number of queries regardless of the rows count
+        """
+        urls = [
+            reverse('tintos-list'),
+            reverse('tintos_blocks-list'),
+            reverse('tintos_blocks_entries-list'),
+            reverse('tintos-get-tinto-blocks-entries', kwargs={'pk': self.tinto.id})
+        ]
+
+        queries_count = [self.get_queries_count(url) for url in urls]
+
+        for position in range(3, 8):
+            TintoBlocksEntriesFactory(tinto=self.tinto, position=position)
+            TintoFactory()
+
+        self.assertEqual([self.get_queries_count(url) for url in urls], queries_count)
+
+    def test_cursor_pagination(self):
+        """
+        Listings are paginated with a cursor
+        """
+        response = self.client.get(reverse('tintos_blocks-list'), {'page_size': 2})
+
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotIn('html', response.data['results'][0])
+
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
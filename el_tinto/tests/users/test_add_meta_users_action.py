@@ -0,0 +1,78 @@
+from django.contrib.auth.models import Group
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.shortcuts import reverse
+from django.test import TestCase
+from rest_framework.status import HTTP_200_OK
+
+from el_tinto.tests.users.factories import EditorFactory, UserFactory
+from el_tinto.users.models import User
+
+
+def get_meta_csv_file(rows):
+    lines = ['email\tfirst_name\tlast_name'] + ['\t'.join(row) for row in rows]
+    content = '\n'.join(lines).encode('utf-16')
+
+    return SimpleUploadedFile('meta_users.csv', content, content_type='text/csv')
+
+
+class TestAddMetaUsersAction(TestCase):
+
+    def setUp(self):
+        self.url = reverse('admin:users_user_changelist')
+
+        self.editor = EditorFactory()
+        self.editor.groups.add(Group.objects.create(name='Founder'))
+        self.client.force_login(self.editor)
+
+    def test_show_form_without_selecting_users(self):
+        """
+        Action form is shown even if no user is selected
+        """
+        response = self.client.post(self.url, {'action': 'add_meta_users', 'index': 0})
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertTemplateUsed(response, 'admin/add_meta_users_form.html')
+
+    def test_add_meta_users(self):
+        """
+        Create new users and activate existing inactive users
+        """
+        inactive_user = UserFactory(is_active=False, first_name='Ana')
+        active_user = UserFactory(referral_code='AKIL89')
+
+        rows = [
+            ('nuevo@testing.com', 'Juan', 'Perez'),
+            ('otro.nuevo@testing.com', 'a' * 30, 'Gomez'),
+            (inactive_user.email, 'Otro', 'Nombre'),
+            (active_user.email, 'Otro', 'Nombre'),
+            ('nuevo@testing.com', 'Juan', 'Perez'),
+        ]
+
+        response = self.client.post(
+            self.url, {'action': 'add_meta_users', 'add': 'add', 'csv_file': get_meta_csv_file(rows)}, follow=True
+        )
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        messages = list(get_messages(response.wsgi_request))
+        self.assertEqual(str(messages[0]), 'Users have been added successfully (2 new users).')
+
+        new_user = User.objects.get(email='nuevo@testing.com')
+        self.assertEqual(new_user.first_name, 'Juan')
+        self.assertEqual(new_user.last_name, 'Perez')
+        self.assertEqual(new_user.utm_source, User.FACEBOOK)
+        self.assertEqual(new_user.medium, 'ads')
+        self.assertEqual(len(new_user.referral_code), 6)
+        self.assertIsNotNone(new_user.uuid)
+
+        other_new_user = User.objects.get(email='otro.nuevo@testing.com')
+        self.assertEqual(other_new_user.first_name, '')
+        self.assertNotEqual(other_new_user.referral_code, new_user.referral_code)
+
+        inactive_user.refresh_from_db()
+        self.assertTrue(inactive_user.is_active)
+        self.assertEqual(inactive_user.first_name, 'Ana')
+
+        active_user.refresh_from_db()
+        self.assertEqual(active_user.referral_code, 'AKIL89')
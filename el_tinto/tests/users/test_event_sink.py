@@ -0,0 +1,195 @@
+from django.test import TestCase, TransactionTestCase
+from mock.mock import patch
+
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.users.models import UserVisits, UserButtonsInteractions
+from el_tinto.utils.events import EventSink, user_visits_sink, user_buttons_interactions_sink
+
+
+class TestEventSink(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory(referral_code='AKIL89')
+        self.user_visit = UserVisits.objects.create(user=self.user, type=UserVisits.REFERRAL_HUB)
+
+        self.visits_sink = EventSink(
+            UserVisits, max_batch_size=3, max_buffer_size=5, flush_interval=None, preallocate_ids=True, enabled=True
+        )
+        self.buttons_sink = EventSink(
+            UserButtonsInteractions,
+            max_batch_size=3,
+            max_buffer_size=5,
+            flush_interval=None,
+            depends_on=[self.visits_sink],
+            enabled=True
+        )
+
+    def tearDown(self):
+        # Rows left in the sinks are not flushed at exit, once the test database is gone
+        self.buttons_sink.close()
+        self.visits_sink.close()
+
+    def test_rows_are_buffered_until_flush(self):
+        """
+        Rows are not inserted until the sink is flushed
+        """
+        self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+        self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.WHATSAPP)
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 0)
+
+        self.buttons_sink.flush()
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 2)
+
+    def test_flush_when_batch_size_is_reached(self):
+        """
+        Buffer is flushed as soon as it reaches max_batch_size
+        """
+        for _ in range(3):
+            self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 3)
+
+    def test_synchronous_fallback_when_buffer_is_full(self):
+        """
+        Rows are inserted right away when the buffer is full
+        """
+        self.buttons_sink.max_batch_size = 10
+
+        for _ in range(5):
+            self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 0)
+
+        button_interaction = self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 1)
+        self.assertTrue(UserButtonsInteractions.objects.filter(id=button_interaction.id).exists())
+
+    def test_preallocated_ids(self):
+        """
+        Buffered visits get their id before being inserted, reserved in blocks and kept after the flush
+        """
+        user_visits = [self.visits_sink.add(user=self.user, type=UserVisits.SUBSCRIBE_PAGE) for _ in range(2)]
+
+        self.assertEqual(user_visits[1].id, user_visits[0].id + 1)
+        self.assertTrue(self.visits_sink.is_reserved(user_visits[1].id))
+        self.assertFalse(UserVisits.objects.filter(id=user_visits[0].id).exists())
+
+        self.visits_sink.flush()
+
+        self.assertEqual(UserVisits.objects.filter(id__in=[visit.id for visit in user_visits]).count(), 2)
+
+    def test_dependencies_are_flushed_first(self):
+        """
+        Buffered visits are inserted before the buttons interactions that reference them
+        """
+        user_visit = self.visits_sink.add(user=self.user, type=UserVisits.REFERRAL_HUB)
+        self.buttons_sink.add(visit_id=user_visit.id, type=UserButtonsInteractions.TWITTER)
+
+        self.buttons_sink.flush()
+
+        self.assertEqual(UserButtonsInteractions.objects.filter(visit_id=user_visit.id).count(), 1)
+
+    def test_close(self):
+        """
+        Closing the sink inserts the buffered rows
+        """
+        self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+
+        self.buttons_sink.close()
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 1)
+
+
+class TestEventSinkForeignKeys(TransactionTestCase):
+    """Foreign keys are checked when the flush is committed, rows are inserted outside a test transaction."""
+
+    def setUp(self):
+        self.user = UserFactory(referral_code='AKIL89')
+        self.user_visit = UserVisits.objects.create(user=self.user, type=UserVisits.REFERRAL_HUB)
+
+        self.other_process_visits_sink = EventSink(UserVisits, flush_interval=None, preallocate_ids=True, enabled=True)
+        self.buttons_sink = EventSink(UserButtonsInteractions, flush_interval=None, enabled=True)
+
+    def tearDown(self):
+        self.buttons_sink.close()
+        self.other_process_visits_sink.close()
+
+    def test_rows_referencing_unflushed_rows_are_retried(self):
+        """
+        Rows whose reference is still buffered elsewhere are inserted on the next flush
+        """
+        user_visit = self.other_process_visits_sink.add(user=self.user, type=UserVisits.REFERRAL_HUB)
+        self.buttons_sink.add(visit_id=user_visit.id, type=UserButtonsInteractions.TWITTER)
+        self.buttons_sink.add(visit=self.user_visit, type=UserButtonsInteractions.TWITTER)
+
+        self.buttons_sink.flush()
+
+        self.assertEqual(UserButtonsInteractions.objects.count(), 1)
+
+        self.other_process_visits_sink.flush()
+        self.buttons_sink.flush()
+
+        self.assertEqual(UserButtonsInteractions.objects.filter(visit_id=user_visit.id).count(), 1)
+
+
+class TestUserVisitsView(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory(referral_code='AKIL89')
+        self.url = '/users/user_visits/'
+
+    def test_referral_hub_visit_redirect(self):
+        """
+        Visit id in the redirect url corresponds to the created visit
+        """
+        response = self.client.get(self.url, {'user': self.user.uuid, 'type': UserVisits.REFERRAL_HUB})
+
+        user_visit = UserVisits.objects.get(user=self.user)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.endswith(f'user={self.user.uuid}&user_visit={user_visit.id}'))
+
+    def test_button_interaction(self):
+        """
+        Register a button interaction for an existing visit
+        """
+        user_visit = UserVisits.objects.create(user=self.user, type=UserVisits.REFERRAL_HUB)
+
+        response = self.client.post(
+            '/users/user_button_interaction/', {'visit': user_visit.id, 'type': UserButtonsInteractions.WHATSAPP}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UserButtonsInteractions.objects.filter(visit=user_visit).exists())
+
+        response = self.client.post(
+            '/users/user_button_interaction/', {'visit': user_visit.id + 1, 'type': UserButtonsInteractions.WHATSAPP}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_buffered_visit_redirect(self):
+        """
+        Visit id in the redirect url is reserved before the visit is inserted, its buttons interactions are accepted
+        """
+        with patch.multiple(user_visits_sink, _enabled=True, flush_interval=None), \
+                patch.multiple(user_buttons_interactions_sink, _enabled=True, flush_interval=None):
+            response = self.client.get(self.url, {'user': self.user.uuid, 'type': UserVisits.REFERRAL_HUB})
+
+            user_visit_id = int(response.url.split('user_visit=')[1])
+
+            self.assertEqual(response.status_code, 302)
+            self.assertFalse(UserVisits.objects.filter(id=user_visit_id).exists())
+
+            response = self.client.post(
+                '/users/user_button_interaction/', {'visit': user_visit_id, 'type': UserButtonsInteractions.WHATSAPP}
+            )
+
+            self.assertEqual(response.status_code, 201)
+
+            user_buttons_interactions_sink.flush()
+
+        self.assertTrue(UserButtonsInteractions.objects.filter(visit_id=user_visit_id, visit__user=self.user).exists())
@@ -12,6 +12,7 @@ from el_tinto.tests.stripe.factories import StripePaymentFactory
 from el_tinto.tests.users.factories import UserFactory, UserTierFactory
 from el_tinto.users.models import UserTier, User
 from el_tinto.utils.date_time import get_string_date
+from el_tinto.utils.send_mail import send_outbox_mails
 from el_tinto.utils.utils import UTILITY_MAILS, ONBOARDING_EMAIL_NAME, TASTE_CLUB_TIER_TINTO_INVITATION_MAIL, \
     TASTE_CLUB_TIER_EXPORTATION_COFFEE_INVITATION_MAIL, replace_words_in_sentence, \
     TASTE_CLUB_BENEFICIARY_CANCELATION_MAIL, TASTE_CLUB_OWNER_CANCELATION_MAIL
@@ -123,6 +124,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.assertEqual(data['dispatch_time'], self.user.dispatch_time)
         self.assertEqual(data['timezone'], self.user.tzinfo)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         sent_mail = mail.outbox[0]
 
@@ -168,6 +170,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.assertEqual(data['dispatch_time'], self.user.dispatch_time)
         self.assertEqual(data['timezone'], self.user.tzinfo)
 
+        self.assertEqual(send_outbox_mails(), 2)
         self.assertEqual(len(mail.outbox), 2)
         welcome_mail = mail.outbox[0]
         confirmation_mail = mail.outbox[1]
@@ -229,6 +232,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.assertEqual(data['dispatch_time'], self.user.dispatch_time)
         self.assertEqual(data['timezone'], self.user.tzinfo)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         confirmation_mail = mail.outbox[0]
 
@@ -273,6 +277,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.assertEqual(data['dispatch_time'], self.user.dispatch_time)
         self.assertEqual(data['timezone'], self.user.tzinfo)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         confirmation_mail = mail.outbox[0]
 
@@ -328,6 +333,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.assertEqual(data['dispatch_time'], self.user.dispatch_time)
         self.assertEqual(data['timezone'], self.user.tzinfo)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         confirmation_mail = mail.outbox[0]
 
@@ -398,6 +404,7 @@ class TestMyTasteClubActionsView(APITestCase):
         self.user_tier.refresh_from_db()
         self.assertFalse(self.user_tier.will_renew)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         confirmation_mail = mail.outbox[0]
 
@@ -0,0 +1,39 @@
+from django.test import TestCase
+
+from el_tinto.tests.users.factories import UserFactory
+from el_tinto.users.models import User
+
+
+class TestPreferredEmailDaysMask(TestCase):
+
+    def test_mask_is_synced_on_save(self):
+        """
+        The mask mirrors the preferred email days, 0 meaning every day
+        """
+        user = UserFactory(preferred_email_days=[0, 2, 6])
+
+        self.assertEqual(User.objects.get(id=user.id).preferred_email_days_mask, 0b1000101)
+
+        user.preferred_email_days = [1]
+        user.save(update_fields=['preferred_email_days'])
+
+        self.assertEqual(User.objects.get(id=user.id).preferred_email_days_mask, 0b10)
+
+        user.preferred_email_days = []
+        user.save()
+
+        self.assertEqual(User.objects.get(id=user.id).preferred_email_days_mask, 0)
+
+    def test_week_day_masks(self):
+        """
+        Users who prefer the week day or every day match its masks
+        """
+        monday_user = UserFactory(preferred_email_days=[0, 4])
+        every_day_user = UserFactory(preferred_email_days=[])
+        UserFactory(preferred_email_days=[1, 2])
+
+        self.assertCountEqual(
+            User.objects.filter(preferred_email_days_mask__in=User.get_week_day_masks(0)),
+            [monday_user, every_day_user]
+        )
+        self.assertEqual(len(User.get_week_day_masks(0)), 65)
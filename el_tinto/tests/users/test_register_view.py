@@ -6,6 +6,7 @@ from rest_framework.test import APITestCase
 from el_tinto.mails.models import Mail
 from el_tinto.tests.users.factories import UserFactory
 from el_tinto.users.models import User
+from el_tinto.utils.send_mail import send_outbox_mails
 from el_tinto.utils.utils import UTILITY_MAILS, ONBOARDING_EMAIL_NAME
 
 
@@ -34,6 +35,7 @@ class TestRegisterView(APITestCase):
         self.assertEqual(data['email_provider'], 'testing')
         self.assertIsNone(data['email_provider_link'])
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, self.welcome_mail.subject)
 
@@ -53,6 +55,7 @@ class TestRegisterView(APITestCase):
         response = self.client.post(self.url, self.payload, format='json')
         self.assertEqual(response.status_code, HTTP_201_CREATED)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, self.welcome_mail.subject)
 
@@ -76,6 +79,7 @@ class TestRegisterView(APITestCase):
 
         self.assertEqual(response.status_code, HTTP_201_CREATED)
 
+        self.assertEqual(send_outbox_mails(), 1)
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, self.welcome_mail.subject)
 
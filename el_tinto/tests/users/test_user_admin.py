@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import Group
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.status import HTTP_200_OK
+
+from el_tinto.tests.mails.factories import DailyMailFactory
+from el_tinto.tests.users.factories import EditorFactory, UserFactory, UserTierFactory
+from el_tinto.mails.models import SentEmails
+from el_tinto.users.models import User
+
+
+class TestUserAdmin(TestCase):
+
+    def setUp(self):
+        self.url = reverse('admin:users_user_changelist')
+        self.user_admin = site._registry[User]
+
+        self.editor = EditorFactory()
+        self.editor.groups.add(Group.objects.create(name='Founder'))
+        self.client.force_login(self.editor)
+
+        self.mail = DailyMailFactory()
+
+    def _create_referral_users(self, referral_user, size):
+        for user in UserFactory.create_batch(size=size, referred_by=referral_user):
+            SentEmails.objects.create(mail=self.mail, user=user, opened_date=datetime.now())
+
+    def test_annotations_match_user_properties(self):
+        """
+        Changelist annotations have the same values as the User properties
+        """
+        user = UserFactory()
+        self._create_referral_users(user, 3)
+        UserFactory(referred_by=user)  # Has not opened any mail
+
+        SentEmails.objects.create(mail=self.mail, user=user, opened_date=datetime.now())
+        SentEmails.objects.create(mail=DailyMailFactory(), user=user)
+        UserTierFactory(user=user)
+
+        prize_user = UserFactory(sunday_mails_prize_end_date=datetime.now() + timedelta(days=2))
+
+        queryset = self.user_admin.get_queryset(None)
+
+        for instance in queryset.filter(id__in=[user.id, prize_user.id, self.editor.id]):
+            self.assertEqual(self.user_admin.referred_users_count_display(instance), instance.referred_users_count)
+            self.assertEqual(self.user_admin.open_rate_display(instance), instance.open_rate)
+            self.assertEqual(
+                self.user_admin.has_sunday_mails_prize_display(instance), instance.has_sunday_mails_prize
+            )
+
+    def test_changelist_queries_do_not_grow_with_users(self):
+        """
+        Changelist runs the same number of queries regardless of the amount of users
+        """
+        self._create_referral_users(UserFactory(), 2)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        queries_count = len(context.captured_queries)
+
+        for user in UserFactory.create_batch(size=5):
+            self._create_referral_users(user, 2)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'o': '4'})
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), queries_count)
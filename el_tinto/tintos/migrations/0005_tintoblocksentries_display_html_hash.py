@@ -0,0 +1,18 @@
+# Generated by Django 4.1.10 on 2026-10-19 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tintos', '0004_alter_tintoblocks_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tintoblocksentries',
+            name='display_html_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
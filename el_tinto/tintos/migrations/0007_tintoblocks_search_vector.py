@@ -0,0 +1,42 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:02
+
+from html import unescape
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+from django.utils.html import strip_tags
+
+
+def populate_search_vector(apps, schema_editor):
+    TintoBlocks = apps.get_model('tintos', 'TintoBlocks')
+
+    for tinto_block in TintoBlocks.objects.only('id', 'title', 'html').iterator():
+        TintoBlocks.objects.filter(id=tinto_block.id).update(
+            search_vector=(
+                SearchVector(Value(tinto_block.title), weight='A', config='spanish') +
+                SearchVector(Value(unescape(strip_tags(tinto_block.html))), weight='B', config='spanish')
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tintos', '0006_tintoblocksentries_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tintoblocks',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tintoblocks',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tintos_blocks_search_vector'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.1.10 on 2026-10-19 18:02
+
+from html import unescape
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+def populate_search_text(apps, schema_editor):
+    TintoBlocks = apps.get_model('tintos', 'TintoBlocks')
+
+    for tinto_block in TintoBlocks.objects.only('id', 'html').iterator():
+        TintoBlocks.objects.filter(id=tinto_block.id).update(search_text=unescape(strip_tags(tinto_block.html)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tintos', '0007_tintoblocks_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tintoblocks',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,12 @@
-from django.db import models
+import hashlib
+from html import unescape
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
 from django.core.validators import MaxValueValidator
-from django.db.models import Deferrable
+from django.db.models import Deferrable, Value
+from django.utils.html import strip_tags
 from django.utils.text import slugify
 
 from tinymce.models import HTMLField
@@ -17,24 +23,64 @@ class TintoBlocks(models.Model):
     news_type = models.ForeignKey('NewsType', on_delete=models.SET_NULL, default=None, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     title_slug = models.CharField(max_length=256, default='', blank=True)
+    # Html content without tags nor entities, indexed by the search vector and used by the search snippets
+    search_text = models.TextField(default='', editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Full text search configuration
+    SEARCH_CONFIG = 'spanish'
 
     def __str__(self):
         return f'{self.created_at.date()} - {self.type} - {self.title}'
 
+    def get_search_text(self):
+        """
+        Html content without tags and with the html entities decoded
+
+        :return:
+        search_text: str
+        """
+        return unescape(strip_tags(self.html))
+
+    def get_search_vector(self):
+        """
+        Search vector over the title and the search text
+
+        :return:
+        search_vector: SearchVector
+        """
+        return (
+            SearchVector(Value(self.title), weight='A', config=self.SEARCH_CONFIG) +
+            SearchVector(Value(self.search_text), weight='B', config=self.SEARCH_CONFIG)
+        )
+
     def save(self, *args, **kwargs):
         if not self.title_slug:
             self.title_slug = slugify(self.title)
 
-        super(TintoBlocks, self).save(*args, **kwargs)
+        self.search_text = self.get_search_text()
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_text'}
 
-        # Update TintoBlockEntries related
-        for tinto_block_entry in self.tintoblocksentries_set.all():
-            tinto_block_entry.save()
+        # Mail html of the related Tintos is regenerated once, on commit
+        with transaction.atomic():
+            super(TintoBlocks, self).save(*args, **kwargs)
+
+            TintoBlocks.objects.filter(id=self.id).update(search_vector=self.get_search_vector())
+
+            # Update TintoBlockEntries related, entries whose display html does not change are not saved
+            for tinto_block_entry in self.tintoblocksentries_set.all():
+                if tinto_block_entry.update_display_html():
+                    tinto_block_entry.save(update_fields=['display_html', 'display_html_hash', 'updated_at'])
 
     class Meta:
         verbose_name = "Bloque de Tinto"
         verbose_name_plural = "Bloques de Tinto"
         ordering = ('-created_at', 'type', 'news_type', 'title')
+        indexes = (
+            GinIndex(fields=['search_vector'], name='tintos_blocks_search_vector'),
+        )
 
 
 class Tinto(models.Model):
@@ -64,12 +110,14 @@ class TintoBlocksEntries(models.Model):
     tinto = models.ForeignKey('tintos.Tinto', on_delete=models.CASCADE)
     tinto_block = models.ForeignKey('tintos.TintoBlocks', on_delete=models.CASCADE)
     display_html = HTMLField(default='', blank=True, null=True)
+    display_html_hash = models.CharField(max_length=32, default='', blank=True, editable=False)
     position = models.PositiveSmallIntegerField(validators=[MaxValueValidator(10)])
     show_share_buttons = models.BooleanField(default=False)
     show_rate_buttons = models.BooleanField(default=False)
     show_reading_time = models.BooleanField(default=False)
     like = models.BooleanField(null=True, blank=True)
     break_line = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.tinto} - {self.position} - {self.tinto_block}"
@@ -95,9 +143,45 @@ class TintoBlocksEntries(models.Model):
 
         self.display_html = html
 
+    def get_display_html_hash(self):
+        """
+        Hash of the values the display html is built from
+
+        :return:
+        display_html_hash: str
+        """
+        display_html_values = (
+            self.id if self.show_share_buttons else None,  # Only used by the share buttons
+            self.tinto_block.html,
+            self.tinto_block.title,
+            self.tinto_block.title_slug,
+            self.tinto_block.type.name,
+            self.show_share_buttons,
+            self.break_line
+        )
+
+        return hashlib.md5(repr(display_html_values).encode()).hexdigest()
+
+    def update_display_html(self):
+        """
+        Rebuild the display html only if the values it is built from have changed
+
+        :return:
+        updated: bool
+        """
+        display_html_hash = self.get_display_html_hash()
+
+        if self.display_html and display_html_hash == self.display_html_hash:
+            return False
+
+        self.create_tinto_block_entry_html_extra_features()
+        self.display_html_hash = display_html_hash
+
+        return True
+
     def save(self, *args, **kwargs):
         # Add extra features to display html
-        self.create_tinto_block_entry_html_extra_features()
+        self.update_display_html()
         super(TintoBlocksEntries, self).save(*args, **kwargs)
 
     class Meta:
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TintosCursorPagination(CursorPagination):
+    """Tintos cursor pagination, latest dispatch date first."""
+    ordering = ('-email_dispatch_date', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TintoBlocksCursorPagination(CursorPagination):
+    """TintoBlocks cursor pagination, latest blocks first."""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TintoBlocksSearchPagination(PageNumberPagination):
+    """TintoBlocks search pagination, results are sorted by rank so a cursor can not be used."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TintoBlocksEntriesCursorPagination(CursorPagination):
+    """TintoBlocksEntries cursor pagination, latest entries first."""
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -15,6 +15,26 @@ class TintoBlocksSerializer(serializers.ModelSerializer):
         exclude = ['created_at']
 
 
+class TintoBlocksListSerializer(serializers.ModelSerializer):
+    """TintoBlocks listing serializer, without html."""
+    type = TintoBlockTypeSerializer(read_only=True)
+    news_type = NewsTypeSerializer(read_only=True)
+
+    class Meta:
+        model = TintoBlocks
+        fields = ['id', 'title', 'title_slug', 'type', 'news_type', 'created_at']
+        read_only_fields = fields
+
+
+class TintoBlocksSearchSerializer(TintoBlocksListSerializer):
+    """TintoBlocks search results serializer."""
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(TintoBlocksListSerializer.Meta):
+        fields = TintoBlocksListSerializer.Meta.fields + ['rank', 'snippet']
+
+
 class PatchTintoBlockSerializer(serializers.ModelSerializer):
     """Patch TintoBlocks serializer."""
 
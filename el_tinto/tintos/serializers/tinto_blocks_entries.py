@@ -11,6 +11,25 @@ class TintoBlocksEntriesSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class TintoBlocksEntriesListSerializer(serializers.ModelSerializer):
+    """TintoBlocksEntries listing serializer, without display html."""
+    class Meta:
+        model = TintoBlocksEntries
+        fields = [
+            'id',
+            'tinto',
+            'tinto_block',
+            'position',
+            'show_share_buttons',
+            'show_rate_buttons',
+            'show_reading_time',
+            'like',
+            'break_line',
+            'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class RetrieveTintoBlockEntry(serializers.ModelSerializer):
     """Retrieve TintoBlocksEntries serializer."""
     tinto_block = TintoBlocksSerializer()
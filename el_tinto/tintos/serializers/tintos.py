@@ -8,3 +8,11 @@ class TintoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tinto
         fields = '__all__'
+
+
+class TintoListSerializer(serializers.ModelSerializer):
+    """Tinto listing serializer, without html nor blocks."""
+    class Meta:
+        model = Tinto
+        fields = ['id', 'name', 'email_dispatch_date', 'created_at']
+        read_only_fields = fields
@@ -1,27 +1,40 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
 from django.db import transaction
-from django.template import loader
-from django.utils.safestring import mark_safe
+from django.db.models import F
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from el_tinto.mails.models import Mail
 from el_tinto.mails.serializers import MailsSerializer
 from el_tinto.tintos.models import TintoBlocks, Tinto, TintoBlocksEntries, NewsType, TintoBlockType
-from el_tinto.tintos.serializers.tintos import TintoSerializer
+from el_tinto.tintos.pagination import (
+    TintosCursorPagination,
+    TintoBlocksCursorPagination,
+    TintoBlocksSearchPagination,
+    TintoBlocksEntriesCursorPagination
+)
+from el_tinto.tintos.serializers.tintos import TintoSerializer, TintoListSerializer
 from el_tinto.tintos.serializers.tinto_blocks import (
     TintoBlocksSerializer,
+    TintoBlocksListSerializer,
+    TintoBlocksSearchSerializer,
     CreateTintoBlocksSerializer,
     PatchTintoBlockSerializer
 )
 from el_tinto.tintos.serializers.tinto_blocks_entries import (
     TintoBlocksEntriesSerializer,
+    TintoBlocksEntriesListSerializer,
     RetrieveTintoBlockEntry,
     SwitchPositionsTintoBlocksEntries
 )
 from el_tinto.tintos.serializers.tinto_block_entry_types import TintoBlockTypeSerializer
 from el_tinto.tintos.serializers.news_types import NewsTypeSerializer
-from el_tinto.utils.date_time import get_string_date
+from el_tinto.utils.rendered_pages import get_rendered_page_response, get_rendered_page_version
+from el_tinto.utils.snapshots import render_web_news_page
+from el_tinto.utils.tintos import mark_tinto_dirty, move_tinto_block_entry, shift_tinto_blocks_entries_positions
+from el_tinto.utils.utils import escape_html_expression
 
 
 class TintoViewSet(
@@ -35,11 +48,31 @@ class TintoViewSet(
     queryset = Tinto.objects.all()
     permission_classes = []
     serializer_class = TintoSerializer
+    pagination_class = TintosCursorPagination
+
+    def get_queryset(self):
+        """Prefetch the blocks ids, only serialized out of listings."""
+        queryset = super().get_queryset()
+
+        if self.action == 'list':
+            return queryset
+
+        return queryset.prefetch_related('blocks')
+
+    def get_serializer_class(self):
+        """Return specific serializer class depending on the performed action."""
+        if self.action == 'list':
+            return TintoListSerializer
+        else:
+            return TintoSerializer
 
     @action(detail=True, methods=['GET'], url_path='blocks-entries')
     def get_tinto_blocks_entries(self, request, pk=None):
         tinto = self.get_object()
-        tinto_blocks_entries = tinto.tintoblocksentries_set.all()
+        tinto_blocks_entries = tinto.tintoblocksentries_set.select_related(
+            'tinto_block__type',
+            'tinto_block__news_type'
+        )
 
         serializer = RetrieveTintoBlockEntry(tinto_blocks_entries, many=True)
         return Response(serializer.data)
@@ -64,9 +97,10 @@ class TintoBlocksViewSet(
     viewsets.GenericViewSet,
 ):
     """TintoBlocks viewset."""
-    queryset = TintoBlocks.objects.all()
+    queryset = TintoBlocks.objects.select_related('type', 'news_type')
     permission_classes = []
     serializer_class = TintoBlocksSerializer
+    pagination_class = TintoBlocksCursorPagination
 
     def get_serializer_class(self):
         """Return specific serializer class depending on the performed action."""
@@ -74,6 +108,10 @@ class TintoBlocksViewSet(
             return CreateTintoBlocksSerializer
         elif self.action == 'partial_update':
             return PatchTintoBlockSerializer
+        elif self.action == 'list':
+            return TintoBlocksListSerializer
+        elif self.action == 'search':
+            return TintoBlocksSearchSerializer
         else:
             return TintoBlocksSerializer
 
@@ -88,6 +126,32 @@ class TintoBlocksViewSet(
             position=tinto_blocks_entries_count,
         )
 
+    @action(detail=False, methods=['GET'])
+    def search(self, request):
+        """
+        Full text search over the blocks title and content.
+        Results are sorted by rank and come with a snippet of the matching content.
+        """
+        search_text = request.GET.get('q', '').strip()
+
+        if not search_text:
+            raise ValidationError({'q': 'Search text is required'})
+
+        query = SearchQuery(search_text, config=TintoBlocks.SEARCH_CONFIG, search_type='websearch')
+        tinto_blocks = self.get_queryset().filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            # The plain text is escaped, the snippet is html with the matches highlighted
+            snippet=SearchHeadline(
+                escape_html_expression(F('search_text')), query, config=TintoBlocks.SEARCH_CONFIG, max_fragments=2
+            )
+        ).order_by('-rank', '-id')
+
+        paginator = TintoBlocksSearchPagination()
+        page = paginator.paginate_queryset(tinto_blocks, request, view=self)
+
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 
 class TintoBlocksEntriesViewSet(
     mixins.CreateModelMixin,
@@ -101,15 +165,31 @@ class TintoBlocksEntriesViewSet(
     queryset = TintoBlocksEntries.objects.all()
     permission_classes = []
     serializer_class = TintoBlocksEntriesSerializer
+    pagination_class = TintoBlocksEntriesCursorPagination
+
+    def get_queryset(self):
+        """Select the block, used to rebuild the display html on updates and deletions."""
+        queryset = super().get_queryset()
+
+        if self.action == 'list':
+            return queryset
+
+        return queryset.select_related('tinto_block__type')
+
+    def get_serializer_class(self):
+        """Return specific serializer class depending on the performed action."""
+        if self.action == 'list':
+            return TintoBlocksEntriesListSerializer
+        else:
+            return TintoBlocksEntriesSerializer
 
     def perform_destroy(self, instance):
-        deleted_position = instance.position
-        instance.tinto_block.delete()
-        instance.delete()
+        with transaction.atomic():
+            instance.tinto_block.delete()
+            instance.delete()
 
-        for tinto_block_entry in TintoBlocksEntries.objects.filter(position__gt=deleted_position):
-            tinto_block_entry.position -= 1
-            tinto_block_entry.save()
+            shift_tinto_blocks_entries_positions(instance.tinto_id, -1, instance.position + 1)
+            mark_tinto_dirty(instance.tinto_id)
 
     @action(detail=False, methods=['POST'], url_path='switch-positions')
     def switch_positions(self, request):
@@ -120,24 +200,7 @@ class TintoBlocksEntriesViewSet(
             new_position = serializer.validated_data['new_position']
 
             changing_tinto_block_entry = tinto.tintoblocksentries_set.get(position=old_position)
-
-            with transaction.atomic():
-                if new_position > old_position:
-                    for tinto_block_entry in tinto.tintoblocksentries_set.filter(
-                            position__range=[old_position+1, new_position]
-                    ):
-                        tinto_block_entry.position -= 1
-                        tinto_block_entry.save()
-
-                else:
-                    for tinto_block_entry in tinto.tintoblocksentries_set.filter(
-                            position__range=[new_position, old_position-1]
-                    ):
-                        tinto_block_entry.position += 1
-                        tinto_block_entry.save()
-
-                changing_tinto_block_entry.position = new_position
-                changing_tinto_block_entry.save()
+            move_tinto_block_entry(changing_tinto_block_entry, new_position)
 
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -147,7 +210,7 @@ class TintoBlocksEntriesViewSet(
     @action(detail=True, methods=["GET"])
     def get_web_news(self, request, pk=None):
         try:
-            tinto_block_entry = TintoBlocksEntries.objects.get(
+            tinto_block_entry = TintoBlocksEntries.objects.select_related('tinto__mail').get(
                 id=pk,
                 tinto__mail__type=Mail.DAILY
             )
@@ -155,16 +218,14 @@ class TintoBlocksEntriesViewSet(
         except TintoBlocksEntries.DoesNotExist:
             return Response(data={}, status=status.HTTP_404_NOT_FOUND)
 
-        template = loader.get_template('../templates/web_news.html')
+        mail = tinto_block_entry.tinto.mail
 
-        mail_data = {
-            "html": mark_safe(tinto_block_entry.display_html),
-            'date': get_string_date(tinto_block_entry.tinto.mail.dispatch_date.date())
-        }
-
-        html = template.render(mail_data)
-
-        return Response(data={"html": html}, status=status.HTTP_200_OK)
+        return get_rendered_page_response(
+            request,
+            f'web_news:{tinto_block_entry.id}',
+            get_rendered_page_version(tinto_block_entry.updated_at, mail.updated_at),
+            lambda: render_web_news_page(tinto_block_entry, mail)
+        )
 
 
 class TintoBlockTypeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
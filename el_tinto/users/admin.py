@@ -1,11 +1,16 @@
 from django.contrib import admin
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
 from django.contrib.auth.models import Group
+from django.db.models import BooleanField, Case, Count, Exists, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.http import HttpResponseRedirect
+from django.utils import timezone
 from rest_framework.authtoken.models import TokenProxy
 from django.contrib.auth.admin import UserAdmin
 
+from el_tinto.mails.models import SentEmails
 from el_tinto.users.admin_actions.add_meta_users import add_meta_users
-from el_tinto.users.models import User
+from el_tinto.users.models import User, UserTier
 
 
 @admin.register(User)
@@ -16,8 +21,8 @@ class UserAdmin(UserAdmin):
     actions = [add_meta_users]
 
     list_display = (
-        'email', 'first_name', 'last_name', 'referred_users_count',
-        'open_rate', 'has_sunday_mails_prize', 'is_active', 'recency'
+        'email', 'first_name', 'last_name', 'referred_users_count_display',
+        'open_rate_display', 'has_sunday_mails_prize_display', 'is_active', 'recency_display'
     )
 
     fieldsets = (
@@ -31,6 +36,59 @@ class UserAdmin(UserAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Annotate the values shown in the changelist so they are computed in
+        the same query instead of one query per user and column.
+        """
+        qs = super(UserAdmin, self).get_queryset(request)
+
+        def count_subquery(queryset, group_by):
+            return Coalesce(
+                Subquery(queryset.order_by().values(group_by).annotate(count=Count('id', distinct=True))
+                         .values('count')),
+                0
+            )
+
+        # Referred users who have opened at least one email
+        referred_users_count = count_subquery(
+            User.objects.filter(referred_by=OuterRef('pk'), sentemails__opened_date__isnull=False),
+            'referred_by'
+        )
+        sent_mails_count = count_subquery(SentEmails.objects.filter(user=OuterRef('pk')), 'user')
+        opened_mails_count = count_subquery(
+            SentEmails.objects.filter(user=OuterRef('pk'), opened_date__isnull=False), 'user'
+        )
+        has_active_tier = Exists(UserTier.objects.filter(user=OuterRef('pk'), valid_to__gte=timezone.localdate()))
+
+        return qs.annotate(
+            referred_users_count_annotation=referred_users_count,
+            open_rate_annotation=(
+                Cast(opened_mails_count, FloatField()) / Greatest(sent_mails_count, Value(1), output_field=FloatField())
+            ),
+            has_sunday_mails_prize_annotation=Case(
+                When(Q(has_active_tier) | Q(sunday_mails_prize_end_date__gte=timezone.now()), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        )
+
+    @admin.display(description='referred users count', ordering='referred_users_count_annotation')
+    def referred_users_count_display(self, obj):
+        return obj.referred_users_count_annotation
+
+    @admin.display(description='open rate', ordering='open_rate_annotation')
+    def open_rate_display(self, obj):
+        return obj.open_rate_annotation
+
+    @admin.display(description='has sunday mails prize', ordering='has_sunday_mails_prize_annotation', boolean=True)
+    def has_sunday_mails_prize_display(self, obj):
+        return obj.has_sunday_mails_prize_annotation
+
+    @admin.display(description='recency', ordering='-date_joined')
+    def recency_display(self, obj):
+        return obj.recency
+
     def get_model_perms(self, request):
         """
         Return empty perms dict thus hiding the model from admin index.
@@ -43,16 +101,18 @@ class UserAdmin(UserAdmin):
     def changelist_view(self, request, extra_context=None):
         """
         Change list view to allow run action when no user is selected for
-        specific actions.
+        specific actions. The action receives the whole (lazy) queryset
+        instead of every user id.
         """
         if 'action' in request.POST and request.POST['action'] == 'add_meta_users':
             if not request.POST.getlist(ACTION_CHECKBOX_NAME):
                 post = request.POST.copy()
+                post['select_across'] = '1'
+                request._set_post(post)
 
-                for user in User.objects.all():
-                    post.update({ACTION_CHECKBOX_NAME: str(user.id)})
+                response = self.response_action(request, queryset=self.get_queryset(request))
 
-                request._set_post(post)
+                return response or HttpResponseRedirect(request.get_full_path())
 
         return super(UserAdmin, self).changelist_view(request, extra_context)
 
@@ -1,5 +1,3 @@
-import csv
-import io
 import os
 
 from django.contrib import admin, messages
@@ -7,8 +5,9 @@ from django.forms import forms
 from django.shortcuts import render
 
 from el_tinto.mails.models import Mail
-from el_tinto.users.models import User
-from el_tinto.utils.users import create_user_referral_code
+from el_tinto.utils.scheduler import get_scheduler
+from el_tinto.utils.send_mail import queue_mail_to_users
+from el_tinto.utils.users import import_meta_users
 from el_tinto.utils.utils import UTILITY_MAILS, ONBOARDING_EMAIL_NAME
 
 
@@ -20,6 +19,8 @@ class SendMessageForm(forms.Form):
 def add_meta_users(_, request, queryset):
     """
     Add users from Meta csv file.
+    The file is imported in batches and the onboarding mails are queued
+    to be sent in the background.
 
     :params:
     request: Request object
@@ -34,40 +35,12 @@ def add_meta_users(_, request, queryset):
         messages.error(request, 'Form is not valid.')
         return
 
-    csv_file = request.FILES['csv_file']
+    created_users_ids = import_meta_users(request.FILES['csv_file'])
 
-    # Read csv file InMemoryUploadedFile
-    file = csv_file.read().decode('utf-16')
-    reader = csv.DictReader(io.StringIO(file), delimiter="\t")
+    if os.getenv('DJANGO_CONFIGURATION') == 'Production':
+        mail_scheduler = get_scheduler()
 
-    for line in reader:
-        try:
-            user = User.objects.get(email=line['email'])
+        onboarding_mail_instance = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
+        queue_mail_to_users(onboarding_mail_instance, created_users_ids, mail_scheduler)
 
-            # Activate users
-            if not user.is_active:
-                user.is_active = True
-                user.save()
-
-        # Create new user in case it doesn't exist
-        except User.DoesNotExist:
-            first_name = line['first_name'] if len(line['first_name']) < 25 else ''
-            last_name = line['last_name'] if len(line['last_name']) < 25 else ''
-
-            user = User.objects.create(
-                email=line['email'],
-                first_name=first_name,
-                last_name=last_name,
-                utm_source=User.FACEBOOK,
-                medium='ads'
-            )
-
-            user.referral_code = create_user_referral_code(user)
-            user.save()
-
-            if os.getenv('DJANGO_CONFIGURATION') == 'Production':
-                onboarding_mail_instance = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
-                mail = onboarding_mail_instance.get_mail_class()
-                mail.send_mail(user)
-
-    messages.success(request, 'Users have been added successfully.')
+    messages.success(request, f'Users have been added successfully ({len(created_users_ids)} new users).')
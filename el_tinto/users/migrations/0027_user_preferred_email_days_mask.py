@@ -0,0 +1,32 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0026_user_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='preferred_email_days_mask',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE users_user
+            SET preferred_email_days_mask = (
+                SELECT COALESCE(SUM(DISTINCT 1 << day), 0) FROM unnest(preferred_email_days) AS day
+            )
+            WHERE cardinality(preferred_email_days) > 0
+            """,
+            migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['dispatch_time', 'preferred_email_days_mask'], name='users_user_dispatch_days'),
+        ),
+    ]
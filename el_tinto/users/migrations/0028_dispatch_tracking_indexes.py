@@ -0,0 +1,32 @@
+# Generated by Django 4.1.10 on 2026-10-19 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0027_user_preferred_email_days_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['referral_code'], name='users_user_referral_code'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['uuid'], name='users_user_uuid'),
+        ),
+        migrations.AddIndex(
+            model_name='usertier',
+            index=models.Index(fields=['user', 'valid_to'], name='users_usertier_user_valid_to'),
+        ),
+        migrations.AlterField(
+            model_name='usertier',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tiers', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
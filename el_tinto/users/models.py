@@ -5,12 +5,17 @@ from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.utils import timezone as django_timezone
 from phonenumber_field.modelfields import PhoneNumberField
 from pytz import timezone
 
 from el_tinto.users.managers import UserManager
 
+# Preferred email days mask with every day of the week, Monday being the lowest bit
+ALL_WEEK_DAYS_MASK = 0b1111111
+
 
 class User(AbstractUser):
     objects = UserManager()
@@ -43,6 +48,8 @@ class User(AbstractUser):
     tzinfo = models.CharField(max_length=128, blank=True, default='')
     username = None
     preferred_email_days = ArrayField(models.SmallIntegerField(), blank=True, default=list)
+    # Bitmask of preferred_email_days, 0 means every day. It is kept in sync on save.
+    preferred_email_days_mask = models.SmallIntegerField(default=0, editable=False)
     best_user = models.BooleanField(default=False)
     referral_code = models.CharField(max_length=6, blank=True, default='')
     uuid = models.UUIDField(default=uuid.uuid4, null=True)
@@ -64,6 +71,51 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        # Trigram indexes matching the UPPER(field::text) LIKE expression used by
+        # icontains lookups, so the admin search does not scan the whole table.
+        indexes = [
+            GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'users_user_{field}_trgm')
+            for field in ('email', 'first_name', 'last_name')
+        ] + [
+            # Dispatch users lookup by dispatch time and preferred email days
+            models.Index(
+                fields=['dispatch_time', 'preferred_email_days_mask'],
+                condition=models.Q(is_active=True),
+                name='users_user_dispatch_days'
+            ),
+            models.Index(fields=['referral_code'], name='users_user_referral_code'),
+            models.Index(fields=['uuid'], name='users_user_uuid'),
+        ]
+
+    @staticmethod
+    def get_preferred_email_days_mask(preferred_email_days):
+        """
+        Encode the preferred email days as a bitmask, Monday being the lowest bit.
+
+        :params:
+        preferred_email_days: [int]
+
+        :return:
+        preferred_email_days_mask: int
+        """
+        return sum(1 << day for day in set(preferred_email_days))
+
+    @staticmethod
+    def get_week_day_masks(week_day):
+        """
+        Get the preferred email days masks of the users who receive mails on a week day,
+        the mask 0 (every day) included. Filtering by this list of values uses the
+        dispatch index, a bitwise expression over the column can not.
+
+        :params:
+        week_day: int
+
+        :return:
+        week_day_masks: [int]
+        """
+        return [mask for mask in range(ALL_WEEK_DAYS_MASK + 1) if not mask or mask & (1 << week_day)]
+
     @property
     def user_name(self):
         """
@@ -203,6 +255,16 @@ class User(AbstractUser):
 
         return get_env_value()
 
+    def save(self, *args, **kwargs):
+        self.preferred_email_days_mask = self.get_preferred_email_days_mask(self.preferred_email_days)
+
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and 'preferred_email_days' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'preferred_email_days_mask'}
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
 
@@ -274,7 +336,8 @@ class UserTier(models.Model):
         (TIER_EXPORTATION_COFFEE, 'Café de exportación')
     )
 
-    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='tiers')
+    # Indexed by the user valid to index
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='tiers', db_index=False)
     parent_tier = models.ForeignKey('users.UserTier', on_delete=models.CASCADE, null=True, related_name='children_tiers')
     tier = models.SmallIntegerField(choices=TIERS_CHOICES)
     missing_sunday_mails = models.PositiveSmallIntegerField(default=0)
@@ -282,6 +345,12 @@ class UserTier(models.Model):
     valid_from = models.DateField(auto_now_add=True)
     valid_to = models.DateField()
 
+    class Meta:
+        indexes = [
+            # Active tiers of a user
+            models.Index(fields=['user', 'valid_to'], name='users_usertier_user_valid_to')
+        ]
+
     @property
     def tier_name(self):
         """
@@ -7,6 +7,7 @@ from el_tinto.mails.models import Mail
 from el_tinto.users.models import User, UserVisits, UserButtonsInteractions, UserTier
 from el_tinto.utils.date_time import convert_datetime_to_local_datetime
 from el_tinto.utils.errors import USER_DOES_NOT_EXIST_ERROR_MESSAGE
+from el_tinto.utils.events import user_visits_sink
 from el_tinto.utils.utils import MILESTONES
 
 
@@ -243,11 +244,25 @@ class UserVisitsSerializer(serializers.Serializer):
 
 class UserButtonsInteractionsSerializer(serializers.ModelSerializer):
     """User buttons interactions serializer."""
+    visit = serializers.IntegerField(source='visit_id')
 
     class Meta:
         model = UserButtonsInteractions
         fields = ('visit', 'medium', 'type')
 
+    def validate_visit(self, obj):
+        """
+        Validate that the visit exists or that its id was reserved by a visits
+        sink, the visit may still be buffered by any web worker.
+
+        :return:
+        visit_id: int
+        """
+        if not (UserVisits.objects.filter(id=obj).exists() or user_visits_sink.is_reserved(obj)):
+            raise serializers.ValidationError('Visit does not exist on our database.')
+
+        return obj
+
 
 class MyTasteClubActionSerializer(serializers.Serializer):
     """My taste club actions serializer."""
@@ -5,20 +5,23 @@ from datetime import date, timedelta
 from django.conf import settings
 from django.core import exceptions
 from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import redirect
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from el_tinto.mails.models import Mail
-from el_tinto.users.models import User, Unsuscribe, UserVisits, UserTier
+from el_tinto.users.models import User, Unsuscribe, UserTier
 from el_tinto.users.serializers import CreateRegisterSerializer, UpdatePreferredDaysSerializer, \
     ConfirmUpdatePreferredDaysSerializer, DestroyRegisterSerializer, GetReferralHubInfoParams, \
     SendMilestoneMailSerializer, UserVisitsQueryParamsSerializer, UserVisitsSerializer, \
     UserButtonsInteractionsSerializer, MyTasteClubActionSerializer
 from el_tinto.utils.date_time import get_string_date
 from el_tinto.utils.errors import USER_DOES_NOT_EXIST_ERROR_MESSAGE, USER_NO_ACTIVE_TIER_ERROR_MESSAGE
+from el_tinto.utils.events import user_visits_sink, user_buttons_interactions_sink
 from el_tinto.utils.html_constants import INVITE_USERS_MESSAGE
+from el_tinto.utils.send_mail import enqueue_mail
 from el_tinto.utils.stripe import handle_unsuscribe
 from el_tinto.utils.users import calculate_referral_race_parameters, get_next_prize_info, get_milestones_status, \
     create_user_referral_code
@@ -48,11 +51,12 @@ class RegisterView(APIView):
 
         return Response(data=response_data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """
         If user already exists on the system but is inactive, then activate it.
         Else, create the user.
-        Send subscription email.
+        Queue subscription email.
 
         "params"
         :serializer: Serializer obj
@@ -78,8 +82,7 @@ class RegisterView(APIView):
 
         # send onboarding email
         onboarding_mail_instance = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
-        mail = onboarding_mail_instance.get_mail_class()
-        mail.send_mail(user)
+        enqueue_mail(onboarding_mail_instance, user)
 
         return user
 
@@ -155,9 +158,7 @@ class UpdatePreferredDaysView(APIView):
 
         change_preferred_email_days_instance = Mail.objects.get(id=UTILITY_MAILS.get(CHANGE_PREFERRED_DAYS))
 
-        mail = change_preferred_email_days_instance.get_mail_class()
-
-        mail.send_mail(user=user, extra_data=extra_mail_data)
+        enqueue_mail(change_preferred_email_days_instance, user, extra_data=extra_mail_data)
 
         return Response(status=status.HTTP_200_OK, data={})
 
@@ -238,9 +239,7 @@ class SendMilestoneMailView(APIView):
 
         milestone_mail_instance = serializer.validated_data['milestone']
 
-        mail = milestone_mail_instance.get_mail_class()
-
-        mail.send_mail(user)
+        enqueue_mail(milestone_mail_instance, user)
 
         referral_percentage, referral_race_position = calculate_referral_race_parameters(user)
 
@@ -276,7 +275,7 @@ class UserVisitsView(APIView):
         serializer = UserVisitsQueryParamsSerializer(data=request.GET)
         serializer.is_valid(raise_exception=True)
 
-        user_visit = UserVisits.objects.create(**serializer.validated_data)
+        user_visit = user_visits_sink.add(**serializer.validated_data)
 
         env = get_env_value()
         return redirect(f"https://www.{env}eltinto.xyz/referidos/?user={uuid}&user_visit={user_visit.id}")
@@ -287,7 +286,7 @@ class UserVisitsView(APIView):
         serializer = UserVisitsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        UserVisits.objects.create(**serializer.validated_data)
+        user_visits_sink.add(**serializer.validated_data)
 
         return Response(status=status.HTTP_201_CREATED)
 
@@ -302,7 +301,7 @@ class UserButtonsInteractionsView(APIView):
         serializer = UserButtonsInteractionsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        serializer.save()
+        user_buttons_interactions_sink.add(**serializer.validated_data)
 
         return Response(status=status.HTTP_201_CREATED)
 
@@ -404,6 +403,7 @@ class MyTasteClubActionsView(APIView):
 
         return Response(data=response_dict)
 
+    @transaction.atomic
     def _remove_user_action(self, user_tier, validated_data):
         """
         Remove user action
@@ -419,9 +419,9 @@ class MyTasteClubActionsView(APIView):
 
         # send confirmation email
         instance = Mail.objects.get(id=TASTE_CLUB_BENEFICIARY_CANCELATION_MAIL)
-        mail = instance.get_mail_class()
-        mail.send_mail(user=remove_user)
+        enqueue_mail(instance, remove_user)
 
+    @transaction.atomic
     def _add_user_action(self, user_tier, validated_data):
         """
         Add user action
@@ -448,8 +448,7 @@ class MyTasteClubActionsView(APIView):
 
             # send onboarding email
             onboarding_mail_instance = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
-            mail = onboarding_mail_instance.get_mail_class()
-            mail.send_mail(user)
+            enqueue_mail(onboarding_mail_instance, user)
 
         # Create new tier
         new_user_tier = UserTier.objects.create(
@@ -465,9 +464,7 @@ class MyTasteClubActionsView(APIView):
 
         if tier_mail_id:
             instance = Mail.objects.get(id=tier_mail_id)
-            mail = instance.get_mail_class()
-
-            mail.send_mail(user=new_user_tier.user)
+            enqueue_mail(instance, new_user_tier.user)
 
     def _change_dispatch_time_action(self, user_tier, validated_data):
         """
@@ -0,0 +1,47 @@
+class Bitmap:
+    """
+    Set of non negative integers stored one bit per value, the value i is bit i % 8
+    of byte i // 8. 100k users ids take 12.5 KB.
+    """
+
+    def __init__(self, data=b''):
+        """
+        :params:
+        data: bytes, as returned by to_bytes
+        """
+        self._bytes = bytearray(data)
+
+    def add(self, value):
+        """
+        :params:
+        value: int
+        """
+        byte_index = value >> 3
+
+        if byte_index >= len(self._bytes):
+            self._bytes.extend(bytes(byte_index - len(self._bytes) + 1))
+
+        self._bytes[byte_index] |= 1 << (value & 7)
+
+    def update(self, values):
+        """
+        :params:
+        values: iterable of int
+        """
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        byte_index = value >> 3
+
+        return byte_index < len(self._bytes) and bool(self._bytes[byte_index] & (1 << (value & 7)))
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self._bytes)
+
+    def to_bytes(self):
+        """
+        :return:
+        data: bytes
+        """
+        return bytes(self._bytes)
@@ -0,0 +1,255 @@
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, connections, DatabaseError, IntegrityError
+
+from el_tinto.users.models import UserVisits, UserButtonsInteractions, UserLinkInteractions
+
+logger = logging.getLogger(__name__)
+
+
+class EventSink:
+    """
+    Write-behind buffer for tracking events.
+
+    Rows are collected in process and inserted with a single bulk_create when
+    the buffer reaches max_batch_size, when flush_interval seconds have passed
+    since the first buffered row, or when the process exits. If the buffer is
+    full the row is inserted synchronously instead.
+
+    Rows referenced by other events get their id reserved from the table sequence
+    before being inserted. A row referencing one still buffered by another process
+    fails its foreign key on flush, it is buffered again once to be retried.
+    """
+
+    def __init__(self, model, max_batch_size=500, max_buffer_size=5000, flush_interval=5,
+                 preallocate_ids=False, id_block_size=100, depends_on=None, enabled=None):
+        """
+        :params:
+        model: Model class
+        max_batch_size: int
+        max_buffer_size: int
+        flush_interval: int | None, None disables the time based flush
+        preallocate_ids: bool, reserve ids from the table sequence before the row is inserted
+        id_block_size: int, amount of ids reserved per sequence call
+        depends_on: [EventSink], sinks that must be flushed before this one (FK targets)
+        enabled: bool | None, if False every row is inserted synchronously, EVENT_SINK_ENABLED when None
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_buffer_size = max_buffer_size
+        self.flush_interval = flush_interval
+        self.preallocate_ids = preallocate_ids
+        self.id_block_size = id_block_size
+        self.depends_on = depends_on or []
+        self._enabled = enabled
+
+        self._buffer = []
+        self._ids = deque()
+        self._lock = threading.Lock()
+        self._ids_lock = threading.Lock()
+        self._timer = None
+
+        atexit.register(self.flush)
+
+    def add(self, **fields):
+        """
+        Buffer a new row.
+
+        :params:
+        fields: model fields
+
+        :return:
+        instance: Model obj, with its id already set if ids are preallocated
+        """
+        instance = self.model(**fields)
+
+        if not self.enabled:
+            instance.save(force_insert=True)
+            return instance
+
+        if self.preallocate_ids:
+            instance.id = self._next_id()
+
+        with self._lock:
+            buffer_is_full = len(self._buffer) >= self.max_buffer_size
+
+            if not buffer_is_full:
+                self._buffer.append(instance)
+
+            buffer_size = len(self._buffer)
+
+        if buffer_is_full:
+            # Synchronous fallback
+            instance.save(force_insert=True)
+
+        elif buffer_size >= self.max_batch_size:
+            self.flush()
+
+        else:
+            self._schedule_flush()
+
+        return instance
+
+    @property
+    def enabled(self):
+        """
+        :return:
+        enabled: bool
+        """
+        return settings.EVENT_SINK_ENABLED if self._enabled is None else self._enabled
+
+    def is_reserved(self, pk):
+        """
+        Whether the given id was handed out by the table sequence, the row may
+        still be buffered by any process.
+
+        :params:
+        pk: int
+
+        :return:
+        is_reserved: bool
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "select pg_sequence_last_value(pg_get_serial_sequence(%s, %s)::regclass)",
+                [self.model._meta.db_table, self.model._meta.pk.column]
+            )
+            last_value = cursor.fetchone()[0]
+
+        return last_value is not None and 0 < pk <= last_value
+
+    def flush(self):
+        """
+        Insert all buffered rows.
+        """
+        for sink in self.depends_on:
+            sink.flush()
+
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+        if not batch:
+            return
+
+        try:
+            self.model.objects.bulk_create(batch, batch_size=self.max_batch_size)
+
+        except DatabaseError as e:
+            logger.error(f'Bulk insert of {len(batch)} {self.model.__name__} failed with {e}, inserting one by one')
+
+            retries = []
+
+            for instance in batch:
+                try:
+                    instance.save(force_insert=True)
+
+                except IntegrityError as e:
+                    if getattr(instance, '_sink_retried', False):
+                        logger.error(f'{self.model.__name__} {instance.__dict__} could not be inserted: {e}')
+                        continue
+
+                    instance._sink_retried = True
+                    retries.append(instance)
+
+                except DatabaseError as e:
+                    logger.error(f'{self.model.__name__} {instance.__dict__} could not be inserted: {e}')
+
+            if retries:
+                with self._lock:
+                    self._buffer.extend(retries)
+
+                self._schedule_flush()
+
+    def close(self):
+        """
+        Insert the buffered rows and stop flushing the sink at exit.
+        """
+        atexit.unregister(self.flush)
+
+        self.flush()
+
+    def _schedule_flush(self):
+        """
+        Start the flush timer if it is not already running.
+        """
+        if self.flush_interval is None:
+            return
+
+        with self._lock:
+            if self._timer is None and self._buffer:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self):
+        """
+        Flush from the timer thread and release its database connections.
+        """
+        try:
+            self.flush()
+
+        finally:
+            connections.close_all()
+
+    def _next_id(self):
+        """
+        Get the next preallocated id, reserving a new block when needed.
+
+        :return:
+        id: int
+        """
+        with self._ids_lock:
+            if not self._ids:
+                self._ids.extend(self._reserve_ids(self.id_block_size))
+
+            return self._ids.popleft()
+
+    def _reserve_ids(self, amount):
+        """
+        Reserve a range of ids from the model's table sequence.
+
+        :params:
+        amount: int
+
+        :return:
+        ids: [int]
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "select nextval(pg_get_serial_sequence(%s, %s)) from generate_series(1, %s)",
+                [self.model._meta.db_table, self.model._meta.pk.column, amount]
+            )
+
+            return [row[0] for row in cursor.fetchall()]
+
+
+user_visits_sink = EventSink(
+    UserVisits,
+    max_batch_size=settings.EVENT_SINK_MAX_BATCH_SIZE,
+    max_buffer_size=settings.EVENT_SINK_MAX_BUFFER_SIZE,
+    flush_interval=settings.EVENT_SINK_FLUSH_INTERVAL,
+    preallocate_ids=True
+)
+
+user_buttons_interactions_sink = EventSink(
+    UserButtonsInteractions,
+    max_batch_size=settings.EVENT_SINK_MAX_BATCH_SIZE,
+    max_buffer_size=settings.EVENT_SINK_MAX_BUFFER_SIZE,
+    flush_interval=settings.EVENT_SINK_FLUSH_INTERVAL,
+    depends_on=[user_visits_sink]
+)
+
+user_link_interactions_sink = EventSink(
+    UserLinkInteractions,
+    max_batch_size=settings.EVENT_SINK_MAX_BATCH_SIZE,
+    max_buffer_size=settings.EVENT_SINK_MAX_BUFFER_SIZE,
+    flush_interval=settings.EVENT_SINK_FLUSH_INTERVAL
+)
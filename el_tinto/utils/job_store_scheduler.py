@@ -0,0 +1,30 @@
+"""
+Scheduler used by the processes that only submit jobs, see el_tinto.utils.scheduler.get_scheduler.
+It reads and writes the job store but never runs jobs: it is always paused, it has no
+thread and its executor runs inline, so no thread or process pool is created.
+"""
+from apscheduler.executors.debug import DebugExecutor
+from apscheduler.schedulers.base import BaseScheduler
+
+
+class JobStoreScheduler(BaseScheduler):
+    """Scheduler adding, modifying and removing the jobs of its job store, the run_scheduler command runs them."""
+
+    def start(self, paused=True):
+        if not paused:
+            raise RuntimeError('JobStoreScheduler does not run jobs, they are run by the run_scheduler command')
+
+        super().start(paused=True)
+
+    def resume(self):
+        raise RuntimeError('JobStoreScheduler does not run jobs, they are run by the run_scheduler command')
+
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+
+    def wakeup(self):
+        # Jobs are never processed by this scheduler
+        pass
+
+    def _create_default_executor(self):
+        return DebugExecutor()
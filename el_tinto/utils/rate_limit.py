@@ -0,0 +1,215 @@
+import multiprocessing
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+# Mail priority classes, each one gets its own share of the SES sending rate
+TRANSACTIONAL_PRIORITY = 'transactional'
+BULK_PRIORITY = 'bulk'
+
+
+class RateLimiter:
+    """
+    Thread safe token bucket allowing `rate` operations per second.
+    A rate of None disables the limit.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :params:
+        rate: float | None, operations per second
+        burst: int, operations allowed at once after an idle period, defaults to one second of operations
+        """
+        self.rate = rate
+        self.capacity = burst or max(int(rate or 0), 1)
+
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until the next operation is allowed.
+
+        :return:
+        waited: float, seconds
+        """
+        if not self.rate:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            # The token is reserved right away, callers wait their turn in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose bucket is shared by the processes it is passed to when they are
+    started, so all of them stay within the same rate.
+    """
+
+    def __init__(self, rate, burst=None, mp_context=None):
+        """
+        :params:
+        rate: float | None, operations per second
+        burst: int, operations allowed at once after an idle period, defaults to one second of operations
+        mp_context: multiprocessing context of the processes
+        """
+        # Tokens and last update time, monotonic time is the same for all processes
+        self._state = (mp_context or multiprocessing).Array('d', 2)
+
+        super().__init__(rate, burst)
+
+        self._lock = self._state.get_lock()
+
+    @property
+    def _tokens(self):
+        return self._state[0]
+
+    @_tokens.setter
+    def _tokens(self, tokens):
+        self._state[0] = tokens
+
+    @property
+    def _updated_at(self):
+        return self._state[1]
+
+    @_updated_at.setter
+    def _updated_at(self, updated_at):
+        self._state[1] = updated_at
+
+
+class DatabaseRateLimiter(RateLimiter):
+    """
+    RateLimiter whose bucket is a MailRateBuckets row, shared by every process and
+    host using the same key. Tokens are refilled with the database clock and
+    reserved with a single upsert, which locks the row only while it runs, so it
+    must not be acquired inside a transaction.
+    """
+
+    def __init__(self, key, rate, burst=None):
+        """
+        :params:
+        key: str, bucket key
+        rate: float | None, operations per second
+        burst: int, operations allowed at once after an idle period, defaults to one second of operations
+        """
+        super().__init__(rate, burst)
+
+        self.key = key
+
+    def acquire(self):
+        if not self.rate:
+            return 0
+
+        from el_tinto.mails.models import MailRateBuckets
+
+        table = MailRateBuckets._meta.db_table
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                insert into {table} (key, tokens, updated_at) values (%(key)s, %(capacity)s - 1, clock_timestamp())
+                on conflict (key) do update set
+                    tokens = least(
+                        %(capacity)s,
+                        {table}.tokens + extract(epoch from clock_timestamp() - {table}.updated_at) * %(rate)s
+                    ) - 1,
+                    updated_at = clock_timestamp()
+                returning tokens
+                """,
+                {'key': self.key, 'capacity': self.capacity, 'rate': self.rate}
+            )
+
+            tokens = cursor.fetchone()[0]
+
+        # The token is reserved right away, callers wait their turn in order
+        wait = -tokens / self.rate if tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_mail_rate(priority):
+    """
+    Get the sending rate of a mail priority class.
+    Transactional mails get MAIL_TRANSACTIONAL_RATE_SHARE of MAIL_SEND_RATE,
+    bulk mails get the rest, so bulk sends never use the rate reserved for
+    transactional mails.
+
+    :params:
+    priority: str, TRANSACTIONAL_PRIORITY or BULK_PRIORITY
+
+    :return:
+    rate: float | None, mails per second
+    """
+    # Mails are not rate limited while running tests
+    send_rate = None if 'test' in sys.argv else settings.MAIL_SEND_RATE
+
+    transactional_share = settings.MAIL_TRANSACTIONAL_RATE_SHARE
+    share = transactional_share if priority == TRANSACTIONAL_PRIORITY else 1 - transactional_share
+
+    return send_rate * share if send_rate else None
+
+
+def get_mail_rate_limiter(priority):
+    """
+    Get the rate limiter of a mail priority class for the current process.
+    The bulk mails rate limiter is shared with the worker processes of every
+    sharded dispatch, so dispatches running at the same time share the bulk rate.
+    Celery mail workers run in several processes and hosts, with them the bulk
+    mails rate is shared through the database.
+
+    :params:
+    priority: str, TRANSACTIONAL_PRIORITY or BULK_PRIORITY
+
+    :return:
+    rate_limiter: RateLimiter obj
+    """
+    with _rate_limiters_lock:
+        if priority not in _rate_limiters:
+            if priority != BULK_PRIORITY:
+                _rate_limiters[priority] = RateLimiter(get_mail_rate(priority))
+
+            elif settings.MAIL_WORKER_BACKEND == 'celery':
+                _rate_limiters[priority] = DatabaseRateLimiter(priority, get_mail_rate(priority))
+
+            else:
+                _rate_limiters[priority] = SharedRateLimiter(
+                    get_mail_rate(priority), mp_context=multiprocessing.get_context('spawn')
+                )
+
+        return _rate_limiters[priority]
+
+
+def set_mail_rate_limiter(priority, rate_limiter):
+    """
+    Set the rate limiter of a mail priority class for the current process,
+    used by worker processes sharing the rate of their parent.
+
+    :params:
+    priority: str, TRANSACTIONAL_PRIORITY or BULK_PRIORITY
+    rate_limiter: RateLimiter obj
+    """
+    with _rate_limiters_lock:
+        _rate_limiters[priority] = rate_limiter
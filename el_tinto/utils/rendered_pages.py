@@ -0,0 +1,164 @@
+import gzip
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+IDENTITY_ENCODING = 'identity'
+GZIP_ENCODING = 'gzip'
+BROTLI_ENCODING = 'br'
+
+# Preferred encodings first
+COMPRESSED_ENCODINGS = {
+    BROTLI_ENCODING: lambda content: brotli.compress(content, mode=brotli.MODE_TEXT),
+    GZIP_ENCODING: lambda content: gzip.compress(content, mtime=0),
+}
+
+
+def get_rendered_page_version(*updated_at_values):
+    """
+    Get the content version of a rendered page from the last modification
+    dates of the objects it is built from.
+
+    :params:
+    updated_at_values: datetime
+
+    :return:
+    version: int, timestamp in microseconds
+    """
+    return int(max(updated_at_values).timestamp() * 1_000_000)
+
+
+def get_rendered_page_tag(key, version):
+    """
+    Identify a rendered page version, used by its cache keys and ETags. It includes
+    the templates release so pages rendered before a deploy are not served after it.
+
+    :params:
+    key: str
+    version: int
+
+    :return:
+    tag: str
+    """
+    return f'{key}:{settings.RENDERED_PAGES_VERSION}:{version}'
+
+
+def get_rendered_page(key, version, render):
+    """
+    Get the rendered html of a page from the cache, rendering and caching it
+    if the current version is not cached yet. Editing any of the objects the
+    page is built from updates its version so older renders are never served.
+
+    :params:
+    key: str, page identifier, e.g. "web_news:<id>"
+    version: int
+    render: callable, returns the page html
+
+    :return:
+    html: str
+    """
+    cache_key = f'rendered_page:{get_rendered_page_tag(key, version)}'
+    html = cache.get(cache_key)
+
+    if html is None:
+        html = render()
+        cache.set(cache_key, html, settings.RENDERED_PAGES_CACHE_TIMEOUT)
+
+    return html
+
+
+def get_compressed_rendered_page(key, version, render, encoding):
+    """
+    Get the JSON payload of a rendered page compressed with the given
+    encoding. The compressed payload is cached next to the rendered html,
+    so each version is compressed only once.
+
+    :params:
+    key: str
+    version: int
+    render: callable
+    encoding: str, one of COMPRESSED_ENCODINGS
+
+    :return:
+    content: bytes
+    """
+    cache_key = f'rendered_page:{get_rendered_page_tag(key, version)}:{encoding}'
+    content = cache.get(cache_key)
+
+    if content is None:
+        html = get_rendered_page(key, version, render)
+        content = COMPRESSED_ENCODINGS[encoding](JSONRenderer().render({"html": html}))
+        cache.set(cache_key, content, settings.RENDERED_PAGES_CACHE_TIMEOUT)
+
+    return content
+
+
+def get_accepted_encoding(request):
+    """
+    Get the preferred compressed encoding accepted by the client.
+
+    :params:
+    request: Request obj
+
+    :return:
+    encoding: str
+    """
+    accepted_encodings = {
+        accepted_encoding.split(';')[0].strip()
+        for accepted_encoding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+
+    for encoding in COMPRESSED_ENCODINGS:
+        if encoding in accepted_encodings:
+            return encoding
+
+    return IDENTITY_ENCODING
+
+
+def get_rendered_page_response(request, key, version, render):
+    """
+    Build the response of a rendered page with ETag and Last-Modified headers.
+    A 304 response is returned if the client already has the current version.
+    JSON responses are served precompressed when the client accepts it.
+
+    :params:
+    request: Request obj
+    key: str
+    version: int
+    render: callable
+
+    :return:
+    response: Response obj
+    """
+    encoding = get_accepted_encoding(request) if request.accepted_renderer.format == 'json' else IDENTITY_ENCODING
+
+    # Each encoding is a different representation of the page
+    tag = get_rendered_page_tag(key, version)
+    etag = quote_etag(tag if encoding == IDENTITY_ENCODING else f'{tag}:{encoding}')
+    last_modified = version // 1_000_000
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None and encoding == IDENTITY_ENCODING:
+        html = get_rendered_page(key, version, render)
+        response = Response(data={"html": html}, status=status.HTTP_200_OK)
+
+    elif response is None:
+        response = HttpResponse(
+            get_compressed_rendered_page(key, version, render, encoding),
+            content_type='application/json'
+        )
+        response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept-Encoding',))
+
+    return response
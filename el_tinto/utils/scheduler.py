@@ -1,19 +1,11 @@
+import threading
+
 from django.conf import settings
+from django.db import connection
 from pytz import timezone
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
-
 MISFIRE_GRACE_TIME = 60*60*2  # 60 s * 60 m * 2h
 
-JOBSTORES = {
-    'default': SQLAlchemyJobStore(url=settings.DATABASE_FULL_URL)
-}
-EXECUTORS = {
-    'default': ThreadPoolExecutor(20),
-    'processpool': ProcessPoolExecutor(5)
-}
 JOB_DEFAULTS = {
     'coalesce': False,
     'max_instances': 3,
@@ -22,13 +14,124 @@ JOB_DEFAULTS = {
 
 TIMEZONE = timezone('America/Bogota')
 
-MISFIRE_GRACE_TIME = 60*60*2,  # 60 s * 60 m * 2h
+# Postgres advisory lock held by the process running the scheduled jobs
+SCHEDULER_LOCK_ID = 72607
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def create_scheduler(jobstore_url):
+    """
+    Create a scheduler storing its jobs in the given database.
+    APScheduler and SQLAlchemy are only imported here so processes that never
+    schedule a job do not pay for them.
+
+    :params:
+    jobstore_url: str
+
+    :return:
+    scheduler: BackgroundScheduler obj, not started
+    """
+    from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    return BackgroundScheduler(
+        jobstores={
+            'default': SQLAlchemyJobStore(url=jobstore_url)
+        },
+        executors={
+            'default': ThreadPoolExecutor(20),
+            'processpool': ProcessPoolExecutor(5)
+        },
+        job_defaults=JOB_DEFAULTS,
+        timezone=TIMEZONE
+    )
+
+
+def create_job_store_scheduler(jobstore_url):
+    """
+    Create a scheduler that only submits jobs to the given database, see
+    el_tinto.utils.job_store_scheduler.
+
+    :params:
+    jobstore_url: str
+
+    :return:
+    scheduler: JobStoreScheduler obj, not started
+    """
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+
+    from el_tinto.utils.job_store_scheduler import JobStoreScheduler
+
+    return JobStoreScheduler(
+        jobstores={
+            'default': SQLAlchemyJobStore(url=jobstore_url)
+        },
+        job_defaults=JOB_DEFAULTS,
+        timezone=TIMEZONE
+    )
+
+
+def get_scheduler():
+    """
+    Get the scheduler of the current process, it is created on first use.
+    Jobs are only submitted to the job store, they are run by the
+    run_scheduler command, so the scheduler has no thread nor executors.
+
+    :return:
+    scheduler: JobStoreScheduler obj
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            scheduler = create_job_store_scheduler(settings.DATABASE_FULL_URL)
+            scheduler.start(paused=True)
+
+            _scheduler = scheduler
+
+    return _scheduler
+
+
+def acquire_scheduler_lock():
+    """
+    Try to acquire the scheduler advisory lock for the current database session.
+
+    :return:
+    acquired: bool
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_try_advisory_lock(%s)", [SCHEDULER_LOCK_ID])
+
+        return cursor.fetchone()[0]
+
+
+def is_scheduler_lock_held():
+    """
+    Whether the current database session still holds the scheduler advisory lock.
+
+    :return:
+    held: bool
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            select exists(
+                select 1 from pg_locks
+                where locktype = 'advisory' and objid = %s and pid = pg_backend_pid() and granted
+            )
+            """,
+            [SCHEDULER_LOCK_ID]
+        )
+
+        return cursor.fetchone()[0]
 
-scheduler = BackgroundScheduler(
-    jobstores=JOBSTORES,
-    executors=EXECUTORS,
-    job_defaults=JOB_DEFAULTS,
-    timezone=TIMEZONE
-)
 
-scheduler.start()
+def release_scheduler_lock():
+    """
+    Release the scheduler advisory lock held by the current database session.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_advisory_unlock(%s)", [SCHEDULER_LOCK_ID])
@@ -1,35 +1,541 @@
-from datetime import datetime
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
-from el_tinto.mails.models import Mail
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from el_tinto.mails.models import Mail, MailScheduledJobs, MailOutbox, StagedMails, MailAudiences, MailFanOuts
+from el_tinto.users.models import User
+from el_tinto.utils.rate_limit import get_mail_rate_limiter, TRANSACTIONAL_PRIORITY, BULK_PRIORITY
+from el_tinto.utils.scheduler import TIMEZONE
+from el_tinto.utils.sharding import init_shard_worker, send_mail_shard
+from el_tinto.utils.workers import get_mail_worker_backend
+
+logger = logging.getLogger("mails")
+
+# Outbox mails are not retried after this amount of failed attempts
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+STAGING_JOB_ID_SUFFIX = '_staging'
 
 
 def send_multiple_mails(mail_id, dispatch_time):
 
     instance = Mail.objects.get(id=mail_id)
+
+    backend = get_mail_worker_backend()
+
+    if backend:
+        # The job is removed from the job store by the last batch of the dispatch
+        fan_out_mail(instance, dispatch_time, backend)
+        return
+
+    if settings.MAIL_DISPATCH_SHARDS > 1:
+        send_sharded_mails(mail_id, dispatch_time, settings.MAIL_DISPATCH_SHARDS)
+
+        instance.mark_as_sent()
+
+    else:
+        mail = instance.get_mail_class()
+        mail.send_several_mails(dispatch_time)
+
+    # The job is removed from the job store once it runs
+    MailScheduledJobs.objects.filter(mail_id=mail_id, dispatch_time=dispatch_time).delete()
+
+
+def get_shards_executor(shards, rate_limiter):
+    """
+    Get the pool of worker processes of a sharded dispatch.
+    Workers are spawned rather than forked from the threads of the scheduler.
+
+    :params:
+    shards: int
+    rate_limiter: SharedRateLimiter obj
+
+    :return:
+    executor: ProcessPoolExecutor obj
+    """
+    return ProcessPoolExecutor(
+        max_workers=shards,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_shard_worker,
+        initargs=(rate_limiter,)
+    )
+
+
+def send_sharded_mails(mail_id, dispatch_time, shards):
+    """
+    Send a mail to a dispatch time audience split by user id into shards, each one
+    sent by its own worker process with its own database connection. The bulk
+    mails rate is shared by all the workers and the other dispatches of the
+    process, see get_mail_rate_limiter. Every shard is sent even when
+    another one fails, failed shards are resumed by running the job again.
+
+    :params:
+    mail_id: int
+    dispatch_time: time
+    shards: int
+
+    :return:
+    sent_count: int
+    """
+    rate_limiter = get_mail_rate_limiter(BULK_PRIORITY)
+
+    sent_count = 0
+    failed_shards = []
+
+    with get_shards_executor(shards, rate_limiter) as executor:
+        futures = {
+            executor.submit(send_mail_shard, mail_id, dispatch_time, shard, shards): shard
+            for shard in range(shards)
+        }
+
+        for future in as_completed(futures):
+            shard = futures[future]
+
+            try:
+                shard_sent_count = future.result()
+
+            except Exception:
+                logger.exception(f'Mail {mail_id} shard {shard + 1}/{shards} failed')
+                failed_shards.append(shard)
+
+            else:
+                sent_count += shard_sent_count
+                logger.info(f'Mail {mail_id} shard {shard + 1}/{shards} sent {shard_sent_count} mails')
+
+    if failed_shards:
+        raise RuntimeError(f'Mail {mail_id} shards {sorted(failed_shards)} failed')
+
+    return sent_count
+
+
+def fan_out_mail(mail, dispatch_time, backend, batch_size=None):
+    """
+    Split a dispatch time audience into batches of users ids, each one sent by a
+    mail worker. Users who already received the mail are left out, so a failed
+    dispatch is resumed by running the job again.
+
+    :params:
+    mail: Mail object
+    dispatch_time: time
+    backend: MailWorkerBackend obj
+    batch_size: int, MAIL_WORKER_BATCH_SIZE by default
+
+    :return:
+    fan_out: MailFanOuts object
+    """
+    batch_size = batch_size or settings.MAIL_WORKER_BATCH_SIZE
+
+    mail_class = mail.get_mail_class()
+    delivered_users = mail_class.get_delivered_users()
+
+    users_ids = [
+        user_id
+        for user_id in mail_class.get_audience(dispatch_time).order_by('id').values_list('id', flat=True).iterator()
+        if user_id not in delivered_users
+    ]
+    users_batches = [users_ids[i:i + batch_size] for i in range(0, len(users_ids), batch_size)]
+
+    fan_out = MailFanOuts.objects.create(mail=mail, dispatch_time=dispatch_time, batches_count=len(users_batches))
+
+    logger.info(f'Mail {mail.id} fan out {fan_out.id}: {len(users_ids)} users in {len(users_batches)} batches')
+
+    if not users_batches:
+        finish_fan_out(fan_out)
+
+    for batch_index, users_batch in enumerate(users_batches):
+        backend.send_batch(fan_out.id, batch_index, users_batch)
+
+    return fan_out
+
+
+def acquire_fan_out_batch_lock(fan_out_id, batch_index):
+    """
+    Try to acquire the advisory lock of a fan out batch for the current database session.
+    The lock is released with the session if the worker sending the batch dies.
+
+    :params:
+    fan_out_id: int
+    batch_index: int
+
+    :return:
+    acquired: bool
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_try_advisory_lock(%s, %s)", [fan_out_id, batch_index])
+
+        return cursor.fetchone()[0]
+
+
+def release_fan_out_batch_lock(fan_out_id, batch_index):
+    """
+    Release the advisory lock of a fan out batch held by the current database session.
+
+    :params:
+    fan_out_id: int
+    batch_index: int
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_advisory_unlock(%s, %s)", [fan_out_id, batch_index])
+
+
+def send_fan_out_batch(fan_out_id, batch_index, users_ids):
+    """
+    Send a mail to a batch of users of a fanned out dispatch and add the result
+    to its progress. The last batch finishes the dispatch.
+    Batches delivered again by the broker are only sent and counted once: a batch
+    is claimed with an advisory lock while it is sent, deliveries of a batch that
+    is being sent or already finished are skipped.
+
+    :params:
+    fan_out_id: int
+    batch_index: int
+    users_ids: [int]
+
+    :return: None
+    """
+    if not acquire_fan_out_batch_lock(fan_out_id, batch_index):
+        logger.info(f'Fan out {fan_out_id} batch {batch_index} is already being sent')
+        return
+
+    try:
+        fan_out = MailFanOuts.objects.select_related('mail').get(id=fan_out_id)
+
+        if batch_index in fan_out.finished_batches:
+            return
+
+        mail = fan_out.mail.get_mail_class()
+
+        try:
+            sent_count = mail.send_several_mails(fan_out.dispatch_time, users_ids=users_ids)
+            failed = False
+
+        except Exception:
+            logger.exception(f'Mail {fan_out.mail_id} fan out {fan_out_id} batch of {len(users_ids)} users failed')
+            sent_count = 0
+            failed = True
+
+        with transaction.atomic():
+            fan_out = MailFanOuts.objects.select_related('mail').select_for_update(of=('self',)).get(id=fan_out_id)
+
+            # The lock is lost if the database connection dropped while sending
+            if batch_index in fan_out.finished_batches:
+                return
+
+            fan_out.finished_batches.append(batch_index)
+
+            if failed:
+                fan_out.failed_batches += 1
+
+            else:
+                fan_out.sent_batches += 1
+                fan_out.sent_count += sent_count
+
+            fan_out.save()
+
+            if not fan_out.pending_batches:
+                finish_fan_out(fan_out)
+
+    finally:
+        release_fan_out_batch_lock(fan_out_id, batch_index)
+
+
+def finish_fan_out(fan_out):
+    """
+    Finish a fanned out dispatch once all its batches ran.
+    The mail is marked as sent and its job removed only when no batch failed.
+
+    :params:
+    fan_out: MailFanOuts object
+
+    :return: None
+    """
+    fan_out.finished_at = timezone.now()
+    fan_out.save()
+
+    if fan_out.failed_batches:
+        logger.error(
+            f'Mail {fan_out.mail_id} fan out {fan_out.id}: {fan_out.failed_batches}/{fan_out.batches_count} '
+            f'batches failed, {fan_out.sent_count} mails sent'
+        )
+        return
+
+    fan_out.mail.mark_as_sent()
+
+    MailScheduledJobs.objects.filter(mail_id=fan_out.mail_id, dispatch_time=fan_out.dispatch_time).delete()
+
+    logger.info(f'Mail {fan_out.mail_id} fan out {fan_out.id}: {fan_out.sent_count} mails sent')
+
+
+def stage_mail(mail_id, dispatch_time):
+    """
+    Render a programmed mail ahead of its dispatch time.
+
+    :params:
+    mail_id: int
+    dispatch_time: time
+
+    :return: None
+    """
+    instance = Mail.objects.get(id=mail_id)
     mail = instance.get_mail_class()
-    mail.send_several_mails(dispatch_time)
+    staged_count = mail.stage_mails(dispatch_time)
 
+    logger.info(f'{staged_count} mails of Mail {mail_id} staged for {dispatch_time or instance.dispatch_date}')
 
-def schedule_mail(mail, scheduler, dispatch_time=None):
+
+def send_mail_to_users(mail_id, users_ids):
     """
-    schedule mail sending.
+    Send a mail to the given users.
+
+    :params:
+    mail_id: int
+    users_ids: [int]
+
+    :return: None
+    """
+    instance = Mail.objects.get(id=mail_id)
+    mail = instance.get_mail_class()
+    mail.send_mail_batch(list(mail.get_recipients(User.objects.filter(id__in=users_ids))))
+
+
+def enqueue_mail(mail, user, extra_data=None):
+    """
+    Add a mail to the outbox, it is sent in the background by the
+    send_outbox_mails command once the current transaction is committed.
 
     :params:
     mail: Mail object
+    user: User object
+    extra_data: dict, extra template data
+
+    :return:
+    outbox_mail: MailOutbox object
+    """
+    return MailOutbox.objects.create(mail=mail, user=user, extra_data=extra_data or {})
+
+
+def send_outbox_mails(batch_size=100):
+    """
+    Send a batch of pending outbox mails.
+    Rows are locked while they are sent, rows locked by other workers are skipped.
+    Outbox mails are transactional, they use the rate reserved for them so
+    they are not delayed by bulk sends.
+
+    :params:
+    batch_size: int
+
+    :return:
+    sent_count: int, amount of outbox mails processed
+    """
+    with transaction.atomic():
+        outbox_mails = list(
+            MailOutbox.objects.filter(
+                sent_datetime__isnull=True,
+                attempts__lt=MAIL_OUTBOX_MAX_ATTEMPTS
+            ).select_related(
+                'mail', 'user'
+            ).select_for_update(skip_locked=True, of=('self',)).order_by('id')[:batch_size]
+        )
+
+        # Templates are loaded once per mail
+        mail_classes = {}
+        rate_limiter = get_mail_rate_limiter(TRANSACTIONAL_PRIORITY)
+
+        for outbox_mail in outbox_mails:
+            if outbox_mail.mail_id not in mail_classes:
+                mail_classes[outbox_mail.mail_id] = outbox_mail.mail.get_mail_class()
+
+            rate_limiter.acquire()
+
+            try:
+                with transaction.atomic():
+                    sent = mail_classes[outbox_mail.mail_id].send_mail(
+                        user=outbox_mail.user, extra_data=outbox_mail.extra_data or None
+                    )
+
+                if not sent:
+                    raise Exception('SES did not accept the mail')
+
+                outbox_mail.sent_datetime = timezone.now()
+
+            except Exception as e:
+                logger.error(f'Outbox mail {outbox_mail.id} could not be sent: {e}')
+
+                outbox_mail.attempts += 1
+                outbox_mail.error = str(e)
+
+        MailOutbox.objects.bulk_update(outbox_mails, ['sent_datetime', 'attempts', 'error'])
+
+    return len(outbox_mails)
+
+
+def get_mail_queues_status():
+    """
+    Get the status of the mail queues by priority class.
+    Transactional mails are queued in the outbox, bulk mails are the
+    programmed mails jobs.
+
+    :return:
+    status: dict
+    """
+    transactional_status = MailOutbox.objects.filter(sent_datetime__isnull=True).aggregate(
+        pending=Count('id', filter=Q(attempts__lt=MAIL_OUTBOX_MAX_ATTEMPTS)),
+        failed=Count('id', filter=Q(attempts__gte=MAIL_OUTBOX_MAX_ATTEMPTS)),
+        oldest_pending=Min('created_at', filter=Q(attempts__lt=MAIL_OUTBOX_MAX_ATTEMPTS))
+    )
+
+    bulk_status = MailScheduledJobs.objects.aggregate(
+        pending=Count('id'),
+        mails=Count('mail', distinct=True)
+    )
+
+    return {
+        TRANSACTIONAL_PRIORITY: transactional_status,
+        BULK_PRIORITY: bulk_status
+    }
+
+
+def queue_mail_to_users(mail, users_ids, scheduler, batch_size=200):
+    """
+    Queue jobs to send a mail to the given users in the background,
+    one job per batch of users.
+
+    :params:
+    mail: Mail object
+    users_ids: [int]
+    scheduler: BaseScheduler
+    batch_size: int
 
     :return: None
     """
+    for i in range(0, len(users_ids), batch_size):
+        scheduler.add_job(send_mail_to_users, args=[mail.id, users_ids[i:i + batch_size]])
+
+
+def get_mail_job_id(mail, dispatch_time=None):
+    """
+    Get the scheduler job id of a mail sending.
+
+    :params:
+    mail: Mail object
+    dispatch_time: time
+
+    :return:
+    job_id: str
+    """
     dispatch_time_str = dispatch_time.strftime('%H:%M:%S') if dispatch_time else mail.dispatch_date.strftime('%H:%M:%S')
 
+    return f"{mail.id}_{dispatch_time_str}"
+
+
+def get_staging_job_id(job_id):
+    """
+    Get the scheduler job id of the staging of a mail sending.
+
+    :params:
+    job_id: str, mail sending job id
+
+    :return:
+    staging_job_id: str
+    """
+    return f"{job_id}{STAGING_JOB_ID_SUFFIX}"
+
+
+def schedule_mail(mail, scheduler, dispatch_time=None):
+    """
+    schedule mail sending.
+    The job is registered in MailScheduledJobs so it can be looked up by mail.
+    Scheduling the same mail and dispatch time again replaces its job.
+    Mails are staged MAIL_STAGING_LEAD_TIME minutes before the dispatch time.
+    The audience of the dispatch time is stored, the jobs send the mail to it.
+
+    :params:
+    mail: Mail object
+    scheduler: BaseScheduler
+    dispatch_time: time
+
+    :return:
+    audience_count: int
+    """
+    audience_count = mail.get_mail_class().take_audience_snapshot(dispatch_time)
+
     run_date = datetime.combine(mail.dispatch_date.date(), dispatch_time) if dispatch_time else mail.dispatch_date
 
-    scheduler.add_job(
+    job = scheduler.add_job(
         send_multiple_mails,
         trigger='date',
         run_date=run_date,
         args=[mail.id, dispatch_time],
-        id=f"{mail.id}_{dispatch_time_str}"
+        id=get_mail_job_id(mail, dispatch_time),
+        replace_existing=True
     )
 
+    MailScheduledJobs.objects.update_or_create(mail=mail, dispatch_time=dispatch_time, defaults={'job_id': job.id})
+
+    staging_run_date = (
+        run_date if timezone.is_aware(run_date) else TIMEZONE.localize(run_date)
+    ) - timedelta(minutes=settings.MAIL_STAGING_LEAD_TIME)
+
+    if settings.MAIL_STAGING_LEAD_TIME and staging_run_date > timezone.now():
+        scheduler.add_job(
+            stage_mail,
+            trigger='date',
+            run_date=staging_run_date,
+            args=[mail.id, dispatch_time],
+            id=get_staging_job_id(job.id),
+            replace_existing=True
+        )
+
     mail.programmed = True
     mail.save()
+
+    return audience_count
+
+
+def cancel_scheduled_mail(mail, scheduler):
+    """
+    Remove the scheduler jobs of a mail.
+
+    :params:
+    mail: Mail object
+    scheduler: BaseScheduler
+
+    :return: None
+    """
+    mail_scheduled_jobs = MailScheduledJobs.objects.filter(mail=mail)
+
+    for job_id in mail_scheduled_jobs.values_list('job_id', flat=True):
+        for mail_job_id in [job_id, get_staging_job_id(job_id)]:
+            job = scheduler.get_job(mail_job_id)
+
+            # Jobs that already ran are no longer in the job store
+            if job:
+                job.remove()
+
+    mail_scheduled_jobs.delete()
+    StagedMails.objects.filter(mail=mail).delete()
+    MailAudiences.objects.filter(mail=mail).delete()
+
+
+def reschedule_mail(mail, scheduler):
+    """
+    Move the scheduler jobs of a programmed mail to its current dispatch date.
+
+    :params:
+    mail: Mail object
+    scheduler: BaseScheduler
+
+    :return: None
+    """
+    dispatch_times = list(MailScheduledJobs.objects.filter(mail=mail).values_list('dispatch_time', flat=True))
+
+    cancel_scheduled_mail(mail, scheduler)
+
+    for dispatch_time in dispatch_times:
+        schedule_mail(mail, scheduler, dispatch_time)
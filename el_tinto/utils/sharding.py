@@ -0,0 +1,43 @@
+"""
+Worker side of the sharded mails dispatch, see el_tinto.utils.send_mail.send_sharded_mails.
+Worker processes are spawned, so this module does not import Django models when it is
+loaded: they are only importable once the worker has set up Django.
+"""
+
+
+def init_shard_worker(rate_limiter):
+    """
+    Set up Django in a shard worker process.
+
+    :params:
+    rate_limiter: SharedRateLimiter obj, bulk mails rate shared by all the shards
+
+    :return: None
+    """
+    import configurations
+
+    configurations.setup()
+
+    from el_tinto.utils.rate_limit import set_mail_rate_limiter, BULK_PRIORITY
+
+    set_mail_rate_limiter(BULK_PRIORITY, rate_limiter)
+
+
+def send_mail_shard(mail_id, dispatch_time, shard, shards):
+    """
+    Send a mail to a shard of its audience.
+
+    :params:
+    mail_id: int
+    dispatch_time: time
+    shard: int, shard index
+    shards: int, shards count
+
+    :return:
+    sent_count: int
+    """
+    from el_tinto.mails.models import Mail
+
+    mail = Mail.objects.get(id=mail_id).get_mail_class()
+
+    return mail.send_several_mails(dispatch_time, shard=(shard, shards))
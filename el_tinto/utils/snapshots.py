@@ -0,0 +1,315 @@
+import json
+import logging
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import get_storage_class
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from django.template import loader
+from django.utils.safestring import mark_safe
+
+from el_tinto.mails.models import Mail
+from el_tinto.tintos.models import TintoBlocksEntries
+from el_tinto.utils.date_time import get_string_date
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DATE_FORMAT = '%d-%m-%Y'
+SNAPSHOTS_INDEX_NAME = 'index.json'
+
+# Mail fields rendered in the snapshots, saves that change none of them do not publish them again
+SNAPSHOT_FIELDS = (
+    'html',
+    'subject',
+    'subject_message',
+    'tweet',
+    'dispatch_date',
+    'sponsor_image_url',
+    'sponsor_image_url_width',
+    'sponsor_web_url',
+    'tinto_id'
+)
+
+
+def render_tinto_page(mail):
+    """
+    Render the web page of a daily Tinto.
+
+    :params:
+    mail: Mail obj
+
+    :return:
+    html: str
+    """
+    mail_class = mail.get_mail_class()
+
+    mail_data = mail_class.get_mail_template_data()
+
+    return mail_class.template.render(mail_data)
+
+
+def render_web_news_page(tinto_block_entry, mail):
+    """
+    Render the web page of a single news of a daily Tinto.
+
+    :params:
+    tinto_block_entry: TintoBlocksEntries obj
+    mail: Mail obj, Mail related to the entry's Tinto
+
+    :return:
+    html: str
+    """
+    template = loader.get_template('../templates/web_news.html')
+
+    mail_data = {
+        "html": mark_safe(tinto_block_entry.display_html),
+        'date': get_string_date(mail.dispatch_date.date())
+    }
+
+    return template.render(mail_data)
+
+
+def get_snapshots_storage():
+    """
+    Get the storage where the static snapshots are published.
+
+    :return:
+    storage: Storage obj
+    """
+    return get_storage_class(settings.STATIC_SNAPSHOTS_STORAGE)(location=settings.STATIC_SNAPSHOTS_LOCATION)
+
+
+def write_snapshot(storage, name, content):
+    """
+    Write a snapshot file, replacing the previous version if any.
+
+    :params:
+    storage: Storage obj
+    name: str
+    content: str
+    """
+    if storage.exists(name):
+        storage.delete(name)
+
+    storage.save(name, ContentFile(content.encode()))
+
+
+def get_tinto_snapshot_name(mail):
+    """
+    :params:
+    mail: Mail obj
+
+    :return:
+    name: str
+    """
+    return f'tintos/{mail.dispatch_date.strftime(SNAPSHOT_DATE_FORMAT)}.html'
+
+
+def get_web_news_snapshot_name(tinto_block_entry_id):
+    """
+    :params:
+    tinto_block_entry_id: int
+
+    :return:
+    name: str
+    """
+    return f'web_news/{tinto_block_entry_id}.html'
+
+
+def get_snapshots_index_news(mails):
+    """
+    Get the news of the snapshots index entries of the given mails.
+
+    :params:
+    mails: Mail queryset
+
+    :return:
+    news: dict, news list by mail id
+    """
+    tinto_blocks_entries = TintoBlocksEntries.objects.filter(
+        tinto__mail__in=mails
+    ).order_by('position').values_list('id', 'tinto__mail__id', 'tinto_block__title')
+
+    news = {}
+    for tinto_block_entry_id, mail_id, title in tinto_blocks_entries:
+        news.setdefault(mail_id, []).append({
+            'id': tinto_block_entry_id,
+            'title': title,
+            'path': get_web_news_snapshot_name(tinto_block_entry_id)
+        })
+
+    return news
+
+
+def get_snapshots_index_entry(mail, news):
+    """
+    :params:
+    mail: Mail obj
+    news: [dict]
+
+    :return:
+    entry: dict
+    """
+    return {
+        'mail_id': mail.id,
+        'subject': mail.subject,
+        'path': get_tinto_snapshot_name(mail),
+        'news': news
+    }
+
+
+def write_snapshots_index(storage, index):
+    """
+    Write the snapshots index ordered by dispatch date, most recent first.
+
+    :params:
+    storage: Storage obj
+    index: dict, index entries by dispatch date
+    """
+    index = dict(
+        sorted(index.items(), key=lambda item: datetime.strptime(item[0], SNAPSHOT_DATE_FORMAT), reverse=True)
+    )
+
+    write_snapshot(storage, SNAPSHOTS_INDEX_NAME, json.dumps(index, ensure_ascii=False))
+
+
+def publish_snapshots_index(storage):
+    """
+    Publish the JSON index of the published Tintos by dispatch date.
+
+    :params:
+    storage: Storage obj
+    """
+    mails = Mail.objects.filter(
+        type=Mail.DAILY,
+        sent_datetime__isnull=False,
+        tinto__isnull=False
+    )
+
+    news = get_snapshots_index_news(mails)
+
+    write_snapshots_index(storage, {
+        mail.dispatch_date.strftime(SNAPSHOT_DATE_FORMAT): get_snapshots_index_entry(mail, news.get(mail.id, []))
+        for mail in mails.only('id', 'subject', 'dispatch_date')
+    })
+
+
+def update_snapshots_index(storage, mail):
+    """
+    Add or replace the entry of a published Tinto in the JSON index, the other
+    entries are kept as they are. The whole index is published if it does not exist.
+
+    :params:
+    storage: Storage obj
+    mail: Mail obj
+    """
+    if not storage.exists(SNAPSHOTS_INDEX_NAME):
+        publish_snapshots_index(storage)
+        return
+
+    with storage.open(SNAPSHOTS_INDEX_NAME) as file:
+        index = json.loads(file.read())
+
+    # The previous entry of the mail is under its previous dispatch date if it changed
+    index = {date: entry for date, entry in index.items() if entry['mail_id'] != mail.id}
+
+    news = get_snapshots_index_news(Mail.objects.filter(id=mail.id))
+    index[mail.dispatch_date.strftime(SNAPSHOT_DATE_FORMAT)] = get_snapshots_index_entry(mail, news.get(mail.id, []))
+
+    write_snapshots_index(storage, index)
+
+
+def publish_tinto_snapshot(mail_id, update_index=True):
+    """
+    Publish the static pages of a sent daily Tinto and its news.
+
+    :params:
+    mail_id: int
+    update_index: bool
+
+    :return:
+    published: bool
+    """
+    mail = Mail.objects.filter(
+        id=mail_id,
+        type=Mail.DAILY,
+        sent_datetime__isnull=False,
+        tinto__isnull=False
+    ).first()
+
+    if not mail:
+        return False
+
+    storage = get_snapshots_storage()
+
+    write_snapshot(storage, get_tinto_snapshot_name(mail), render_tinto_page(mail))
+
+    for tinto_block_entry in mail.tinto.tintoblocksentries_set.all():
+        write_snapshot(
+            storage,
+            get_web_news_snapshot_name(tinto_block_entry.id),
+            render_web_news_page(tinto_block_entry, mail)
+        )
+
+    if update_index:
+        update_snapshots_index(storage, mail)
+
+    return True
+
+
+def safe_publish_tinto_snapshot(mail_id):
+    """
+    Publish the static pages of a Tinto, failures are logged since the
+    dynamic pages are still available.
+
+    :params:
+    mail_id: int
+    """
+    try:
+        publish_tinto_snapshot(mail_id)
+
+    except Exception as e:
+        logger.error(f'Static snapshot of Mail {mail_id} could not be published: {e}')
+
+
+def schedule_tinto_snapshot(mail_id):
+    """
+    Publish the static pages of a Tinto once the current transaction is committed.
+
+    :params:
+    mail_id: int
+    """
+    if settings.STATIC_SNAPSHOTS_ENABLED:
+        transaction.on_commit(partial(safe_publish_tinto_snapshot, mail_id))
+
+
+@receiver(pre_save, sender=Mail)
+def check_tinto_snapshot_changes(sender, instance, *args, **kwargs):
+    """
+    Check whether the save of a daily Tinto has to publish its static pages: when it
+    is first sent or when its content is edited afterwards. Saves that only mark
+    another dispatch time as sent or change nothing rendered do not publish them.
+    """
+    instance._publish_snapshot = False
+
+    if not (settings.STATIC_SNAPSHOTS_ENABLED and instance.type == Mail.DAILY and instance.sent_datetime):
+        return
+
+    instance._publish_snapshot = not Mail.objects.filter(
+        id=instance.id,
+        sent_datetime__isnull=False,
+        **{field: getattr(instance, field) for field in SNAPSHOT_FIELDS}
+    ).exists()
+
+
+@receiver(post_save, sender=Mail)
+def publish_sent_tinto_snapshot(sender, instance, *args, **kwargs):
+    """
+    Publish the static pages of a daily Tinto when it is first sent or edited afterwards.
+    """
+    if getattr(instance, '_publish_snapshot', False):
+        schedule_tinto_snapshot(instance.id)
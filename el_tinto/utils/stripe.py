@@ -2,10 +2,12 @@ import os
 from datetime import timedelta, date
 
 import stripe
+from django.db import transaction
 
 from el_tinto.integrations.stripe.models import StripePayment, StripeCustomer
 from el_tinto.mails.models import Mail
 from el_tinto.users.models import User, UserTier
+from el_tinto.utils.send_mail import enqueue_mail
 from el_tinto.utils.users import create_user_referral_code
 from el_tinto.utils.utils import TASTE_CLUB_PRODUCTS, TASTE_CLUB_TIER_UTILS, TASTE_CLUB_OWNER_CANCELATION_MAIL, \
     TASTE_CLUB_BENEFICIARY_CANCELATION_MAIL, UTILITY_MAILS, ONBOARDING_EMAIL_NAME
@@ -13,6 +15,7 @@ from el_tinto.utils.utils import TASTE_CLUB_PRODUCTS, TASTE_CLUB_TIER_UTILS, TAS
 stripe.api_key = os.getenv('STRIPE_KEY')
 
 
+@transaction.atomic
 def handle_payment_intent_succeeded(payment_intent):
     """
     Create StripePayment and send payment confirmation email.
@@ -36,8 +39,7 @@ def handle_payment_intent_succeeded(payment_intent):
 
         # send onboarding email
         onboarding_mail_instance = Mail.objects.get(id=UTILITY_MAILS.get(ONBOARDING_EMAIL_NAME))
-        onboarding_mail = onboarding_mail_instance.get_mail_class()
-        onboarding_mail.send_mail(user)
+        enqueue_mail(onboarding_mail_instance, user)
 
     payment = StripePayment.objects.create(
         user=user,
@@ -92,14 +94,13 @@ def handle_payment_intent_succeeded(payment_intent):
             # send confirmation mail
             tier_mail_id = TASTE_CLUB_TIER_UTILS[tier]['welcome_mail']
             instance = Mail.objects.get(id=tier_mail_id)
-            mail = instance.get_mail_class()
-
-            mail.send_mail(user=user)
+            enqueue_mail(instance, user)
 
         # add payment to tier
         user_tier.payments.add(payment)
 
 
+@transaction.atomic
 def handle_unsuscribe(user_tier):
     """
     Cancel user subscription to avoid further charging
@@ -117,18 +118,16 @@ def handle_unsuscribe(user_tier):
         # send confirmation mail
         # send confirmation mail
         instance = Mail.objects.get(id=TASTE_CLUB_OWNER_CANCELATION_MAIL)
-        mail = instance.get_mail_class()
-        mail.send_mail(user=user_tier.user)
+        enqueue_mail(instance, user_tier.user)
 
         # Update child tiers
         instance = Mail.objects.get(id=TASTE_CLUB_BENEFICIARY_CANCELATION_MAIL)
-        mail = instance.get_mail_class()
         for child_tier in user_tier.children_tiers.filter(valid_to=user_tier.valid_to):
             child_tier.will_renew = False
             child_tier.save()
 
             # send confirmation mail
-            mail.send_mail(user=child_tier.user)
+            enqueue_mail(instance, child_tier.user)
 
     except stripe.error.InvalidRequestError:
         pass
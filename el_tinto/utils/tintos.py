@@ -1,11 +1,65 @@
+import hashlib
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import MD5
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from el_tinto.mails.models import Mail
-from el_tinto.tintos.models import TintoBlocksEntries
+from el_tinto.tintos.models import Tinto, TintoBlocksEntries
+from el_tinto.utils.snapshots import schedule_tinto_snapshot
 from el_tinto.utils.utils import TINTO_BLOCK_TYPE_INTRO_ID, TINTO_BLOCK_TYPE_COLOMBIANISM_ID, TINTO_BLOCK_TYPE_NEWS_ID
 
 
+# Tinto html variants
+FULL_TINTO_HTML = 'full'
+SUNDAY_NO_PRIZE_TINTO_HTML = 'sunday_no_prize'
+
+# TintoBlock types included in the Sunday mail when user doesn't have the prize unlocked
+SUNDAY_NO_PRIZE_BLOCK_TYPES_IDS = (
+    TINTO_BLOCK_TYPE_INTRO_ID,
+    TINTO_BLOCK_TYPE_COLOMBIANISM_ID,
+    TINTO_BLOCK_TYPE_NEWS_ID
+)
+
+
+def generate_tinto_html_variants(tinto):
+    """
+    Generate every html variant of the passed Tinto fetching its
+    TintoBlocksEntries only once.
+
+    - FULL_TINTO_HTML: every entry, used by the mails and the web page.
+    - SUNDAY_NO_PRIZE_TINTO_HTML: first intro, colombianism and news
+      entries, for users that don't have the sundays mail prize unlocked.
+
+    :params:
+    tinto: Tinto object
+
+    :return:
+    html_variants: dict
+    """
+    full_html = []
+    first_html_by_block_type = {}
+
+    tinto_blocks_entries = TintoBlocksEntries.objects.filter(tinto_id=tinto.id).order_by('position').values_list(
+        'display_html', 'tinto_block__type_id'
+    )
+
+    for display_html, block_type_id in tinto_blocks_entries:
+        full_html.append(display_html or '')
+        first_html_by_block_type.setdefault(block_type_id, display_html or '')
+
+    return {
+        FULL_TINTO_HTML: ''.join(full_html),
+        SUNDAY_NO_PRIZE_TINTO_HTML: ''.join(
+            first_html_by_block_type.get(block_type_id, '') for block_type_id in SUNDAY_NO_PRIZE_BLOCK_TYPES_IDS
+        )
+    }
+
+
 def generate_tinto_html(tinto):
     """
     Generate html based on the TintoBlocks related to the passed Tinto
@@ -16,12 +70,7 @@ def generate_tinto_html(tinto):
     :return:
     html: str
     """
-    html = ''
-
-    for tinto_block_entry in tinto.tintoblocksentries_set.all():
-        html += tinto_block_entry.display_html
-
-    return html
+    return generate_tinto_html_variants(tinto)[FULL_TINTO_HTML]
 
 
 def generate_tinto_html_sunday_no_prize(tinto):
@@ -35,17 +84,7 @@ def generate_tinto_html_sunday_no_prize(tinto):
     :return:
     html: str
     """
-    intro_html = tinto.tintoblocksentries_set.filter(tinto_block__type__id=TINTO_BLOCK_TYPE_INTRO_ID).first()
-    colombianism = tinto.tintoblocksentries_set.filter(tinto_block__type__id=TINTO_BLOCK_TYPE_COLOMBIANISM_ID).first()
-    first_news = tinto.tintoblocksentries_set.filter(tinto_block__type__id=TINTO_BLOCK_TYPE_NEWS_ID).first()
-
-    html = (
-        (intro_html.display_html if intro_html else '') +
-        (colombianism.display_html if colombianism else '') +
-        (first_news.display_html if first_news else '')
-    )
-
-    return html
+    return generate_tinto_html_variants(tinto)[SUNDAY_NO_PRIZE_TINTO_HTML]
 
 
 @receiver(post_save, sender=Mail)
@@ -62,16 +101,115 @@ def update_tinto_title(sender, instance, *args, **kwargs):
             raise AttributeError(f"Mail {instance} has no related Tinto")
 
 
+def regenerate_tinto_mail_html(tinto_id):
+    """
+    Regenerate the html of the Mail related to the given Tinto. The Mail is
+    only written when the content hash of the html has changed.
+
+    :params:
+    tinto_id: int
+
+    :return:
+    updated: bool
+    """
+    mail = Mail.objects.filter(tinto_id=tinto_id).annotate(html_hash=MD5('html')).only(
+        'id', 'type', 'sent_datetime'
+    ).first()
+
+    if not mail:
+        return False
+
+    html = generate_tinto_html_variants(Tinto(id=tinto_id))[FULL_TINTO_HTML]
+
+    if hashlib.md5(html.encode()).hexdigest() == mail.html_hash:
+        return False
+
+    # Queryset update, the html does not need to be propagated to the Tinto
+    Mail.objects.filter(id=mail.id).update(html=html, updated_at=timezone.now())
+
+    # Queryset updates do not send the save signals, the snapshot of a sent Tinto is published here
+    if mail.type == Mail.DAILY and mail.sent_datetime:
+        schedule_tinto_snapshot(mail.id)
+
+    return True
+
+
+def mark_tinto_dirty(tinto_id):
+    """
+    Schedule the regeneration of the Mail html of the given Tinto once the
+    current transaction is committed. Several calls for the same Tinto within
+    one transaction result in a single regeneration. Outside a transaction the
+    html is regenerated right away.
+
+    :params:
+    tinto_id: int
+    """
+    connection = transaction.get_connection()
+
+    for pending_callback in connection.run_on_commit:
+        callback = pending_callback[1]
+
+        if getattr(callback, 'func', None) is regenerate_tinto_mail_html and callback.args == (tinto_id,):
+            return
+
+    transaction.on_commit(partial(regenerate_tinto_mail_html, tinto_id))
+
+
+def shift_tinto_blocks_entries_positions(tinto_id, offset, position_from, position_to=None):
+    """
+    Shift the position of the TintoBlocksEntries of the given Tinto whose
+    position is within the given range with a single UPDATE statement.
+    Duplicated positions are allowed until the end of the transaction since
+    the unique position constraint is deferred.
+
+    :params:
+    tinto_id: int
+    offset: int
+    position_from: int
+    position_to: int | None, no upper bound when None
+
+    :return:
+    shifted_entries_count: int
+    """
+    tinto_blocks_entries = TintoBlocksEntries.objects.filter(tinto_id=tinto_id, position__gte=position_from)
+
+    if position_to is not None:
+        tinto_blocks_entries = tinto_blocks_entries.filter(position__lte=position_to)
+
+    return tinto_blocks_entries.update(position=F('position') + offset)
+
+
+def move_tinto_block_entry(tinto_block_entry, new_position):
+    """
+    Move the given TintoBlockEntry to a new position within its Tinto,
+    shifting the entries in between, and regenerate the Mail html once.
+
+    :params:
+    tinto_block_entry: TintoBlocksEntries obj
+    new_position: int
+    """
+    old_position = tinto_block_entry.position
+
+    if new_position == old_position:
+        return
+
+    with transaction.atomic():
+        if new_position > old_position:
+            shift_tinto_blocks_entries_positions(tinto_block_entry.tinto_id, -1, old_position + 1, new_position)
+
+        else:
+            shift_tinto_blocks_entries_positions(tinto_block_entry.tinto_id, 1, new_position, old_position - 1)
+
+        TintoBlocksEntries.objects.filter(id=tinto_block_entry.id).update(position=new_position)
+        tinto_block_entry.position = new_position
+
+        mark_tinto_dirty(tinto_block_entry.tinto_id)
+
+
 @receiver(post_save, sender=TintoBlocksEntries)
 def update_mail_html(sender, instance, *args, **kwargs):
     """
-    Update the html content of the Mail related to the current
-    TintoBlockEntry
+    Mark the Tinto of the current TintoBlockEntry as dirty so its
+    Mail html gets regenerated
     """
-    try:
-        mail = instance.tinto.mail
-        mail.html = generate_tinto_html(instance.tinto)
-        mail.save()
-
-    except AttributeError:
-        pass
+    mark_tinto_dirty(instance.tinto_id)
@@ -1,6 +1,9 @@
+import codecs
+import csv
 import math
 import random
 import string
+from itertools import islice
 
 from django.db import connection
 
@@ -9,37 +12,146 @@ from el_tinto.users.models import User
 from el_tinto.utils.utils import MILESTONES
 
 
-def create_user_referral_code(user):
+def generate_referral_code(email):
     """
-    Create a unique user referral code base on its email name without punctuation marks
-    and two random alphanumeric values
+    Generate a referral code candidate base on the email name without punctuation marks
+    and random alphanumeric values. Uniqueness is not checked.
 
     :params:
-    user: User object
+    email: str
 
     :return:
     referral_code: str
     """
-    user_email_name = user.email.split('@')[0]
+    user_email_name = email.split('@')[0]
     user_email_name_no_marks = user_email_name.translate(str.maketrans('', '', string.punctuation))
 
     base = user_email_name_no_marks[0:4]
 
     complement = ''.join(random.choices(string.ascii_letters + string.digits, k=6-len(base)))
 
-    referral_code_exists = False
+    return (base + complement).upper()
 
-    while not referral_code_exists:
-        referral_code = (base + complement).upper()
 
-        if User.objects.filter(referral_code=referral_code).exists():
-            complement = ''.join(random.choices(string.ascii_letters + string.digits, k=6-len(base)))
-        else:
-            referral_code_exists = True
+def create_user_referral_code(user):
+    """
+    Create a unique user referral code base on its email name without punctuation marks
+    and two random alphanumeric values
+
+    :params:
+    user: User object
+
+    :return:
+    referral_code: str
+    """
+    referral_code = generate_referral_code(user.email)
+
+    while User.objects.filter(referral_code=referral_code).exists():
+        referral_code = generate_referral_code(user.email)
 
     return referral_code
 
 
+def create_users_referral_codes(emails):
+    """
+    Create unique referral codes for several users at once, checking collisions
+    against the database with one query per round instead of one per user.
+
+    :params:
+    emails: [str]
+
+    :return:
+    referral_codes: dict, {email: referral_code}
+    """
+    referral_codes = {email: generate_referral_code(email) for email in emails}
+    colliding_emails = list(referral_codes.keys())
+
+    while colliding_emails:
+        existing_referral_codes = set(
+            User.objects.filter(referral_code__in=referral_codes.values()).values_list('referral_code', flat=True)
+        )
+
+        batch_referral_codes = set()
+        colliding_emails = []
+
+        for email, referral_code in referral_codes.items():
+            if referral_code in existing_referral_codes or referral_code in batch_referral_codes:
+                colliding_emails.append(email)
+            else:
+                batch_referral_codes.add(referral_code)
+
+        for email in colliding_emails:
+            referral_codes[email] = generate_referral_code(email)
+
+    return referral_codes
+
+
+def import_meta_users(csv_file, batch_size=1000):
+    """
+    Upsert users from a Meta leads csv file (utf-16, tab separated).
+    The file is read incrementally and users are written in batches:
+    existing inactive users are activated and new users are created
+    with their referral code.
+
+    :params:
+    csv_file: File object
+    batch_size: int
+
+    :return:
+    created_users_ids: [int]
+    """
+    reader = csv.DictReader(codecs.getreader('utf-16')(csv_file), delimiter='\t')
+
+    created_users_ids = []
+
+    while True:
+        lines = list(islice(reader, batch_size))
+
+        if not lines:
+            break
+
+        created_users_ids += upsert_meta_users_batch(lines)
+
+    return created_users_ids
+
+
+def upsert_meta_users_batch(lines):
+    """
+    Upsert a batch of Meta csv lines.
+
+    :params:
+    lines: [dict]
+
+    :return:
+    created_users_ids: [int]
+    """
+    lines_by_email = {line['email']: line for line in lines if line.get('email')}
+
+    existing_users = dict(User.objects.filter(email__in=lines_by_email.keys()).values_list('email', 'is_active'))
+    new_emails = [email for email in lines_by_email if email not in existing_users]
+    referral_codes = create_users_referral_codes(new_emails)
+
+    # Activate users
+    users = [User(email=email, is_active=True) for email, is_active in existing_users.items() if not is_active]
+
+    # Create new users
+    for email in new_emails:
+        line = lines_by_email[email]
+
+        users.append(User(
+            email=email,
+            first_name=line['first_name'] if len(line['first_name']) < 25 else '',
+            last_name=line['last_name'] if len(line['last_name']) < 25 else '',
+            utm_source=User.FACEBOOK,
+            medium='ads',
+            referral_code=referral_codes[email]
+        ))
+
+    User.objects.bulk_create(users, update_conflicts=True, unique_fields=['email'], update_fields=['is_active'])
+
+    return list(User.objects.filter(email__in=new_emails).values_list('id', flat=True))
+
+
 def calculate_referral_race_parameters(user):
     """
     Calculates in what percentage of the total users the current user is
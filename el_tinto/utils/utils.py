@@ -2,6 +2,8 @@ import os
 import re
 
 from django.conf import settings
+from django.db.models import Value
+from django.db.models.functions import Replace
 from django.utils.crypto import get_random_string
 
 from el_tinto.users.models import UserTier
@@ -214,6 +216,24 @@ def generate_random_alphanumeric_code():
     return alphanumeric_code
 
 
+def escape_html_expression(expression):
+    """
+    Escape the html special characters of a text database expression,
+    the counterpart of django.utils.html.escape run by the database.
+
+    :params:
+    expression: Expression obj | str, field name
+
+    :return:
+    escaped_expression: Expression obj
+    """
+    # Ampersands go first so the entities added afterwards are not escaped again
+    for character, entity in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;')):
+        expression = Replace(expression, Value(character), Value(entity))
+
+    return expression
+
+
 # Constants
 
 EVENT_TYPE_CLICK = 'Click'
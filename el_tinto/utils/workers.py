@@ -0,0 +1,64 @@
+"""
+Backends of the mail workers a mail dispatch is fanned out to, see
+el_tinto.utils.send_mail.fan_out_mail. A backend runs send_fan_out_batch for each
+batch of users, the batches report their progress in the MailFanOuts row of the
+dispatch so backends do not need to return results.
+Celery is only imported by its backend, it is not required to run the local one.
+"""
+import abc
+
+from django.conf import settings
+
+
+class MailWorkerBackend(abc.ABC):
+    """Runs the batches of a fanned out mail dispatch."""
+
+    @abc.abstractmethod
+    def send_batch(self, fan_out_id, batch_index, users_ids):
+        """
+        Send a mail to a batch of users of a fanned out dispatch.
+
+        :params:
+        fan_out_id: int, MailFanOuts id
+        batch_index: int
+        users_ids: [int]
+
+        :return: None
+        """
+
+
+class LocalWorkerBackend(MailWorkerBackend):
+    """Sends the batches in the current process, one after the other."""
+
+    def send_batch(self, fan_out_id, batch_index, users_ids):
+        from el_tinto.utils.send_mail import send_fan_out_batch
+
+        send_fan_out_batch(fan_out_id, batch_index, users_ids)
+
+
+class CeleryWorkerBackend(MailWorkerBackend):
+    """Queues the batches as Celery tasks, sent by the mail_worker service."""
+
+    def send_batch(self, fan_out_id, batch_index, users_ids):
+        from el_tinto.mails.tasks import send_fan_out_batch_task
+
+        send_fan_out_batch_task.delay(fan_out_id, batch_index, users_ids)
+
+
+MAIL_WORKER_BACKENDS = {
+    'local': LocalWorkerBackend,
+    'celery': CeleryWorkerBackend
+}
+
+
+def get_mail_worker_backend():
+    """
+    Get the mail worker backend set in MAIL_WORKER_BACKEND.
+
+    :return:
+    backend: MailWorkerBackend obj, None when mail dispatches are not fanned out
+    """
+    if not settings.MAIL_WORKER_BACKEND:
+        return None
+
+    return MAIL_WORKER_BACKENDS[settings.MAIL_WORKER_BACKEND]()